@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Synthetic test audio: tones, chirps, noise, silence and speech-like
+signals as PCM 16-bit mono, shared by the fixture and test scripts.
+
+Whole buffers are computed at once with NumPy and every WAV is written
+with a single writeframes() call. Without NumPy the same signals are
+built as array('h') with the math module: slower, same output (except
+speech_like, which needs NumPy).
+
+Usage:
+    from audio_synth import chirp, concat, silence, tone, write_wav
+    write_wav("test_output/probe.wav", concat(tone(440, 1.0), silence(0.3), chirp(200, 4000, 2.0)))
+
+Amplitudes are peak values in sample units (full scale: 32767).
+"""
+
+import math
+import os
+import random
+import struct
+import sys
+import wave
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    # Pure-Python fallback, sample by sample
+    np = None
+
+SAMPLE_RATE = 16000
+DEFAULT_AMPLITUDE = 16000
+FULL_SCALE = 32767
+
+# Encodings write_encoded_wav() produces (all readable by vosk_transcribe.py)
+SAMPLE_FORMATS = ("u8", "s16", "s24", "s32", "f32")
+WAVE_FORMAT_PCM = 1
+WAVE_FORMAT_IEEE_FLOAT = 3
+
+
+# ─── Buffers ───────────────────────────────────────────────────────────────────
+
+def _times(duration: float, sample_rate: int):
+    n = int(sample_rate * duration)
+    return np.arange(n) / sample_rate if np is not None else [i / sample_rate for i in range(n)]
+
+
+def _quantize(values, amplitude: float):
+    """Scale a [-1, 1] float signal to int16 samples with peak `amplitude` (clipped)."""
+    if np is not None:
+        return np.clip(np.rint(values * amplitude), -FULL_SCALE - 1, FULL_SCALE).astype("<i2")
+    return array("h", (max(-FULL_SCALE - 1, min(FULL_SCALE, round(v * amplitude))) for v in values))
+
+
+def _normalized(values):
+    """Scale a float signal so its peak is 1 (silence stays silent)."""
+    if np is not None:
+        peak = np.max(np.abs(values)) if len(values) else 0.0
+        return values / peak if peak else values
+    peak = max((abs(v) for v in values), default=0.0)
+    return [v / peak for v in values] if peak else values
+
+
+def _scale(values, factor: float):
+    return values * factor if np is not None else [v * factor for v in values]
+
+
+def concat(*parts):
+    """Join sample buffers end to end."""
+    if np is not None:
+        return np.concatenate([np.asarray(part, dtype="<i2") for part in parts]) if parts else silence(0)
+    joined = array("h")
+    for part in parts:
+        joined.extend(part)
+    return joined
+
+
+def to_bytes(samples) -> bytes:
+    """Little-endian 16-bit PCM bytes of a sample buffer."""
+    if np is not None and isinstance(samples, np.ndarray):
+        return samples.astype("<i2", copy=False).tobytes()
+    if sys.byteorder == "big":
+        samples = array("h", samples)
+        samples.byteswap()
+    return samples.tobytes()
+
+
+def write_wav(filename, samples, sample_rate: int = SAMPLE_RATE):
+    """Write a mono 16-bit WAV in one call (parent directories are created); return `filename`."""
+    os.makedirs(os.path.dirname(str(filename)) or ".", exist_ok=True)
+    with wave.open(str(filename), 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        wf.writeframes(to_bytes(samples))
+    return filename
+
+
+# ─── Signals ───────────────────────────────────────────────────────────────────
+
+def silence(duration: float, sample_rate: int = SAMPLE_RATE):
+    n = int(sample_rate * duration)
+    return np.zeros(n, dtype="<i2") if np is not None else array("h", bytes(2 * n))
+
+
+def tone(freq: float = 440, duration: float = 3.0, amplitude: float = DEFAULT_AMPLITUDE,
+         sample_rate: int = SAMPLE_RATE):
+    """Pure sine tone."""
+    return multi_tone([freq], duration, amplitude, sample_rate)
+
+
+def multi_tone(freqs, duration: float = 3.0, amplitude: float = DEFAULT_AMPLITUDE, sample_rate: int = SAMPLE_RATE):
+    """Equal-level sum of sine tones, scaled so the mix never exceeds `amplitude`."""
+    t = _times(duration, sample_rate)
+    if np is not None:
+        mixed = np.zeros(len(t))
+        for freq in freqs:
+            mixed += np.sin(2 * np.pi * freq * t)
+    else:
+        mixed = [sum(math.sin(2 * math.pi * freq * s) for freq in freqs) for s in t]
+    return _quantize(_scale(mixed, 1 / max(1, len(freqs))), amplitude)
+
+
+def chirp(f0: float, f1: float, duration: float = 3.0, amplitude: float = DEFAULT_AMPLITUDE,
+          sample_rate: int = SAMPLE_RATE, log: bool = False):
+    """Sweep from `f0` to `f1` Hz, linearly or (with `log`) exponentially."""
+    t = _times(duration, sample_rate)
+    exp = np.exp if np is not None else math.exp
+    # Instantaneous phase (integral of the frequency), for a float or a whole array of times
+    if log and f0 > 0 and f1 > 0 and f0 != f1:
+        k = math.log(f1 / f0)
+
+        def phase(s):
+            return 2 * math.pi * f0 * duration / k * (exp(k * s / duration) - 1)
+    else:
+        rate = (f1 - f0) / duration if duration else 0.0
+
+        def phase(s):
+            return 2 * math.pi * (f0 * s + rate * s * s / 2)
+
+    if np is not None:
+        return _quantize(np.sin(phase(t)), amplitude)
+    return _quantize([math.sin(phase(s)) for s in t], amplitude)
+
+
+def white_noise(duration: float = 3.0, amplitude: float = DEFAULT_AMPLITUDE, seed: int = None,
+                sample_rate: int = SAMPLE_RATE):
+    """Uniform white noise; the same `seed` gives the same samples."""
+    return _quantize(_white_values(int(sample_rate * duration), seed), amplitude)
+
+
+def pink_noise(duration: float = 3.0, amplitude: float = DEFAULT_AMPLITUDE, seed: int = None,
+               sample_rate: int = SAMPLE_RATE):
+    """1/f noise (-3 dB per octave), peak-normalized to `amplitude`."""
+    return _quantize(_pink_values(int(sample_rate * duration), seed), amplitude)
+
+
+def _white_values(n: int, seed: int = None):
+    if np is not None:
+        return np.random.default_rng(seed).uniform(-1.0, 1.0, n)
+    rng = random.Random(seed)
+    return [rng.uniform(-1.0, 1.0) for _ in range(n)]
+
+
+def _pink_values(n: int, seed: int = None):
+    """Peak-normalized 1/f noise as floats."""
+    if n == 0:
+        return np.zeros(0) if np is not None else []
+    if np is not None:
+        # Shape white noise in the frequency domain: power ∝ 1/f
+        spectrum = np.fft.rfft(np.random.default_rng(seed).standard_normal(n))
+        freqs = np.fft.rfftfreq(n)
+        freqs[0] = freqs[1] if n > 1 else 1.0
+        return _normalized(np.fft.irfft(spectrum / np.sqrt(freqs), n))
+
+    # Paul Kellet's economy filter over white noise
+    rng = random.Random(seed)
+    b0 = b1 = b2 = 0.0
+    values = []
+    for _ in range(n):
+        white = rng.uniform(-1.0, 1.0)
+        b0 = 0.99765 * b0 + white * 0.0990460
+        b1 = 0.96300 * b1 + white * 0.2965164
+        b2 = 0.57000 * b2 + white * 1.0526913
+        values.append(b0 + b1 + b2 + white * 0.1848)
+    return _normalized(values)
+
+
+def speech_like(duration: float, seed: int, sample_rate: int = SAMPLE_RATE):
+    """Voiced syllables (harmonic f0 + formant-ish envelope) at ~4 Hz with pauses. Needs NumPy."""
+    if np is None:
+        raise RuntimeError("speech_like() needs NumPy: pip install numpy")
+
+    rng = np.random.default_rng(seed)
+    n = int(duration * sample_rate)
+    t = np.arange(n) / sample_rate
+
+    # Pitch contour wandering around 150 Hz, integrated to a phase
+    f0 = 150 + 30 * np.sin(2 * np.pi * 0.3 * t) + rng.normal(0, 2, n).cumsum() / sample_rate
+    phase = 2 * np.pi * np.cumsum(f0) / sample_rate
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 12))
+
+    # Syllable envelope, with a ~400 ms pause every couple of seconds
+    envelope = np.clip(np.sin(2 * np.pi * 4 * t + rng.uniform(0, np.pi)), 0, None) ** 2
+    pause_every = 2.0 + rng.uniform(0, 1)
+    envelope[(t % pause_every) > pause_every - 0.4] = 0
+
+    noise = rng.normal(0, 0.01, n)
+    signal = 0.3 * voiced * envelope / np.max(np.abs(voiced)) + noise
+    return (np.clip(signal, -1, 1) * FULL_SCALE).astype("<i2")
+
+
+# ─── Float Signals ─────────────────────────────────────────────────────────────
+# Corpus rendering works on [-1, 1] float arrays and needs NumPy.
+
+def _require_numpy(what: str):
+    if np is None:
+        raise RuntimeError(f"{what} needs NumPy: pip install numpy")
+
+
+def to_float(samples):
+    """int16 sample buffer → [-1, 1] float array."""
+    _require_numpy("to_float()")
+    return np.asarray(samples, dtype=np.float64) / 32768.0
+
+
+def read_wav_float(filename):
+    """Read an integer PCM WAV as a mono [-1, 1] float array; return (values, sample_rate)."""
+    _require_numpy("read_wav_float()")
+    with wave.open(str(filename), 'rb') as wf:
+        channels, width, rate = wf.getnchannels(), wf.getsampwidth(), wf.getframerate()
+        raw = wf.readframes(wf.getnframes())
+    if width == 1:
+        values = (np.frombuffer(raw, dtype=np.uint8).astype(np.float64) - 128) / 128
+    elif width == 3:
+        packed = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        packed = packed[:, 0] | (packed[:, 1] << 8) | (packed[:, 2] << 16)
+        values = ((packed ^ 0x800000) - 0x800000) / 8388608.0
+    elif width in (2, 4):
+        values = np.frombuffer(raw, dtype=f"<i{width}").astype(np.float64) / float(1 << (8 * width - 1))
+    else:
+        raise ValueError(f"Unsupported WAV sample width: {width} bytes")
+    if channels > 1:
+        values = values[:values.size - values.size % channels].reshape(-1, channels).mean(axis=1)
+    return values, rate
+
+
+def resample(values, rate: int, target_rate: int):
+    """Linear-interpolation resampling (fine for fixtures, not for listening tests)."""
+    _require_numpy("resample()")
+    if rate == target_rate or len(values) == 0:
+        return values
+    n = int(round(len(values) * target_rate / rate))
+    return np.interp(np.arange(n) * (rate / target_rate), np.arange(len(values)), values)
+
+
+def add_noise(values, snr_db: float, color: str = "white", seed: int = None, reference=None):
+    """Mix seeded white or pink noise at `snr_db` below the power of `reference` (default: `values`)."""
+    _require_numpy("add_noise()")
+    reference = values if reference is None else reference
+    signal_power = float(np.mean(np.square(reference))) if len(reference) else 0.0
+    if not math.isfinite(snr_db) or signal_power == 0.0 or len(values) == 0:
+        return values
+    noise = _pink_values(len(values), seed) if color == "pink" else _white_values(len(values), seed)
+    noise = noise * math.sqrt(signal_power / 10 ** (snr_db / 10) / float(np.mean(np.square(noise))))
+    return values + noise
+
+
+def encode(values, sample_format: str = "s16", channels: int = 1) -> bytes:
+    """Encode a mono [-1, 1] float array as interleaved little-endian WAV data."""
+    _require_numpy("encode()")
+    values = np.clip(np.asarray(values, dtype=np.float64), -1.0, 1.0)
+    if channels > 1:
+        values = np.repeat(values, channels)
+    if sample_format == "u8":
+        return np.rint(values * 127 + 128).astype(np.uint8).tobytes()
+    if sample_format == "s16":
+        return np.rint(values * FULL_SCALE).astype("<i2").tobytes()
+    if sample_format == "s24":
+        packed = np.rint(values * 8388607).astype("<i4").view(np.uint8).reshape(-1, 4)
+        return packed[:, :3].tobytes()
+    if sample_format == "s32":
+        return np.rint(values * 2147483647).astype("<i4").tobytes()
+    if sample_format == "f32":
+        return values.astype("<f4").tobytes()
+    raise ValueError(f"Unknown sample format: {sample_format} (expected one of {', '.join(SAMPLE_FORMATS)})")
+
+
+def write_encoded_wav(filename, values, sample_rate: int = SAMPLE_RATE, sample_format: str = "s16",
+                      channels: int = 1):
+    """Write a mono [-1, 1] float array as a WAV in any of SAMPLE_FORMATS, copied to `channels`."""
+    data = encode(values, sample_format, channels)
+    width = {"u8": 1, "s16": 2, "s24": 3, "s32": 4, "f32": 4}[sample_format]
+    tag = WAVE_FORMAT_IEEE_FLOAT if sample_format == "f32" else WAVE_FORMAT_PCM
+    block_align = width * channels
+    pad = b"\0" * (len(data) & 1)  # RIFF chunks are word-aligned
+    header = struct.pack("<4sI4s4sIHHIIHH4sI", b"RIFF", 36 + len(data) + len(pad), b"WAVE", b"fmt ", 16, tag,
+                         channels, sample_rate, sample_rate * block_align, block_align, width * 8, b"data", len(data))
+    os.makedirs(os.path.dirname(str(filename)) or ".", exist_ok=True)
+    with open(filename, "wb") as f:
+        f.write(header + data + pad)
+    return filename
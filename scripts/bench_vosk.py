@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Vosk speech-to-text benchmark suite.
+
+Builds deterministic fixtures (1-120 s of speech-like audio) and times
+scripts/vosk_transcribe.py under two conditions:
+
+  cold  one subprocess per clip — Python startup, imports and Model() load
+        included (what vosk-service.ts pays without the persistent worker)
+  warm  one --serve worker with the models loaded once, jobs sent over its
+        Unix socket with the result cache disabled
+
+The warm runs also sweep feed chunk sizes (--chunk-bytes). Every
+(mode, language, chunk size, duration) cell reports p50/p95 latency,
+median real-time factor and peak RSS as JSON. A warm cell's peak RSS is
+the worker's high-water mark during that cell only (reset through
+/proc/<pid>/clear_refs); where that is not possible (non-Linux) warm
+cells report null and are left out of the peak RSS comparison.
+
+Usage:
+    python scripts/bench_vosk.py                                   # full matrix
+    python scripts/bench_vosk.py --modes warm --durations 5 30 --repeats 10
+    python scripts/bench_vosk.py --save-baseline scripts/bench_vosk_baseline.json
+    python scripts/bench_vosk.py --baseline scripts/bench_vosk_baseline.json --threshold 0.15
+
+With --baseline, every metric is compared with the stored run and the
+script exits with code 1 if any is worse by more than --threshold.
+"""
+
+import argparse
+import json
+import os
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from audio_synth import speech_like, write_wav
+
+# ─── Constants ─────────────────────────────────────────────────────────────────
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+SCRIPT = BASE_DIR / "scripts" / "vosk_transcribe.py"
+MODELS_DIR = BASE_DIR / "models"
+FIXTURE_DIR = BASE_DIR / "test_output" / "bench"
+
+HEADER = struct.Struct(">I")
+
+DEFAULT_MODELS = {
+    "fr": os.environ.get("VOSK_MODEL_FR_PATH", str(MODELS_DIR / "vosk-model-fr-0.22")),
+    "en": os.environ.get("VOSK_MODEL_EN_PATH", str(MODELS_DIR / "vosk-model-en-us-0.22")),
+}
+
+# Lower is better for every metric compared against the baseline
+COMPARED_METRICS = ("p50_ms", "p95_ms", "rtf_p50", "peak_rss_mb")
+
+
+# ─── Fixtures ──────────────────────────────────────────────────────────────────
+
+def build_fixtures(durations, directory: Path) -> dict:
+    """Write one WAV per duration (reused when already present); return {duration: path}."""
+    directory.mkdir(parents=True, exist_ok=True)
+    fixtures = {}
+    for duration in durations:
+        path = directory / f"speech_{duration:g}s.wav"
+        if not path.exists():
+            write_wav(path, speech_like(duration, seed=int(duration * 1000)))
+        fixtures[duration] = path
+    return fixtures
+
+
+# ─── Statistics ────────────────────────────────────────────────────────────────
+
+def percentile(values, q: float) -> float:
+    """Nearest-rank percentile (works for a single sample)."""
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(q / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def summarize(latencies, rtfs, peaks) -> dict:
+    return {
+        "runs": len(latencies),
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+        "rtf_p50": round(percentile(rtfs, 50), 4) if rtfs else None,
+        "peak_rss_mb": max(peaks) if peaks else None,
+    }
+
+
+# ─── Cold Runs ─────────────────────────────────────────────────────────────────
+
+def run_cold(model_path: str, wav: Path, chunk_bytes: int) -> tuple:
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, str(SCRIPT), "--model", model_path, "--file", str(wav),
+         "--chunk-bytes", str(chunk_bytes), "--timings"],
+        capture_output=True, text=True, timeout=600,
+    )
+    elapsed = (time.perf_counter() - started) * 1000
+    if proc.returncode != 0:
+        raise RuntimeError(f"vosk_transcribe.py exited with {proc.returncode}: {proc.stderr[-300:]}")
+    result = json.loads(proc.stdout.strip())
+    if result.get("error"):
+        raise RuntimeError(result["error"])
+    return elapsed, result.get("timings", {})
+
+
+# ─── Warm Runs ─────────────────────────────────────────────────────────────────
+
+class WarmWorker:
+    """A vosk_transcribe.py --serve process with the result cache disabled."""
+
+    def __init__(self, models: dict):
+        self.socket_path = os.path.join(tempfile.gettempdir(), f"vosk-bench-{os.getpid()}.sock")
+        args = [sys.executable, str(SCRIPT), "--serve", "--socket", self.socket_path, "--cache-entries", "0"]
+        for lang, model_path in models.items():
+            args += ["--lang-model", f"{lang}={model_path}"]
+
+        started = time.perf_counter()
+        self.proc = subprocess.Popen(args, stdout=subprocess.PIPE, text=True)
+        ready = json.loads(self.proc.stdout.readline() or "{}")
+        if ready.get("event") != "ready":
+            self.proc.kill()
+            raise RuntimeError(f"Worker failed to start: {ready.get('error', 'no ready line')}")
+        self.startup_ms = (time.perf_counter() - started) * 1000
+
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.socket_path)
+        self.next_id = 1
+
+    def transcribe(self, lang: str, audio: bytes, chunk_bytes: int) -> tuple:
+        message = {"id": self.next_id, "op": "transcribe", "lang": lang, "chunk_bytes": chunk_bytes,
+                   "timings": True, "audio_len": len(audio)}
+        self.next_id += 1
+        body = json.dumps(message).encode("utf-8")
+
+        started = time.perf_counter()
+        self.sock.sendall(HEADER.pack(len(body)) + body + audio)
+        (length,) = HEADER.unpack(self._recv(HEADER.size))
+        result = json.loads(self._recv(length))
+        elapsed = (time.perf_counter() - started) * 1000
+
+        if result.get("error"):
+            raise RuntimeError(result["error"])
+        return elapsed, result.get("timings", {})
+
+    def _recv(self, n: int) -> bytes:
+        buf = bytearray()
+        while len(buf) < n:
+            data = self.sock.recv(n - len(buf))
+            if not data:
+                raise RuntimeError("Worker closed the connection")
+            buf += data
+        return bytes(buf)
+
+    def reset_peak(self) -> bool:
+        """Reset the worker's RSS high-water mark (VmHWM); False where /proc does not allow it."""
+        try:
+            with open(f"/proc/{self.proc.pid}/clear_refs", "w") as f:
+                f.write("5")
+            return True
+        except OSError:
+            return False
+
+    def peak_rss_mb(self):
+        """The worker's RSS high-water mark since reset_peak(), in MB."""
+        try:
+            with open(f"/proc/{self.proc.pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        return round(int(line.split()[1]) / 1024, 1)
+        except OSError:
+            pass
+        return None
+
+    def close(self):
+        self.sock.close()
+        self.proc.terminate()
+        self.proc.wait(timeout=10)
+
+
+# ─── Matrix ────────────────────────────────────────────────────────────────────
+
+def run_matrix(args, models: dict, fixtures: dict) -> dict:
+    results = {}
+
+    def record(key, runs, peaks=None):
+        latencies = [elapsed for elapsed, _ in runs]
+        rtfs = [t["rtf"] for _, t in runs if t.get("rtf") is not None]
+        if peaks is None:
+            peaks = [t["peak_rss_mb"] for _, t in runs if t.get("peak_rss_mb") is not None]
+        results[key] = summarize(latencies, rtfs, peaks)
+        print(f"  {key:<38} p50={results[key]['p50_ms']:>9.1f} ms  "
+              f"p95={results[key]['p95_ms']:>9.1f} ms  rtf={results[key]['rtf_p50']}", file=sys.stderr)
+
+    if "cold" in args.modes:
+        chunk_bytes = args.chunk_sizes[0]
+        for lang, model_path in models.items():
+            for duration, wav in fixtures.items():
+                if duration > args.cold_max_duration:
+                    continue
+                runs = [run_cold(model_path, wav, chunk_bytes) for _ in range(args.cold_repeats)]
+                record(f"cold/{lang}/chunk={chunk_bytes}/{duration:g}s", runs)
+
+    if "warm" in args.modes:
+        worker = WarmWorker(models)
+        results["warm/startup"] = {"runs": 1, "p50_ms": round(worker.startup_ms, 1),
+                                   "p95_ms": round(worker.startup_ms, 1)}
+        try:
+            for lang in models:
+                for chunk_bytes in args.chunk_sizes:
+                    for duration, wav in fixtures.items():
+                        audio = wav.read_bytes()
+                        # The worker's own peak_rss_mb is its lifetime maximum: measure this cell alone
+                        resettable = worker.reset_peak()
+                        worker.transcribe(lang, audio, chunk_bytes)  # warm-up, not recorded
+                        runs = [worker.transcribe(lang, audio, chunk_bytes) for _ in range(args.repeats)]
+                        peak = worker.peak_rss_mb() if resettable else None
+                        record(f"warm/{lang}/chunk={chunk_bytes}/{duration:g}s", runs,
+                               [peak] if peak is not None else [])
+        finally:
+            worker.close()
+
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """List every metric that got worse than the baseline by more than `threshold`."""
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if not previous:
+            continue
+        for metric in COMPARED_METRICS:
+            before, after = previous.get(metric), current.get(metric)
+            if before and after is not None and after > before * (1 + threshold):
+                regressions.append({"case": key, "metric": metric, "baseline": before, "current": after,
+                                    "change": f"+{(after / before - 1) * 100:.1f}%"})
+    return regressions
+
+
+# ─── Main ──────────────────────────────────────────────────────────────────────
+
+def main():
+    parser = argparse.ArgumentParser(description="Vosk STT benchmark suite")
+    parser.add_argument("--langs", nargs="+", default=["fr", "en"], choices=sorted(DEFAULT_MODELS),
+                        help="Models to benchmark (default: fr en)")
+    parser.add_argument("--model-fr", default=DEFAULT_MODELS["fr"], help="French model directory")
+    parser.add_argument("--model-en", default=DEFAULT_MODELS["en"], help="English model directory")
+    parser.add_argument("--modes", nargs="+", default=["cold", "warm"], choices=["cold", "warm"])
+    parser.add_argument("--durations", nargs="+", type=float, default=[1, 5, 15, 30, 60, 120],
+                        help="Fixture lengths in seconds (default: 1 5 15 30 60 120)")
+    parser.add_argument("--chunk-sizes", nargs="+", type=int, default=[3200, 8000, 16000, 32000],
+                        help="Feed chunk sizes in bytes swept in warm mode; the first is used cold")
+    parser.add_argument("--repeats", type=int, default=5, help="Warm runs per cell (default: 5)")
+    parser.add_argument("--cold-repeats", type=int, default=3, help="Cold runs per cell (default: 3)")
+    parser.add_argument("--cold-max-duration", type=float, default=30,
+                        help="Skip cold runs for fixtures longer than this (default: 30 s)")
+    parser.add_argument("--fixtures", default=str(FIXTURE_DIR), help="Fixture directory")
+    parser.add_argument("--output", "-o", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="Compare against this stored report")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Allowed slowdown vs --baseline before failing (default: 0.10 = 10%%)")
+    parser.add_argument("--save-baseline", help="Also store this run as a baseline file")
+
+    args = parser.parse_args()
+
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        parser.error("NumPy is required to build fixtures: pip install numpy")
+
+    model_args = {"fr": args.model_fr, "en": args.model_en}
+    models = {lang: model_args[lang] for lang in args.langs if os.path.isdir(model_args[lang])}
+    for lang in sorted(set(args.langs) - set(models)):
+        print(f"[SKIP] {lang} model not found: {model_args[lang]}", file=sys.stderr)
+    if not models:
+        parser.error("No Vosk model available to benchmark")
+
+    fixtures = build_fixtures(args.durations, Path(args.fixtures))
+    print(f"Benchmarking {', '.join(models)} on {len(fixtures)} fixtures...", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "python": sys.version.split()[0],
+            "platform": sys.platform,
+            "cpus": os.cpu_count(),
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "models": models,
+        },
+        "results": run_matrix(args, models, fixtures),
+    }
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(report["results"], json.load(f).get("results", {}), args.threshold)
+        report["regressions"] = regressions
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(text + "\n", encoding="utf-8")
+
+    for r in regressions:
+        print(f"[REGRESSION] {r['case']} {r['metric']}: {r['baseline']} -> {r['current']} ({r['change']})",
+              file=sys.stderr)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
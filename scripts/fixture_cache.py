@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Content-keyed store of generated test audio, shared by the test suites.
+
+A fixture is named by a hash of its generator and parameters (defaults
+filled in and whole floats made ints, so `fixture("tone")`,
+`fixture("tone", freq=440)` and `fixture("tone", freq=440.0)` are the
+same file). Existing files are reused across runs and suites; new ones
+are written to a temporary file and renamed into place, and an
+exclusive lock file lets parallel workers asking for the same fixture
+wait for one writer instead of racing it. Once the store grows past
+TEST_FIXTURE_MAX_MB (default 256) the least recently used files are
+deleted.
+
+Usage:
+    from fixture_cache import fixture
+    wav = fixture("tone", duration=1.5, freq=440)
+    wav = fixture("speech_like", duration=30, seed=7)
+
+Fixtures live in test_output/fixtures (TEST_FIXTURE_DIR to override).
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from audio_synth import SAMPLE_RATE, chirp, pink_noise, silence, speech_like, tone, white_noise, write_wav
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+FIXTURE_DIR = Path(os.environ.get("TEST_FIXTURE_DIR", BASE_DIR / "test_output" / "fixtures"))
+MAX_BYTES = int(float(os.environ.get("TEST_FIXTURE_MAX_MB", 256)) * 1024 * 1024)
+LOCK_TIMEOUT = 120.0            # a lock older than this belongs to a crashed writer
+
+# Bump when a generator's output changes, so stale files stop matching
+GENERATOR_VERSION = 1
+
+
+# ─── Generators ────────────────────────────────────────────────────────────────
+
+def _silence(duration: float = 1.0, sample_rate: int = SAMPLE_RATE):
+    return silence(duration, sample_rate)
+
+
+def _tone(duration: float = 2.0, freq: float = 440, sample_rate: int = SAMPLE_RATE):
+    return tone(freq, duration, sample_rate=sample_rate)
+
+
+def _chirp(duration: float = 3.0, f0: float = 200, f1: float = 4000, log: bool = False,
+           sample_rate: int = SAMPLE_RATE):
+    return chirp(f0, f1, duration, sample_rate=sample_rate, log=log)
+
+
+def _white_noise(duration: float = 3.0, seed: int = 0, sample_rate: int = SAMPLE_RATE):
+    return white_noise(duration, seed=seed, sample_rate=sample_rate)
+
+
+def _pink_noise(duration: float = 3.0, seed: int = 0, sample_rate: int = SAMPLE_RATE):
+    return pink_noise(duration, seed=seed, sample_rate=sample_rate)
+
+
+def _speech_like(duration: float = 5.0, seed: int = 0, sample_rate: int = SAMPLE_RATE):
+    return speech_like(duration, seed, sample_rate)
+
+
+GENERATORS = {
+    "silence": _silence,
+    "tone": _tone,
+    "chirp": _chirp,
+    "white_noise": _white_noise,
+    "pink_noise": _pink_noise,
+    "speech_like": _speech_like,
+}
+
+
+def fixture_params(kind: str, **params) -> dict:
+    """Full parameter set for a fixture (defaults applied, whole floats as ints); TypeError on unknown parameters."""
+    if kind not in GENERATORS:
+        raise ValueError(f"Unknown fixture kind: {kind} (expected one of {', '.join(GENERATORS)})")
+    bound = inspect.signature(GENERATORS[kind]).bind(**params)
+    bound.apply_defaults()
+    # json.dumps writes 440 and 440.0 differently; both must name the same file
+    return {name: int(value) if isinstance(value, float) and value.is_integer() else value
+            for name, value in bound.arguments.items()}
+
+
+def fixture_key(kind: str, **params) -> str:
+    identity = {"kind": kind, "version": GENERATOR_VERSION, **fixture_params(kind, **params)}
+    return hashlib.blake2b(json.dumps(identity, sort_keys=True).encode("utf-8"), digest_size=10).hexdigest()
+
+
+# ─── Store ─────────────────────────────────────────────────────────────────────
+
+class FixtureCache:
+    """Generated WAVs on disk, named by fixture_key(), safe to share between processes."""
+
+    def __init__(self, directory=FIXTURE_DIR, max_bytes: int = MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, kind: str, **params) -> str:
+        """Path of the fixture's WAV, generated on first request."""
+        params = fixture_params(kind, **params)
+        path = self.directory / f"{kind}-{fixture_key(kind, **params)}.wav"
+        lock = path.with_name(path.name + ".lock")
+
+        while True:
+            if path.exists():
+                self.hits += 1
+                self._touch(path)
+                return str(path)
+            if self._acquire(lock):
+                break
+            time.sleep(0.05)
+
+        try:
+            # Another worker may have finished between our check and taking the lock
+            if not path.exists():
+                self.misses += 1
+                self.directory.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+                write_wav(tmp, GENERATORS[kind](**params), params["sample_rate"])
+                os.replace(tmp, path)
+        finally:
+            lock.unlink(missing_ok=True)
+        self.evict(keep=path)
+        return str(path)
+
+    def _acquire(self, lock: Path) -> bool:
+        """Take the fixture's lock file; clear it instead when its writer has died."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        try:
+            os.close(os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return True
+        except FileExistsError:
+            try:
+                if time.time() - lock.stat().st_mtime > LOCK_TIMEOUT:
+                    lock.unlink(missing_ok=True)
+            except OSError:
+                pass
+            return False
+
+    @staticmethod
+    def _touch(path: Path):
+        # mtime doubles as last-use time for eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def evict(self, keep: Path = None):
+        """Delete the least recently used fixtures until under max_bytes (never `keep`)."""
+        try:
+            entries = sorted((entry.stat().st_mtime, entry.stat().st_size, entry.path)
+                             for entry in os.scandir(self.directory) if entry.name.endswith(".wav"))
+        except OSError:
+            return
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if path == str(keep):
+                continue
+            try:
+                os.unlink(path)
+            except OSError:
+                # Still open in another worker (Windows); try again next time
+                continue
+            total -= size
+
+
+_default = None
+
+
+def fixture(kind: str, **params) -> str:
+    """Path of a fixture WAV from the shared store (see FixtureCache.get)."""
+    global _default
+    if _default is None:
+        _default = FixtureCache()
+    return _default.get(kind, **params)
@@ -1,95 +1,337 @@
 #!/usr/bin/env python3
 """
 Generate a test WAV file with spoken text using system TTS (pyttsx3)
-or a simple sine tone if TTS is not available.
+or a synthetic signal (tone, chirp, noise, silence) built with audio_synth.
 
 Usage:
     python scripts/generate_test_audio.py --output test_fr.wav --lang fr
     python scripts/generate_test_audio.py --output test_en.wav --lang en
     python scripts/generate_test_audio.py --output test_tone.wav --tone
+    python scripts/generate_test_audio.py --output chord.wav --tone --freq 440 550 660 --duration 5
+    python scripts/generate_test_audio.py --output sweep.wav --chirp 200 4000
+    python scripts/generate_test_audio.py --output noise.wav --noise pink --seed 1
+    python scripts/generate_test_audio.py --corpus --variants 20 --snr inf 20 10 5 \
+        --sample-rates 16000 8000 44100 --formats s16 s24 f32 --out-dir test_output/corpus
+
+Corpus mode (--corpus [PHRASES]) renders every phrase --variants times
+on a process pool. Each clip draws its TTS rate, leading/trailing
+silence, noise colour and SNR, sample rate, sample format and channel
+count from the given lists, seeded by --seed and the clip index so a
+rerun rebuilds the same corpus. PHRASES is JSONL ({"text", "lang",
+"niche"}) or text lines `text`, `lang<TAB>text` or
+`lang<TAB>niche<TAB>text` (default: scripts/corpus_phrases.tsv).
+Without pyttsx3 (or with --synthetic) speech_like() audio of matching
+length stands in for speech. --out-dir receives clips/*.wav,
+manifest.jsonl (ground truth, durations and render settings per clip)
+and batch.txt, which `vosk_transcribe.py --batch` reads as is. Spoken
+phrases are kept in speech/ and reused by later runs.
+
+All TTS goes through render_tts(): one pyttsx3 engine queues a batch of
+files per runAndWait(), and a thread pool converts them to 16kHz mono
+with ffmpeg (or in-process with NumPy when ffmpeg is not installed).
 """
 
 import argparse
-import struct
-import wave
-import math
+import hashlib
+import importlib.util
+import json
+import os
+import random
+import shutil
+import subprocess
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from audio_synth import (SAMPLE_FORMATS, SAMPLE_RATE, add_noise, chirp, multi_tone, pink_noise, read_wav_float,
+                         resample, silence, speech_like, to_float, white_noise, write_encoded_wav, write_wav)
+
+try:
+    import numpy as np
+except ImportError:
+    # Corpus mode needs NumPy
+    np = None
 
+DEFAULT_PHRASES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus_phrases.tsv')
+DEFAULT_CORPUS_DIR = os.path.join('test_output', 'corpus')
+SPEECH_PEAK = 0.7                   # speech is normalized to this peak before noise is mixed in
+SYNTHETIC_CHARS_PER_SECOND = 14.0   # speech_like() stand-in length at TTS rate 150
+TTS_RATE = 150                      # words per minute
+TTS_BATCH_SIZE = 64                 # save_to_file() calls queued per runAndWait()
 
-def generate_sine_wav(filename: str, freq: float = 440, duration: float = 3.0, sample_rate: int = 16000):
+
+def generate_sine_wav(filename: str, freq: float = 440, duration: float = 3.0, sample_rate: int = SAMPLE_RATE):
     """Generate a simple sine wave WAV file (PCM 16kHz 16-bit mono)."""
-    n_samples = int(sample_rate * duration)
-    amplitude = 16000
+    generate_multi_tone_wav(filename, [freq], duration, sample_rate)
 
-    with wave.open(filename, 'w') as wf:
-        wf.setnchannels(1)
-        wf.setsampwidth(2)
-        wf.setframerate(sample_rate)
 
-        for i in range(n_samples):
-            value = int(amplitude * math.sin(2 * math.pi * freq * i / sample_rate))
-            data = struct.pack('<h', value)
-            wf.writeframes(data)
+def generate_multi_tone_wav(filename: str, freqs, duration: float = 3.0, sample_rate: int = SAMPLE_RATE):
+    """Generate a WAV file with several sine tones mixed at equal level."""
+    write_wav(filename, multi_tone(freqs, duration, sample_rate=sample_rate), sample_rate)
+    label = "+".join(f"{freq:g}" for freq in freqs)
+    print(f"[OK] Tone WAV generated: {filename} ({duration}s, {label}Hz, {sample_rate}Hz)")
 
-    print(f"[OK] Tone WAV generated: {filename} ({duration}s, {freq}Hz, {sample_rate}Hz)")
 
+def generate_chirp_wav(filename: str, f0: float, f1: float, duration: float = 3.0, sample_rate: int = SAMPLE_RATE):
+    """Generate a WAV file sweeping linearly from f0 to f1 Hz."""
+    write_wav(filename, chirp(f0, f1, duration, sample_rate=sample_rate), sample_rate)
+    print(f"[OK] Chirp WAV generated: {filename} ({duration}s, {f0:g}->{f1:g}Hz)")
 
-def generate_silence_wav(filename: str, duration: float = 2.0, sample_rate: int = 16000):
-    """Generate a silent WAV file (useful as baseline test)."""
-    n_samples = int(sample_rate * duration)
 
-    with wave.open(filename, 'w') as wf:
-        wf.setnchannels(1)
-        wf.setsampwidth(2)
-        wf.setframerate(sample_rate)
-        wf.writeframes(b'\x00\x00' * n_samples)
+def generate_noise_wav(filename: str, color: str = 'white', duration: float = 3.0, seed: int = None,
+                       sample_rate: int = SAMPLE_RATE):
+    """Generate a white or pink noise WAV file (same seed, same file)."""
+    noise = pink_noise if color == 'pink' else white_noise
+    write_wav(filename, noise(duration, seed=seed, sample_rate=sample_rate), sample_rate)
+    print(f"[OK] {color.capitalize()} noise WAV generated: {filename} ({duration}s)")
+
 
+def generate_silence_wav(filename: str, duration: float = 2.0, sample_rate: int = SAMPLE_RATE):
+    """Generate a silent WAV file (useful as baseline test)."""
+    write_wav(filename, silence(duration, sample_rate), sample_rate)
     print(f"[OK] Silent WAV generated: {filename} ({duration}s)")
 
 
+def _select_voice(engine, lang: str):
+    """Try to set a language-appropriate voice."""
+    target_lang = 'french' if lang == 'fr' else 'english'
+
+    for voice in engine.getProperty('voices'):
+        if target_lang in voice.name.lower() or target_lang in str(voice.languages).lower():
+            engine.setProperty('voice', voice.id)
+            break
+
+
+# ─── TTS ───────────────────────────────────────────────────────────────────────
+
+# One pyttsx3 engine per process: init() loads the speech driver and voices
+_tts_engine = None
+
+
+def _get_tts_engine():
+    global _tts_engine
+    if _tts_engine is None:
+        import pyttsx3
+        _tts_engine = pyttsx3.init()
+    return _tts_engine
+
+
+def _convert_wav(source: str, filename: str, sample_rate: int = SAMPLE_RATE):
+    """Convert a TTS output file to PCM 16-bit mono at `sample_rate`, then delete it.
+
+    With neither ffmpeg nor NumPy the TTS output is kept as it is, with a warning.
+    """
+    if not shutil.which('ffmpeg') and np is None:
+        shutil.move(source, filename)
+        print(f"[WARN] ffmpeg and NumPy not installed: {filename} kept as written by TTS "
+              f"(may need manual conversion to {sample_rate} Hz mono)", file=sys.stderr)
+        return
+    try:
+        if shutil.which('ffmpeg'):
+            subprocess.run([
+                'ffmpeg', '-y', '-loglevel', 'error', '-i', source,
+                '-ar', str(sample_rate), '-ac', '1', '-sample_fmt', 's16',
+                filename
+            ], capture_output=True, check=True)
+        else:
+            # In-process fallback; reads PCM WAV only (not the AIFF some macOS voices write)
+            values, rate = read_wav_float(source)
+            write_encoded_wav(filename, resample(values, rate, sample_rate), sample_rate)
+    finally:
+        os.remove(source)
+
+
+def render_tts(items, sample_rate: int = SAMPLE_RATE, batch_size: int = TTS_BATCH_SIZE,
+               convert_workers: int = None) -> dict:
+    """
+    Speak many texts to WAV files (PCM 16-bit mono at `sample_rate`).
+
+    `items` are (filename, text, lang, rate) tuples. One pyttsx3 engine
+    renders them `batch_size` at a time per runAndWait(), grouped by voice
+    and rate, while a bounded thread pool converts finished batches (ffmpeg
+    when installed, else an in-process resampler, else left unconverted).
+    Returns {filename: error} for the items that failed.
+    """
+    engine = _get_tts_engine()
+    items = sorted(items, key=lambda item: (item[2], item[3]))
+    failed = {}
+    workers = convert_workers or min(4, os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        conversions = {}
+        voice = None
+        for start in range(0, len(items), batch_size):
+            batch = items[start:start + batch_size]
+            for filename, text, lang, rate in batch:
+                # Property changes are queued with the utterances, so one run can switch voices
+                if voice != (lang, rate):
+                    _select_voice(engine, lang)
+                    engine.setProperty('rate', rate)
+                    voice = (lang, rate)
+                engine.save_to_file(text, filename + '.tts.wav')
+            engine.runAndWait()
+
+            # Don't let conversions fall more than a batch behind
+            while len(conversions) > workers * batch_size:
+                filename, future = next(iter(conversions.items()))
+                del conversions[filename]
+                _collect(future, filename, failed)
+            for filename, *_ in batch:
+                if os.path.exists(filename + '.tts.wav'):
+                    conversions[filename] = pool.submit(_convert_wav, filename + '.tts.wav', filename, sample_rate)
+                else:
+                    failed[filename] = 'TTS engine wrote no file'
+        for filename, future in conversions.items():
+            _collect(future, filename, failed)
+    return failed
+
+
+def _collect(future, filename: str, failed: dict):
+    try:
+        future.result()
+    except Exception as e:
+        failed[filename] = str(e) or type(e).__name__
+
+
 def generate_tts_wav(filename: str, text: str, lang: str = 'fr'):
     """Generate a WAV file with spoken text using pyttsx3 (offline TTS)."""
-    try:
-        import pyttsx3
-    except ImportError:
+    if importlib.util.find_spec('pyttsx3') is None:
         print("[WARN] pyttsx3 not installed. Install with: pip install pyttsx3")
         print("[INFO] Falling back to sine tone generation.")
         generate_sine_wav(filename)
         return
 
-    engine = pyttsx3.init()
+    failed = render_tts([(filename, text, lang, TTS_RATE)])
+    if failed:
+        print(f"[ERROR] TTS failed for {filename}: {failed[filename]}")
+        sys.exit(1)
+    print(f"[OK] TTS WAV generated: {filename} (lang={lang})")
 
-    # Try to set language-appropriate voice
-    voices = engine.getProperty('voices')
-    target_lang = 'french' if lang == 'fr' else 'english'
 
-    for voice in voices:
-        if target_lang in voice.name.lower() or target_lang in str(voice.languages).lower():
-            engine.setProperty('voice', voice.id)
-            break
+# ─── Corpus ────────────────────────────────────────────────────────────────────
 
-    engine.setProperty('rate', 150)
+def load_phrases(path: str, default_lang: str = 'fr') -> list:
+    """Read a phrase list: JSONL objects or `text` / `lang<TAB>text` / `lang<TAB>niche<TAB>text` lines."""
+    phrases = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if line.startswith('{'):
+                entry = json.loads(line)
+                text, lang, niche = entry['text'], entry.get('lang', default_lang), entry.get('niche')
+            else:
+                fields = [field.strip() for field in line.split('\t')]
+                text = fields[-1]
+                lang = fields[0] if len(fields) > 1 else default_lang
+                niche = fields[1] if len(fields) > 2 else None
+            phrases.append({'text': text, 'lang': lang, 'niche': niche or None})
+    return phrases
 
-    # Save to file
-    engine.save_to_file(text, filename)
-    engine.runAndWait()
 
-    # Convert to 16kHz mono if needed (pyttsx3 may output at different rate)
-    try:
-        import subprocess
-        temp_file = filename + '.tmp.wav'
-        import shutil
-        shutil.move(filename, temp_file)
-        subprocess.run([
-            'ffmpeg', '-y', '-i', temp_file,
-            '-ar', '16000', '-ac', '1', '-sample_fmt', 's16',
-            filename
-        ], capture_output=True)
-        import os
-        os.remove(temp_file)
-        print(f"[OK] TTS WAV generated and converted: {filename} (lang={lang})")
-    except Exception:
-        print(f"[OK] TTS WAV generated: {filename} (lang={lang}, may need manual conversion to 16kHz)")
+def _clip_draws(options: dict, index: int) -> dict:
+    """Render settings for clip `index`, drawn from its own seed so they don't depend on scheduling."""
+    rng = random.Random(f"{options['seed']}:{index}")
+    return {
+        'seed': rng.getrandbits(32),
+        'tts_rate': rng.choice(options['rates']),
+        'snr_db': rng.choice(options['snrs']),
+        'color': rng.choice(options['colors']),
+        'sample_rate': rng.choice(options['sample_rates']),
+        'sample_format': rng.choice(options['formats']),
+        'channels': rng.choice(options['channels']),
+        'pad': [round(rng.uniform(*options['pad']), 3) for _ in range(2)],
+    }
+
+
+def _speech_path(out_dir: str, phrase: dict, rate: int) -> str:
+    """Shared TTS rendering of a phrase at a rate (variants reuse it)."""
+    key = hashlib.blake2b(f"{phrase['lang']}\t{rate}\t{phrase['text']}".encode('utf-8'), digest_size=8).hexdigest()
+    return os.path.join(out_dir, 'speech', f"{key}.wav")
+
+
+def render_clip(job: dict) -> dict:
+    """Render one corpus clip (in a worker process); return its manifest record."""
+    options, phrase = job['options'], job['phrase']
+    draws = _clip_draws(options, job['index'])
+    clip_seed, tts_rate, snr_db, color = draws['seed'], draws['tts_rate'], draws['snr_db'], draws['color']
+    sample_rate, sample_format, channels = draws['sample_rate'], draws['sample_format'], draws['channels']
+    lead, trail = draws['pad']
+
+    path = f"clips/{job['index']:06d}_{phrase['lang']}.wav"
+    target = os.path.join(options['out_dir'], path)
+    speech, source = None, 'synthetic'
+    spoken = _speech_path(options['out_dir'], phrase, tts_rate)
+    if options['tts'] and os.path.exists(spoken):
+        values, rate = read_wav_float(spoken)
+        speech, source = resample(values, rate, SAMPLE_RATE), 'tts'
+    if speech is None:
+        duration = max(0.5, len(phrase['text']) / SYNTHETIC_CHARS_PER_SECOND * 150 / tts_rate)
+        speech = to_float(speech_like(duration, seed=clip_seed))
+
+    peak = np.max(np.abs(speech)) if len(speech) else 0.0
+    speech = speech * (SPEECH_PEAK / peak) if peak else speech
+    clip = np.concatenate([np.zeros(int(lead * SAMPLE_RATE)), speech, np.zeros(int(trail * SAMPLE_RATE))])
+    clip = add_noise(clip, snr_db, color, seed=clip_seed, reference=speech)
+    # Keep the SNR: scale loud mixes down instead of clipping them
+    clip = clip * min(1.0, 0.99 / max(np.max(np.abs(clip)), 1e-9))
+    write_encoded_wav(target, resample(clip, SAMPLE_RATE, sample_rate), sample_rate, sample_format, channels)
+
+    noisy = snr_db != float('inf')
+    return {
+        'file': path, 'text': phrase['text'], 'lang': phrase['lang'], 'niche': phrase['niche'],
+        'source': source, 'tts_rate': tts_rate, 'snr_db': snr_db if noisy else None,
+        'noise': color if noisy else None, 'sample_rate': sample_rate, 'sample_format': sample_format,
+        'channels': channels, 'duration_s': round(len(clip) / SAMPLE_RATE, 3),
+        'speech_s': round(len(speech) / SAMPLE_RATE, 3), 'lead_s': lead, 'seed': clip_seed,
+    }
+
+
+def build_corpus(phrases: list, out_dir: str, variants: int = 1, workers: int = None, seed: int = 0,
+                 tts: bool = True, rates=(150,), snrs=(float('inf'),), colors=('white',),
+                 sample_rates=(SAMPLE_RATE,), formats=('s16',), channels=(1,), pad=(0.2, 1.0)) -> dict:
+    """Render `variants` clips per phrase on a process pool, writing manifest.jsonl and batch.txt."""
+    if np is None:
+        raise RuntimeError("Corpus mode needs NumPy: pip install numpy")
+    options = {
+        'out_dir': out_dir, 'seed': seed, 'tts': tts, 'rates': list(rates), 'snrs': list(snrs),
+        'colors': list(colors), 'sample_rates': list(sample_rates), 'formats': list(formats),
+        'channels': list(channels), 'pad': tuple(pad),
+    }
+    jobs = [{'index': index, 'phrase': phrase, 'options': options}
+            for index, phrase in enumerate(phrase for phrase in phrases for _ in range(variants))]
+
+    os.makedirs(os.path.join(out_dir, 'clips'), exist_ok=True)
+    started = time.perf_counter()
+    if tts:
+        # Speak each distinct (phrase, rate) once, up front, on a single engine
+        os.makedirs(os.path.join(out_dir, 'speech'), exist_ok=True)
+        speech = {}
+        for job in jobs:
+            rate = _clip_draws(options, job['index'])['tts_rate']
+            filename = _speech_path(out_dir, job['phrase'], rate)
+            if not os.path.exists(filename):
+                speech[filename] = (filename, job['phrase']['text'], job['phrase']['lang'], rate)
+        failed = render_tts(speech.values(), convert_workers=workers)
+        for filename, error in failed.items():
+            print(f"[WARN] TTS failed for {filename}, using synthetic speech: {error}", file=sys.stderr)
+        print(f"[INFO] TTS rendered {len(speech) - len(failed)} phrase(s) in {time.perf_counter() - started:.1f}s")
+
+    audio_seconds = 0.0
+    with ProcessPoolExecutor(max_workers=workers) as pool, \
+            open(os.path.join(out_dir, 'manifest.jsonl'), 'w', encoding='utf-8') as manifest, \
+            open(os.path.join(out_dir, 'batch.txt'), 'w', encoding='utf-8') as batch:
+        # map() keeps clip order, so the manifest is identical across runs
+        for record in pool.map(render_clip, jobs, chunksize=max(1, min(32, len(jobs) // 64))):
+            manifest.write(json.dumps(record, ensure_ascii=False) + '\n')
+            batch.write(f"{record['file']}\t{record['lang']}\n")
+            audio_seconds += record['duration_s']
+
+    summary = {'clips': len(jobs), 'phrases': len(phrases), 'audio_s': round(audio_seconds, 1),
+               'elapsed_s': round(time.perf_counter() - started, 2), 'out_dir': out_dir}
+    print(f"[OK] Corpus generated: {summary['clips']} clips, {summary['audio_s']}s of audio "
+          f"in {summary['elapsed_s']}s -> {out_dir}")
+    return summary
 
 
 def main():
@@ -97,15 +339,52 @@ def main():
     parser.add_argument('--output', '-o', default='test_audio.wav', help='Output WAV filename')
     parser.add_argument('--lang', '-l', default='fr', choices=['fr', 'en'], help='Language for TTS')
     parser.add_argument('--tone', action='store_true', help='Generate sine tone instead of TTS')
+    parser.add_argument('--freq', type=float, nargs='+', default=[440],
+                        help='Tone frequencies in Hz (several = mixed, default: 440)')
+    parser.add_argument('--chirp', type=float, nargs=2, metavar=('F0', 'F1'), help='Generate a sweep from F0 to F1 Hz')
+    parser.add_argument('--noise', choices=['white', 'pink'], help='Generate noise')
+    parser.add_argument('--seed', type=int, default=None, help='Noise seed (for reproducible files)')
     parser.add_argument('--silence', action='store_true', help='Generate silence')
+    parser.add_argument('--duration', '-d', type=float, default=None,
+                        help='Length in seconds of synthetic audio (default: 3, silence: 2)')
     parser.add_argument('--text', '-t', default=None, help='Custom text to speak')
+    parser.add_argument('--corpus', nargs='?', const=DEFAULT_PHRASES, metavar='PHRASES',
+                        help='Render a corpus from a phrase list (default list: scripts/corpus_phrases.tsv)')
+    parser.add_argument('--out-dir', default=DEFAULT_CORPUS_DIR, help='--corpus: output directory')
+    parser.add_argument('--variants', type=int, default=1, help='--corpus: clips rendered per phrase')
+    parser.add_argument('--workers', type=int, default=None, help='--corpus: worker processes (default: CPU count)')
+    parser.add_argument('--synthetic', action='store_true', help='--corpus: use speech_like() audio instead of TTS')
+    parser.add_argument('--rates', type=int, nargs='+', default=[130, 150, 180],
+                        help='--corpus: TTS speaking rates to draw from (words per minute)')
+    parser.add_argument('--snr', type=float, nargs='+', default=[float('inf'), 20, 10],
+                        help='--corpus: SNRs in dB to draw from (inf = clean)')
+    parser.add_argument('--noise-colors', nargs='+', choices=['white', 'pink'], default=['white', 'pink'],
+                        help='--corpus: noise colours to draw from')
+    parser.add_argument('--sample-rates', type=int, nargs='+', default=[SAMPLE_RATE],
+                        help='--corpus: output sample rates to draw from')
+    parser.add_argument('--formats', nargs='+', choices=SAMPLE_FORMATS, default=['s16'],
+                        help='--corpus: sample formats to draw from')
+    parser.add_argument('--channels', type=int, nargs='+', default=[1], help='--corpus: channel counts to draw from')
+    parser.add_argument('--pad', type=float, nargs=2, default=[0.2, 1.0], metavar=('MIN', 'MAX'),
+                        help='--corpus: seconds of silence before and after speech')
 
     args = parser.parse_args()
 
-    if args.silence:
-        generate_silence_wav(args.output)
+    if args.corpus:
+        phrases = load_phrases(args.corpus, args.lang)
+        tts = not args.synthetic and importlib.util.find_spec('pyttsx3') is not None
+        if not tts and not args.synthetic:
+            print("[WARN] pyttsx3 not installed: rendering synthetic speech (durations only, no words)")
+        build_corpus(phrases, args.out_dir, args.variants, args.workers, args.seed or 0, tts, args.rates,
+                     args.snr, args.noise_colors, args.sample_rates, args.formats, args.channels, args.pad)
+    elif args.silence:
+        generate_silence_wav(args.output, args.duration or 2.0)
     elif args.tone:
-        generate_sine_wav(args.output)
+        generate_multi_tone_wav(args.output, args.freq, args.duration or 3.0)
+    elif args.chirp:
+        generate_chirp_wav(args.output, *args.chirp, duration=args.duration or 3.0)
+    elif args.noise:
+        generate_noise_wav(args.output, args.noise, args.duration or 3.0, args.seed)
     else:
         default_texts = {
             'fr': "Bonjour, je suis intéressé par vos services de création de site web pour mon restaurant.",
@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+Real-time microphone simulator for streaming speech-to-text tests.
+
+Replays a clip as 20 ms PCM frames (16kHz 16-bit mono) at wall-clock
+pace, the way a visitor's microphone feeds a live decode, and measures
+the latency they feel:
+
+  first_partial_ms  from the start of speech to the first non-empty
+                    partial (or segment result)
+  final_ms          from the end of speech to the final result
+  finalize_ms       from the end of audio to the final result
+
+A frame is sent once it has been "captured" (frame N leaves at
+(N + 1) x 20 ms), delayed by up to --jitter ms without reordering, and
+dropped with probability --loss. --tail seconds of silence follow the
+clip before the stream is closed, as the client's end-of-speech
+detection would.
+
+Targets:
+  stdin   one `vosk_transcribe.py --stream` process per run, fed through
+          its stdin; timing starts at its "ready" line, after model load
+  socket  a stream job on a `vosk_transcribe.py --serve` worker, fed
+          through a shared-memory ring exactly as vosk-worker.ts does
+          (--socket to use a running worker, else one is started)
+
+Sources: --file (any WAV), --manifest + --entry (a clip from
+`generate_test_audio.py --corpus`, whose manifest gives the true speech
+bounds) or --speech SECONDS of synthetic speech-like audio. WAV files
+without a manifest get their speech bounds from the transcriber's VAD.
+
+Usage:
+    python scripts/mic_sim.py --speech 4 --lang fr
+    python scripts/mic_sim.py --file answer.wav --jitter 30 --loss 0.02 --repeats 10
+    python scripts/mic_sim.py --manifest test_output/corpus/manifest.jsonl --entry 12 --target socket
+
+Prints one JSON report: the per-run measurements and, with --repeats,
+p50/p95 of each latency.
+"""
+
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from audio_synth import silence, speech_like, to_bytes
+from bench_vosk import DEFAULT_MODELS, HEADER, SCRIPT, percentile
+from vosk_transcribe import SAMPLE_RATE, SHM_CONSUMED, SHM_HEADER_BYTES, VAD_FRAME, VAD_PAD_FRAMES, \
+    detect_speech, normalize_pcm, parse_wav_header
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    # No POSIX shared memory: only the stdin target is available
+    shared_memory = None
+
+# ─── Constants ─────────────────────────────────────────────────────────────────
+
+FRAME_MS = 20
+RING_SLOTS = 256
+READY_TIMEOUT = 120.0           # seconds to wait for the transcriber to load its model
+FINAL_TIMEOUT = 60.0            # seconds to wait for the final result once audio has ended
+
+
+# ─── Audio ─────────────────────────────────────────────────────────────────────
+
+def load_clip(args) -> dict:
+    """Resolve the source options to {pcm, speech_start, speech_end, label} (seconds, 16kHz mono PCM)."""
+    if args.speech:
+        pcm = to_bytes(speech_like(args.speech, seed=args.seed or 0))
+        return {"pcm": pcm, "speech_start": 0.0, "speech_end": args.speech, "label": f"speech_like {args.speech:g}s"}
+
+    bounds = None
+    path = args.file
+    if args.manifest:
+        with open(args.manifest, encoding="utf-8") as f:
+            entries = [json.loads(line) for line in f if line.strip()]
+        entry = next((e for e in entries if e["file"] == args.entry), None)
+        if entry is None:
+            entry = entries[int(args.entry)]
+        path = os.path.join(os.path.dirname(args.manifest), entry["file"])
+        bounds = (entry["lead_s"], entry["lead_s"] + entry["speech_s"])
+        args.lang = args.lang or entry["lang"]
+
+    buf = Path(path).read_bytes()
+    pcm = bytes(normalize_pcm(buf, parse_wav_header(buf)))
+    if bounds is None:
+        start, end, _ = detect_speech(pcm)
+        if end == 0:
+            raise ValueError(f"No speech detected in {path}")
+        # detect_speech() pads the range; take the padding back off
+        pad = VAD_PAD_FRAMES * VAD_FRAME * 2
+        start = start + pad if start else 0
+        end = end - pad if end < len(pcm) else end
+        bounds = (start / 2 / SAMPLE_RATE, end / 2 / SAMPLE_RATE)
+    return {"pcm": pcm, "speech_start": bounds[0], "speech_end": bounds[1], "label": path}
+
+
+def paced_frames(pcm: bytes, jitter_ms: float, loss: float, rng: random.Random):
+    """Yield (send_at seconds, frame bytes or None when lost) for each 20 ms frame."""
+    frame_bytes = SAMPLE_RATE * 2 * FRAME_MS // 1000
+    send_at = 0.0
+    for index, offset in enumerate(range(0, len(pcm), frame_bytes)):
+        # A frame leaves once captured; jitter delays it but never reorders frames
+        send_at = max(send_at, (index + 1) * FRAME_MS / 1000 + rng.uniform(0, jitter_ms) / 1000)
+        lost = rng.random() < loss
+        yield send_at, None if lost else pcm[offset:offset + frame_bytes]
+
+
+# ─── Targets ───────────────────────────────────────────────────────────────────
+
+class _Target:
+    """Collects (perf_counter, event) pairs; `final` is set when the final result arrives."""
+
+    def open(self):
+        self.events = []
+        self.final = threading.Event()
+
+    def record(self, event: dict, final: bool):
+        self.events.append((time.perf_counter(), event))
+        if final:
+            self.final.set()
+
+
+class StdinTarget(_Target):
+    """A fresh `vosk_transcribe.py --stream` process per run."""
+
+    def __init__(self, model_path: str):
+        self.model_path = model_path
+
+    def open(self):
+        super().open()
+        self.proc = subprocess.Popen(
+            [sys.executable, str(SCRIPT), "--stream", "--model", self.model_path,
+             "--chunk-bytes", str(SAMPLE_RATE * 2 * FRAME_MS // 1000)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=False,
+        )
+        ready = threading.Event()
+        threading.Thread(target=self._read, args=(ready,), daemon=True).start()
+        if not ready.wait(READY_TIMEOUT) or self.final.is_set():
+            error = self.events[-1][1].get("error") if self.events else "no ready line"
+            self.close()
+            raise RuntimeError(f"Transcriber failed to start: {error}")
+
+    def _read(self, ready: threading.Event):
+        for line in self.proc.stdout:
+            event = json.loads(line)
+            if event.get("event") == "ready":
+                ready.set()
+                continue
+            self.record(event, event.get("event") == "final")
+        ready.set()
+        self.final.set()
+
+    def send(self, frame: bytes):
+        self.proc.stdin.write(frame)
+        self.proc.stdin.flush()
+
+    def end(self):
+        self.proc.stdin.close()
+
+    def close(self):
+        try:
+            self.proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+            self.proc.wait()
+
+
+class SocketTarget(_Target):
+    """Stream jobs on a `--serve` worker, with audio in a shared-memory ring."""
+
+    def __init__(self, model_path: str, lang: str, socket_path: str = None, phrases=None):
+        if shared_memory is None:
+            raise RuntimeError("The socket target needs POSIX shared memory")
+        self.lang = lang
+        self.phrases = phrases
+        self.proc = None
+        self.socket_path = socket_path
+        if not socket_path:
+            self.socket_path = os.path.join(tempfile.gettempdir(), f"vosk-mic-{os.getpid()}.sock")
+            self.proc = subprocess.Popen(
+                [sys.executable, str(SCRIPT), "--serve", "--socket", self.socket_path,
+                 "--lang-model", f"{lang}={model_path}"],
+                stdout=subprocess.PIPE, text=True,
+            )
+            ready = json.loads(self.proc.stdout.readline() or "{}")
+            if ready.get("event") != "ready":
+                self.proc.kill()
+                raise RuntimeError(f"Worker failed to start: {ready.get('error', 'no ready line')}")
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.socket_path)
+        self.next_id = 1
+        self.job_id = None
+        threading.Thread(target=self._read, daemon=True).start()
+
+    def _write(self, message: dict):
+        body = json.dumps(message).encode("utf-8")
+        self.sock.sendall(HEADER.pack(len(body)) + body)
+
+    def _read(self):
+        while True:
+            try:
+                (length,) = HEADER.unpack(self._recv(HEADER.size))
+                event = json.loads(self._recv(length))
+            except (OSError, RuntimeError):
+                return
+            if event.get("id") == self.job_id:
+                self.record(event, "event" not in event)
+
+    def _recv(self, n: int) -> bytes:
+        buf = bytearray()
+        while len(buf) < n:
+            data = self.sock.recv(n - len(buf))
+            if not data:
+                raise RuntimeError("Worker closed the connection")
+            buf += data
+        return bytes(buf)
+
+    def open(self):
+        super().open()
+        self.slot_bytes = SAMPLE_RATE * 2 * FRAME_MS // 1000
+        self.ring = shared_memory.SharedMemory(create=True, size=SHM_HEADER_BYTES + RING_SLOTS * self.slot_bytes)
+        self.seq = 0
+        self.job_id = self.next_id
+        self.next_id += 1
+        message = {"id": self.job_id, "op": "stream", "lang": self.lang, "shm": self.ring.name,
+                   "slots": RING_SLOTS, "slot_bytes": self.slot_bytes}
+        if self.phrases:
+            message["phrases"] = self.phrases
+        self._write(message)
+
+    def send(self, frame: bytes):
+        # Wait for the decoder to free the slot rather than overwrite unread audio
+        while self.seq - SHM_CONSUMED.unpack_from(self.ring.buf, 0)[0] >= RING_SLOTS:
+            if self.final.wait(0.001):
+                return
+        offset = SHM_HEADER_BYTES + (self.seq % RING_SLOTS) * self.slot_bytes
+        self.ring.buf[offset:offset + len(frame)] = frame
+        self._write({"op": "audio", "target": self.job_id, "seq": self.seq, "lens": [len(frame)]})
+        self.seq += 1
+
+    def end(self):
+        self._write({"op": "stream_end", "target": self.job_id})
+
+    def close(self):
+        self.ring.close()
+        self.ring.unlink()
+
+    def shutdown(self):
+        self.sock.close()
+        if self.proc:
+            self.proc.terminate()
+            self.proc.wait(timeout=10)
+
+
+# ─── Measurement ───────────────────────────────────────────────────────────────
+
+def run_once(target: _Target, clip: dict, args, rng: random.Random) -> dict:
+    """Play the clip into `target` at real-time pace; return the latency measurements."""
+    pcm = clip["pcm"] + to_bytes(silence(args.tail))
+    target.open()
+    try:
+        sent = lost = 0
+        started = time.perf_counter()
+        for send_at, frame in paced_frames(pcm, args.jitter, args.loss, rng):
+            delay = started + send_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            if target.final.is_set():
+                break
+            if frame is None:
+                lost += 1
+                continue
+            target.send(frame)
+            sent += 1
+        closed = time.perf_counter()
+        target.end()
+        target.final.wait(FINAL_TIMEOUT)
+    finally:
+        target.close()
+
+    speech_start = started + clip["speech_start"]
+    speech_end = started + clip["speech_end"]
+    partials = [(t, e) for t, e in target.events if e.get("event") in ("partial", "result") and e.get("text")]
+    finals = [(t, e) for t, e in target.events if e.get("event") in (None, "final")]
+    final_at, final = finals[-1] if finals else (None, {"error": "No final result"})
+
+    def ms(t, since):
+        return round((t - since) * 1000, 1) if t is not None else None
+
+    return {
+        "text": final.get("text", ""),
+        "confidence": final.get("confidence"),
+        "error": final.get("error"),
+        "frames_sent": sent,
+        "frames_lost": lost,
+        "partials": len(partials),
+        "first_partial_ms": ms(partials[0][0], speech_start) if partials else None,
+        "final_ms": ms(final_at, speech_end),
+        "finalize_ms": ms(final_at, closed),
+    }
+
+
+def summarize(runs) -> dict:
+    summary = {}
+    for metric in ("first_partial_ms", "final_ms", "finalize_ms"):
+        values = [run[metric] for run in runs if run[metric] is not None]
+        if values:
+            summary[metric] = {"p50": percentile(values, 50), "p95": percentile(values, 95)}
+    return summary
+
+
+# ─── Main ──────────────────────────────────────────────────────────────────────
+
+def main():
+    parser = argparse.ArgumentParser(description="Real-time microphone simulator for streaming STT")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--file", help="WAV file to replay (converted to 16kHz mono)")
+    source.add_argument("--manifest", help="Corpus manifest.jsonl from generate_test_audio.py --corpus")
+    source.add_argument("--speech", type=float, metavar="SECONDS", help="Replay synthetic speech-like audio")
+    parser.add_argument("--entry", default="0", help="--manifest: clip index or file name (default: 0)")
+    parser.add_argument("--lang", choices=sorted(DEFAULT_MODELS),
+                        help="Model language (default: the manifest entry's, else fr)")
+    parser.add_argument("--model", help="Vosk model directory (default: VOSK_MODEL_<LANG>_PATH)")
+    parser.add_argument("--target", choices=["stdin", "socket"], default="stdin",
+                        help="Feed a --stream process (stdin) or a --serve worker's ring (socket)")
+    parser.add_argument("--socket", help="--target socket: running worker socket (default: start one)")
+    parser.add_argument("--phrases", help="--target socket: JSON list restricting recognition to these phrases")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Max extra delay per frame in ms (default: 0)")
+    parser.add_argument("--loss", type=float, default=0.0, help="Probability of dropping a frame (default: 0)")
+    parser.add_argument("--tail", type=float, default=0.5,
+                        help="Seconds of silence sent after the clip before closing (default: 0.5)")
+    parser.add_argument("--repeats", type=int, default=1, help="Runs to measure (default: 1)")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for jitter, loss and --speech audio")
+
+    args = parser.parse_args()
+
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        parser.error("NumPy is required to read and analyse the audio: pip install numpy")
+    if not 0 <= args.loss < 1:
+        parser.error("--loss must be in [0, 1)")
+
+    try:
+        clip = load_clip(args)
+    except (OSError, ValueError, IndexError, KeyError) as e:
+        parser.error(f"Cannot load audio: {e}")
+    args.lang = args.lang or "fr"
+    model_path = args.model or DEFAULT_MODELS[args.lang]
+    if not args.socket and not os.path.isdir(model_path):
+        parser.error(f"Model not found: {model_path}")
+
+    if args.target == "socket":
+        target = SocketTarget(model_path, args.lang, args.socket, json.loads(args.phrases) if args.phrases else None)
+    else:
+        target = StdinTarget(model_path)
+
+    rng = random.Random(args.seed)
+    runs = []
+    try:
+        for _ in range(args.repeats):
+            runs.append(run_once(target, clip, args, rng))
+            print(f"  first_partial={runs[-1]['first_partial_ms']} ms  final={runs[-1]['final_ms']} ms  "
+                  f"text={runs[-1]['text']!r}", file=sys.stderr)
+    finally:
+        if isinstance(target, SocketTarget):
+            target.shutdown()
+
+    report = {
+        "meta": {
+            "source": clip["label"],
+            "target": args.target,
+            "lang": args.lang,
+            "audio_seconds": round(len(clip["pcm"]) / 2 / SAMPLE_RATE, 3),
+            "speech_seconds": [round(clip["speech_start"], 3), round(clip["speech_end"], 3)],
+            "frame_ms": FRAME_MS,
+            "jitter_ms": args.jitter,
+            "loss": args.loss,
+            "tail_seconds": args.tail,
+        },
+        "runs": runs,
+    }
+    if len(runs) > 1:
+        report["summary"] = summarize(runs)
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
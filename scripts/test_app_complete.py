@@ -26,17 +26,15 @@ Usage:
 
 import argparse
 import json
-import os
 import sys
 import io
 import time
 import uuid
-import struct
-import wave
-import math
 import subprocess
 from pathlib import Path
 
+from fixture_cache import fixture
+
 # Force UTF-8 stdout on Windows
 if sys.platform == 'win32':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
@@ -106,19 +104,6 @@ def api_post(base: str, path: str, json_data=None, files=None, data=None, timeou
 
 # -- Helpers -----------------------------------------------------------------
 
-def generate_test_wav(filename: str, duration: float = 1.5):
-    """Generate a silent WAV (PCM 16kHz 16-bit mono) for API testing."""
-    sample_rate = 16000
-    n_samples = int(sample_rate * duration)
-    os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
-    with wave.open(filename, 'w') as wf:
-        wf.setnchannels(1)
-        wf.setsampwidth(2)
-        wf.setframerate(sample_rate)
-        wf.writeframes(b'\x00\x00' * n_samples)
-    return filename
-
-
 def check_server(base_url: str) -> bool:
     try:
         import requests
@@ -683,9 +668,8 @@ def test_voice(base_url: str):
 
     subsection("Transcribe API")
 
-    # Generate test WAV
-    wav_file = str(TEST_DIR / "voice_test.wav")
-    generate_test_wav(wav_file)
+    # Silent test WAV from the shared fixture store
+    wav_file = fixture("silence", duration=1.5)
 
     # Test: POST /api/voice/transcribe
     try:
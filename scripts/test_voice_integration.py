@@ -5,7 +5,9 @@
 ═══════════════════════════════════════════════════════════════════════
 
 Tests:
-  1. Vosk Python script (direct)
+  1. Vosk Python script (direct): --file (short and segmented long audio),
+     --stdin, --stream, --dual, --preload-check and a --serve round-trip
+  1b. Transcriber internals and the fixture store (no model needed)
   2. Language detector logic
   3. API /api/voice/transcribe  (requires running Next.js server)
   4. API /api/voice/speak        (requires ElevenLabs API key)
@@ -20,15 +22,18 @@ Usage:
 import argparse
 import json
 import os
-import struct
 import sys
-import wave
-import math
 import time
+import socket
+import struct
 import subprocess
+import tempfile
+import threading
 import io
 from pathlib import Path
 
+from fixture_cache import fixture
+
 # Force UTF-8 stdout on Windows
 if sys.platform == 'win32':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
@@ -77,44 +82,6 @@ def log_section(title: str):
     print(f"{CYAN}{BOLD}{'-' * 60}{RESET}\n")
 
 
-# ─── Test Helpers ──────────────────────────────────────────────────────────────
-
-def generate_test_wav(filename: str, duration: float = 2.0, freq: float = 440):
-    """Generate a simple sine wave WAV (PCM 16kHz 16-bit mono)."""
-    sample_rate = 16000
-    n_samples = int(sample_rate * duration)
-    amplitude = 16000
-
-    os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
-
-    with wave.open(filename, 'w') as wf:
-        wf.setnchannels(1)
-        wf.setsampwidth(2)
-        wf.setframerate(sample_rate)
-
-        for i in range(n_samples):
-            value = int(amplitude * math.sin(2 * math.pi * freq * i / sample_rate))
-            wf.writeframes(struct.pack('<h', value))
-
-    return filename
-
-
-def generate_silence_wav(filename: str, duration: float = 1.0):
-    """Generate a silent WAV file."""
-    sample_rate = 16000
-    n_samples = int(sample_rate * duration)
-
-    os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
-
-    with wave.open(filename, 'w') as wf:
-        wf.setnchannels(1)
-        wf.setsampwidth(2)
-        wf.setframerate(sample_rate)
-        wf.writeframes(b'\x00\x00' * n_samples)
-
-    return filename
-
-
 # ═══════════════════════════════════════════════════════════════════════
 #  TEST 1: Vosk Python Script (Direct)
 # ═══════════════════════════════════════════════════════════════════════
@@ -160,13 +127,11 @@ def test_vosk_python_script():
         return
 
     # Test with a tone WAV (won't produce real text, but should not crash)
-    test_wav = str(TEST_DIR / "test_tone.wav")
-    generate_test_wav(test_wav, duration=1.5)
+    test_wav = fixture("tone", duration=1.5)
     log_pass("Test WAV generated", test_wav)
 
     # Test with silence (should return empty text)
-    silence_wav = str(TEST_DIR / "test_silence.wav")
-    generate_silence_wav(silence_wav)
+    silence_wav = fixture("silence", duration=1.0)
     log_pass("Silence WAV generated", silence_wav)
 
     model_to_test = str(fr_model) if fr_exists else str(en_model)
@@ -208,6 +173,438 @@ def test_vosk_python_script():
     except Exception as e:
         log_fail(f"Vosk tone test ({model_lang})", str(e))
 
+    # Whole WAV piped on stdin (detected by its RIFF header)
+    try:
+        with open(test_wav, 'rb') as f:
+            result = subprocess.run(
+                [sys.executable, script, "--model", model_to_test, "--stdin"],
+                input=f.read(), capture_output=True, timeout=30
+            )
+        output = json.loads(result.stdout.decode('utf-8').strip() or "{}")
+        if result.returncode == 0 and "text" in output and not output.get("error"):
+            log_pass(f"Vosk --stdin WAV ({model_lang})", f"confidence={output.get('confidence', 0)}")
+        else:
+            log_fail(f"Vosk --stdin WAV ({model_lang})", output.get("error") or result.stderr.decode()[:200])
+    except Exception as e:
+        log_fail(f"Vosk --stdin WAV ({model_lang})", str(e))
+
+    # Raw PCM streamed on stdin: a ready line, then a final event
+    try:
+        with open(silence_wav, 'rb') as f:
+            pcm = f.read()[44:]
+        result = subprocess.run(
+            [sys.executable, script, "--model", model_to_test, "--stream"],
+            input=pcm, capture_output=True, timeout=30
+        )
+        events = [json.loads(line) for line in result.stdout.decode('utf-8').splitlines() if line.strip()]
+        kinds = [e.get("event") for e in events]
+        if result.returncode == 0 and kinds[:1] == ["ready"] and kinds[-1:] == ["final"]:
+            log_pass(f"Vosk --stream ({model_lang})", f"{len(events)} events")
+        else:
+            log_fail(f"Vosk --stream ({model_lang})", f"events={kinds} {result.stderr.decode()[:200]}")
+    except Exception as e:
+        log_fail(f"Vosk --stream ({model_lang})", str(e))
+
+    # Speech past LONG_AUDIO_SECONDS is decoded in segments (cut by the NumPy VAD)
+    try:
+        long_wav = fixture("speech_like", duration=30.0, seed=5)
+    except RuntimeError as e:
+        log_skip(f"Vosk long audio in segments ({model_lang})", str(e))
+    else:
+        try:
+            result = subprocess.run(
+                [sys.executable, script, "--model", model_to_test, "--file", long_wav, "--segment-workers", "2"],
+                capture_output=True, text=True, timeout=120
+            )
+            output = json.loads(result.stdout.strip() or "{}")
+            if result.returncode == 0 and output.get("segments", 0) >= 2 and not output.get("error"):
+                log_pass(f"Vosk long audio in segments ({model_lang})", f"segments={output['segments']}")
+            else:
+                log_fail(f"Vosk long audio in segments ({model_lang})", result.stdout[:200] or result.stderr[:200])
+        except Exception as e:
+            log_fail(f"Vosk long audio in segments ({model_lang})", str(e))
+
+    # Both languages from one read
+    if fr_exists and en_exists:
+        try:
+            result = subprocess.run(
+                [sys.executable, script, "--dual", "--file", test_wav,
+                 "--lang-model", f"fr={fr_model}", "--lang-model", f"en={en_model}"],
+                capture_output=True, text=True, timeout=60
+            )
+            output = json.loads(result.stdout.strip() or "{}")
+            if result.returncode == 0 and set(output.get("results", {})) == {"fr", "en"} \
+                    and output.get("best_lang") in ("fr", "en"):
+                log_pass("Vosk --dual", f"best_lang={output['best_lang']}")
+            else:
+                log_fail("Vosk --dual", result.stdout[:200] or result.stderr[:200])
+        except Exception as e:
+            log_fail("Vosk --dual", str(e))
+    else:
+        log_skip("Vosk --dual", "Needs both the FR and EN models")
+
+    # Model import and load costs
+    try:
+        result = subprocess.run(
+            [sys.executable, script, "--preload-check", "--model", model_to_test],
+            capture_output=True, text=True, timeout=120
+        )
+        output = json.loads(result.stdout.strip() or "{}")
+        if result.returncode == 0 and output.get("ok"):
+            log_pass("Vosk --preload-check", f"load_ms={output['models']['default'].get('load_ms')}")
+        else:
+            log_fail("Vosk --preload-check", result.stdout[:200] or result.stderr[:200])
+    except Exception as e:
+        log_fail("Vosk --preload-check", str(e))
+
+    # Persistent worker: one ping and one transcription over its socket
+    test_vosk_server(script, model_to_test, silence_wav)
+
+
+def test_vosk_server(script: str, model_path: str, wav_file: str):
+    """One --serve round-trip: ready line, ping, then a transcription over the Unix socket."""
+    if not hasattr(socket, "AF_UNIX"):
+        log_skip("Vosk --serve", "Unix sockets not available on this platform")
+        return
+
+    socket_path = str(TEST_DIR / f"vosk-test-{os.getpid()}.sock")
+    header = struct.Struct(">I")
+
+    def send(sock, message, audio=b""):
+        if audio:
+            message["audio_len"] = len(audio)
+        body = json.dumps(message).encode("utf-8")
+        sock.sendall(header.pack(len(body)) + body + audio)
+
+    def receive(sock):
+        (length,) = header.unpack(sock.recv(header.size, socket.MSG_WAITALL))
+        return json.loads(sock.recv(length, socket.MSG_WAITALL))
+
+    proc = subprocess.Popen(
+        [sys.executable, script, "--serve", "--socket", socket_path, "--lang-model", f"fr={model_path}"],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+    )
+    try:
+        ready = json.loads(proc.stdout.readline() or "{}")
+        if ready.get("event") != "ready":
+            log_fail("Vosk --serve ready", proc.stderr.read()[:200])
+            return
+        log_pass("Vosk --serve ready", socket_path)
+
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(30)
+            sock.connect(socket_path)
+            send(sock, {"id": 1, "op": "ping"})
+            pong = receive(sock)
+            if pong.get("ok") and pong.get("id") == 1:
+                log_pass("Vosk --serve ping", f"langs={pong.get('langs')}")
+            else:
+                log_fail("Vosk --serve ping", str(pong)[:200])
+
+            with open(wav_file, 'rb') as f:
+                send(sock, {"id": 2, "op": "transcribe", "lang": "fr"}, f.read())
+            reply = receive(sock)
+            if reply.get("id") == 2 and "text" in reply and not reply.get("error"):
+                log_pass("Vosk --serve transcribe", f"text=\"{reply['text']}\"")
+            else:
+                log_fail("Vosk --serve transcribe", str(reply)[:200])
+    except Exception as e:
+        log_fail("Vosk --serve", str(e))
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+# ═══════════════════════════════════════════════════════════════════════
+#  TEST 1b: Transcriber Internals (no model needed)
+# ═══════════════════════════════════════════════════════════════════════
+
+def wait_until(condition, timeout: float = 2.0) -> bool:
+    """Poll `condition` until it holds or `timeout` seconds pass."""
+    end = time.time() + timeout
+    while not condition():
+        if time.time() > end:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+def check_lazy_vosk_import():
+    """Importing the transcriber leaves vosk (and Kaldi) unloaded until a model is needed."""
+    result = subprocess.run(
+        [sys.executable, "-c", "import sys, vosk_transcribe; print('vosk' in sys.modules)"],
+        cwd=str(SCRIPTS_DIR), capture_output=True, text=True, timeout=30
+    )
+    if result.returncode == 0 and result.stdout.strip() == "False":
+        log_pass("vosk is imported lazily")
+    else:
+        log_fail("vosk is imported lazily", result.stdout.strip() or result.stderr[:200])
+
+
+def check_decode_engine(vt):
+    """The decode pool grows to max_workers under load, reports saturation, then shrinks back."""
+    release = threading.Event()
+    engine = vt.DecodeEngine(min_workers=1, max_workers=2, idle_timeout=0.2)
+    try:
+        futures = [engine.submit(release.wait, 5) for _ in range(3)]
+        full = {"workers": 2, "busy": 2, "queued": 1}
+        if wait_until(lambda: engine.stats() == full) and engine.saturated():
+            log_pass("DecodeEngine scales to max_workers", str(full))
+        else:
+            log_fail("DecodeEngine scales to max_workers", f"{engine.stats()}, saturated={engine.saturated()}")
+
+        release.set()
+        results = [future.result(timeout=5) for future in futures]
+        if all(results) and wait_until(lambda: engine.stats()["workers"] == 1) and not engine.saturated():
+            log_pass("DecodeEngine shrinks back when idle", str(engine.stats()))
+        else:
+            log_fail("DecodeEngine shrinks back when idle", f"{engine.stats()}, results={results}")
+    finally:
+        release.set()
+        engine.shutdown()
+
+
+def check_early_winner(vt):
+    """The early language decision fires only on a real lead, with words behind it."""
+    def snap(confidence, words):
+        return {"confidence": confidence, "words": words}
+
+    cases = [
+        ("clear lead", {"fr": snap(0.9, 3), "en": snap(0.5, 2)}, 0.3, ("fr", 0.9)),
+        ("lead exactly at margin", {"fr": snap(0.5, 2), "en": snap(0.75, 2)}, 0.25, ("en", 0.75)),
+        ("lead under margin", {"fr": snap(0.7, 3), "en": snap(0.5, 2)}, 0.3, None),
+        ("leader without words", {"fr": snap(0.9, 0), "en": snap(0.0, 0)}, 0.3, None),
+    ]
+    for name, snapshots, margin, expected in cases:
+        winner = vt._early_winner(snapshots, margin)
+        if winner == expected:
+            log_pass(f"_early_winner: {name}", str(winner))
+        else:
+            log_fail(f"_early_winner: {name}", f"expected {expected}, got {winner}")
+
+
+def check_phrases(vt):
+    """Phrase lists are normalized order-insensitively, and only runtime-graph models take a grammar."""
+    phrases = vt.normalize_phrases(["Oui !", "oui", "Non.", "  ", "D'accord"])
+    if phrases == ["d'accord", "non", "oui"] and vt.grammar_key(phrases) == vt.grammar_key(
+            vt.normalize_phrases(["non", "OUI", "d'accord"])):
+        log_pass("normalize_phrases", str(phrases))
+    else:
+        log_fail("normalize_phrases", str(phrases))
+
+    with tempfile.TemporaryDirectory() as model:
+        static = vt.supports_grammar(model)
+        os.makedirs(os.path.join(model, "graph"))
+        for name in ("HCLr.fst", "Gr.fst"):
+            open(os.path.join(model, "graph", name), "wb").close()
+        if not static and vt.supports_grammar(model):
+            log_pass("supports_grammar needs graph/HCLr.fst + graph/Gr.fst")
+        else:
+            log_fail("supports_grammar needs graph/HCLr.fst + graph/Gr.fst",
+                     f"static={static}, runtime={vt.supports_grammar(model)}")
+
+
+def check_tier_policy(vt):
+    """Routing between small and large models, escalation, and when a small result is "degraded"."""
+    policy = vt.TierPolicy(short_seconds=3.0, escalate_below=0.6, large_rtf=0.5)
+    both = {"small": None, "large": None}
+    sure, unsure = {"confidence": 0.9}, {"confidence": 0.4}
+
+    cases = [
+        ("short speech -> small", policy.choose(both, 2.0), "small"),
+        ("long speech -> large", policy.choose(both, 10.0), "large"),
+        ("long speech, tight deadline -> small", policy.choose(both, 10.0, remaining=4.0), "small"),
+        ("long speech, overloaded -> small", policy.choose(both, 10.0, overloaded=True), "small"),
+        ("large only -> large", policy.choose({"large": None}, 2.0), "large"),
+        ("unsure small result escalates", policy.escalate(both, unsure, 2.0), True),
+        ("confident small result stays", policy.escalate(both, sure, 2.0), False),
+        ("no escalation when overloaded", policy.escalate(both, unsure, 2.0, overloaded=True), False),
+        ("confident short clip is not degraded", policy.degraded(both, sure, 2.0, overloaded=True), False),
+        ("unsure clip kept small by load is degraded", policy.degraded(both, unsure, 2.0, overloaded=True), True),
+        ("long clip kept small by deadline is degraded", policy.degraded(both, sure, 10.0, remaining=4.0), True),
+        ("failed decode is not degraded",
+         policy.degraded(both, {"confidence": 0, "error": "x"}, 10.0, overloaded=True), False),
+        ("small-only language is not degraded", policy.degraded({"small": None}, unsure, 10.0, overloaded=True),
+         False),
+    ]
+    for name, got, expected in cases:
+        if got == expected:
+            log_pass(f"TierPolicy: {name}")
+        else:
+            log_fail(f"TierPolicy: {name}", f"expected {expected}, got {got}")
+
+
+def check_result_cache(vt):
+    """In-memory LRU order and TTL, and on-disk byte accounting across rewrites and eviction."""
+    cache = vt.ResultCache(max_entries=2)
+    for key in ("a", "b"):
+        cache.put(key, {"text": key})
+    cache.get("a")
+    cache.put("c", {"text": "c"})
+    if cache.get("b") is None and cache.get("a") == {"text": "a"} and cache.get("c") == {"text": "c"}:
+        log_pass("ResultCache evicts the least recently used entry")
+    else:
+        log_fail("ResultCache evicts the least recently used entry", str(cache.stats()))
+
+    cache = vt.ResultCache(ttl=0.05)
+    cache.put("a", {"text": "a"})
+    time.sleep(0.1)
+    if cache.get("a") is None:
+        log_pass("ResultCache expires entries after ttl")
+    else:
+        log_fail("ResultCache expires entries after ttl")
+
+    def on_disk(directory):
+        return sum(entry.stat().st_size for entry in os.scandir(directory) if entry.name.endswith(".json"))
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = vt.ResultCache(directory=directory)
+        for text in ("short", "a much longer transcription", "mid-sized text"):
+            cache.put("same-key", {"text": text})
+        if cache.stats()["disk_bytes"] == on_disk(directory):
+            log_pass("ResultCache counts a rewritten disk entry once", f"{on_disk(directory)} bytes")
+        else:
+            log_fail("ResultCache counts a rewritten disk entry once",
+                     f"counted {cache.stats()['disk_bytes']}, on disk {on_disk(directory)}")
+
+        cache = vt.ResultCache(directory=directory, max_bytes=200)
+        for n in range(20):
+            cache.put(f"key-{n}", {"text": f"entry number {n}"})
+        counted = cache.stats()["disk_bytes"]
+        if counted == on_disk(directory) <= 200:
+            log_pass("ResultCache keeps the disk tier under max_bytes", f"{counted} bytes")
+        else:
+            log_fail("ResultCache keeps the disk tier under max_bytes",
+                     f"counted {counted}, on disk {on_disk(directory)}")
+
+        reopened = vt.ResultCache(directory=directory)
+        if reopened.get("key-19") == {"text": "entry number 19"} and reopened.stats()["disk_bytes"] == counted:
+            log_pass("ResultCache reloads its disk tier")
+        else:
+            log_fail("ResultCache reloads its disk tier", str(reopened.stats()))
+
+
+def check_vad(vt):
+    """Silence yields no speech range; speech between two pauses is trimmed to itself plus padding."""
+    from audio_synth import silence, speech_like, to_bytes
+
+    start, end, info = vt.detect_speech(to_bytes(silence(1.0)))
+    if (start, end) == (0, 0) and info["near_silent"]:
+        log_pass("detect_speech on silence", "no speech, near_silent")
+    else:
+        log_fail("detect_speech on silence", f"range=({start}, {end}), info={info}")
+
+    pcm = to_bytes(silence(1.0)) + to_bytes(speech_like(2.0, seed=1)) + to_bytes(silence(1.0))
+    start, end, info = vt.detect_speech(pcm)
+    bytes_per_second = vt.SAMPLE_RATE * 2
+    if 0.5 <= start / bytes_per_second <= 1.0 and 3.0 <= end / bytes_per_second <= 3.5 \
+            and not info["near_silent"]:
+        log_pass("detect_speech trims silence around speech",
+                 f"{start / bytes_per_second:.2f}s..{end / bytes_per_second:.2f}s of 4s")
+    else:
+        log_fail("detect_speech trims silence around speech", f"range=({start}, {end}), info={info}")
+
+
+def check_normalize_pcm(vt):
+    """48 kHz stereo 24-bit and float WAVs come out as 16 kHz mono 16-bit, same tone."""
+    import numpy as np
+    from audio_synth import to_float, tone, write_encoded_wav
+
+    source = to_float(tone(440, 1.0, sample_rate=48000))
+    for sample_format in ("s24", "f32"):
+        name = f"normalize_pcm 48kHz stereo {sample_format}"
+        try:
+            path = str(TEST_DIR / f"normalize_{sample_format}.wav")
+            write_encoded_wav(path, source, 48000, sample_format, channels=2)
+            with open(path, 'rb') as f:
+                buf = f.read()
+            pcm = vt.normalize_pcm(buf, vt.parse_wav_header(buf))
+            samples = np.frombuffer(pcm, dtype="<i2")
+            peak_hz = np.argmax(np.abs(np.fft.rfft(samples))) * vt.SAMPLE_RATE / len(samples)
+            if abs(len(samples) - vt.SAMPLE_RATE) <= 2 and abs(peak_hz - 440) <= 2:
+                log_pass(name, f"{len(samples)} samples, peak at {peak_hz:.0f} Hz")
+            else:
+                log_fail(name, f"{len(samples)} samples, peak at {peak_hz:.0f} Hz")
+        except Exception as e:
+            log_fail(name, str(e))
+
+
+def check_split_at_pauses(vt):
+    """Long audio is cut into contiguous, sample-aligned ranges no longer than SEGMENT_MAX_SECONDS."""
+    from audio_synth import speech_like, to_bytes, tone
+
+    bytes_per_second = vt.SAMPLE_RATE * 2
+    short = to_bytes(speech_like(5.0, seed=4))
+    if vt.split_at_pauses(short) == [(0, len(short))]:
+        log_pass("split_at_pauses keeps short audio whole")
+    else:
+        log_fail("split_at_pauses keeps short audio whole", str(vt.split_at_pauses(short)))
+
+    # Speech has pauses to cut in; a steady tone has none and is cut at its quietest frames
+    for name, pcm in (("speech", to_bytes(speech_like(30.0, seed=5))), ("tone", to_bytes(tone(440, 30.0)))):
+        ranges = vt.split_at_pauses(pcm)
+        contiguous = ranges[0][0] == 0 and ranges[-1][1] == len(pcm) \
+            and all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+        aligned = all(start % 2 == 0 for start, _ in ranges)
+        longest = max(end - start for start, end in ranges) / bytes_per_second
+        if len(ranges) >= 2 and contiguous and aligned and longest <= vt.SEGMENT_MAX_SECONDS:
+            log_pass(f"split_at_pauses on 30s {name}", f"{len(ranges)} segments, longest {longest:.1f}s")
+        else:
+            log_fail(f"split_at_pauses on 30s {name}", str(ranges))
+
+
+def check_fixture_cache():
+    """Fixture keys ignore how defaults and whole floats are spelled; files are reused, then evicted LRU."""
+    from fixture_cache import FixtureCache, fixture_key
+
+    keys = {fixture_key("tone"), fixture_key("tone", freq=440), fixture_key("tone", freq=440.0)}
+    if len(keys) == 1 and fixture_key("tone", freq=441) not in keys:
+        log_pass("fixture_key normalizes parameters")
+    else:
+        log_fail("fixture_key normalizes parameters", f"{len(keys)} keys for the same tone")
+
+    try:
+        fixture_key("tone", frequency=440)
+        log_fail("fixture_key rejects unknown parameters", "no TypeError")
+    except TypeError:
+        log_pass("fixture_key rejects unknown parameters")
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = FixtureCache(directory)
+        first, again = store.get("silence", duration=0.5), store.get("silence", duration=0.5)
+        if first == again and (store.hits, store.misses) == (1, 1):
+            log_pass("FixtureCache reuses generated files", os.path.basename(first))
+        else:
+            log_fail("FixtureCache reuses generated files", f"hits={store.hits}, misses={store.misses}")
+
+        store.max_bytes = os.path.getsize(first)
+        newest = store.get("silence", duration=0.25)
+        if not os.path.exists(first) and os.path.exists(newest):
+            log_pass("FixtureCache evicts the least recently used file")
+        else:
+            log_fail("FixtureCache evicts the least recently used file", str(os.listdir(directory)))
+
+
+def test_transcriber_internals():
+    log_section("TEST 1b: Transcriber Internals (no model needed)")
+
+    # Importing the script does not import vosk (it is loaded with the first model)
+    import vosk_transcribe as vt
+
+    check_lazy_vosk_import()
+    check_decode_engine(vt)
+    check_early_winner(vt)
+    check_tier_policy(vt)
+    check_phrases(vt)
+    check_result_cache(vt)
+    check_fixture_cache()
+    if vt.np is None:
+        log_skip("Audio pipeline checks", "NumPy not installed: pip install numpy")
+        return
+    check_vad(vt)
+    check_split_at_pauses(vt)
+    check_normalize_pcm(vt)
+
 
 # ═══════════════════════════════════════════════════════════════════════
 #  TEST 2: Language Detector Logic
@@ -338,9 +735,8 @@ def test_api_transcribe(base_url: str):
 
     log_pass("Server reachable", base_url)
 
-    # Generate test audio
-    test_wav = str(TEST_DIR / "api_test.wav")
-    generate_silence_wav(test_wav, duration=1.0)
+    # Test audio from the shared fixture store
+    test_wav = fixture("silence", duration=1.0)
 
     url = f"{base_url}/api/voice/transcribe"
 
@@ -599,6 +995,7 @@ def main():
 
     # Always run offline tests
     test_vosk_python_script()
+    test_transcriber_internals()
     test_language_detector()
 
     # API tests only when --api flag is set
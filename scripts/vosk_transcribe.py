@@ -5,124 +5,2037 @@ Called by the Node.js backend as a subprocess.
 
 Usage:
     python vosk_transcribe.py --model <model_path> --file <audio_path>
-    echo <raw_audio> | python vosk_transcribe.py --model <model_path> --stdin
+    <wav_or_raw_audio> | python vosk_transcribe.py --model <model_path> --stdin
+    <raw_audio> | python vosk_transcribe.py --model <model_path> --stream
+    python vosk_transcribe.py --dual --file <audio_path> \\
+        --lang-model fr=<fr_model_path> --lang-model en=<en_model_path>
+    python vosk_transcribe.py --batch manifest.txt --output results.jsonl \\
+        --lang-model fr=<fr_model_path> --lang-model en=<en_model_path>
+    python vosk_transcribe.py --serve --socket /tmp/vosk.sock \\
+        --lang-model fr=<fr_model_path> --lang-model en=<en_model_path>
+    python vosk_transcribe.py --preload-check --lang-model fr=<fr_model_path>
 
 Output (JSON to stdout):
     { "text": "transcribed text", "confidence": 0.95 }
+
+Input formats, optional result fields and the --serve wire protocol are
+described in docs/VOSK_TRANSCRIBE.md.
 """
 
 import argparse
+import glob
+import hashlib
 import json
-import sys
-import wave
+import math
+import mmap
 import os
+import queue
+import re
+import socketserver
+import struct
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager, nullcontext
 
-from vosk import Model, KaldiRecognizer
+_IMPORT_STARTED = time.perf_counter()
 
+try:
+    import numpy as np
+except ImportError:
+    # VAD / silence trimming is skipped without NumPy
+    np = None
 
-def transcribe_file(model_path: str, audio_path: str) -> dict:
-    """Transcribe a WAV file (PCM 16kHz 16-bit mono)."""
-    if not os.path.exists(model_path):
-        return {"text": "", "confidence": 0, "error": f"Model not found: {model_path}"}
+try:
+    import resource
+except ImportError:
+    # Windows: peak RSS is not reported
+    resource = None
 
-    model = Model(model_path)
-    rec = KaldiRecognizer(model, 16000)
-    rec.SetWords(True)
+try:
+    from multiprocessing import resource_tracker, shared_memory
+except ImportError:
+    # No POSIX shared memory: live streams must use --stream instead
+    resource_tracker = shared_memory = None
 
-    try:
-        wf = wave.open(audio_path, "rb")
-    except Exception as e:
-        return {"text": "", "confidence": 0, "error": f"Cannot open audio: {str(e)}"}
+IMPORT_MS = (time.perf_counter() - _IMPORT_STARTED) * 1000
+
+# vosk loads the native Kaldi library, so it is imported on first use (_import_vosk):
+# --help, argument errors, missing models and unreadable audio never pay for it
+Model = KaldiRecognizer = SetLogLevel = None
+_libvosk = _ffi = None
+_vosk_lock = threading.Lock()
+
+SAMPLE_RATE = 16000
+DEFAULT_CHUNK_BYTES = int(os.environ.get("VOSK_CHUNK_BYTES", 8000))
+HEADER = struct.Struct(">I")
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+ROUTE_SHORT_SECONDS = 3.0       # speech up to this long goes to the small model
+ESCALATE_BELOW = 0.6            # small-model confidence under this is retried on the large model
+LARGE_MODEL_RTF = 0.5           # assumed large-model real-time factor when checking the deadline
+SHM_HEADER_BYTES = 64           # shared-memory ring header: uint64 LE frames consumed, rest reserved
+SHM_CONSUMED = struct.Struct("<Q")
+MAX_STREAMS = 4                 # live streams decoded at once (their own threads, not the decode pool)
+STREAM_MAX_SECONDS = 300.0      # deadline of a live stream that does not bring its own
+STREAM_IDLE_SECONDS = 15.0      # a live stream with no audio notice for this long is ended
+UNKNOWN_WORD = "[unk]"          # what a grammar recognizer outputs for speech outside its phrases
+
+
+# ─── Timings ──────────────────────────────────────────────────────────────────
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KiB on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
 
-    if wf.getnchannels() != 1 or wf.getsampwidth() != 2 or wf.getframerate() != 16000:
+
+class Stopwatch:
+    """Accumulates wall time per stage (import, model_load, read, vad, decode, finalize)."""
+
+    def __init__(self):
+        self.ms = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.ms[name] = self.ms.get(name, 0.0) + (time.perf_counter() - started) * 1000
+
+    def report(self, audio_bytes: int) -> dict:
+        """Stage times plus audio length, real-time factor (decode + finalize over audio) and peak RSS."""
+        audio_seconds = audio_bytes / 2 / SAMPLE_RATE
+        decode_s = (self.ms.get("decode", 0.0) + self.ms.get("finalize", 0.0)) / 1000
         return {
-            "text": "",
-            "confidence": 0,
-            "error": f"Audio must be PCM 16kHz 16-bit mono. Got: "
-                     f"channels={wf.getnchannels()}, width={wf.getsampwidth()}, rate={wf.getframerate()}"
+            **{f"{name}_ms": round(ms, 2) for name, ms in self.ms.items()},
+            "audio_seconds": round(audio_seconds, 3),
+            "rtf": round(decode_s / audio_seconds, 4) if audio_seconds else None,
+            "peak_rss_mb": _peak_rss_mb(),
         }
 
-    total_confidence = 0.0
-    word_count = 0
 
-    while True:
-        data = wf.readframes(4000)
-        if len(data) == 0:
-            break
-        rec.AcceptWaveform(data)
+def _cli_stopwatch() -> Stopwatch:
+    """Stopwatch for a one-shot run, charged with this process's import time."""
+    watch = Stopwatch()
+    watch.ms["import"] = IMPORT_MS
+    return watch
+
+
+def _import_vosk(watch: Stopwatch = None):
+    """Import vosk once, charging the time to the "import" stage of `watch`."""
+    global Model, KaldiRecognizer, SetLogLevel, _libvosk, _ffi
+    if Model is not None:
+        return
+    with _vosk_lock:
+        if Model is not None:
+            return
+        with (watch or Stopwatch()).stage("import"):
+            import vosk
+            try:
+                # libvosk handle + cffi, to hand memoryview slices to Kaldi without copying
+                from vosk import _c as _libvosk, _ffi
+            except ImportError:
+                _libvosk = _ffi = None
+            KaldiRecognizer, SetLogLevel = vosk.KaldiRecognizer, vosk.SetLogLevel
+            # Set last: other threads take a non-None Model to mean the import is complete
+            Model = vosk.Model
+
+
+def _load_model(model_path: str, watch: Stopwatch = None):
+    _import_vosk(watch)
+    with (watch or Stopwatch()).stage("model_load"):
+        return Model(model_path)
 
-    wf.close()
 
-    # Get final result
-    final = json.loads(rec.FinalResult())
-    text = final.get("text", "")
+# ─── Decoding ─────────────────────────────────────────────────────────────────
 
-    # Calculate average confidence from word-level results
-    if "result" in final:
-        for word_info in final["result"]:
-            total_confidence += word_info.get("conf", 0)
-            word_count += 1
+def _empty(error: str) -> dict:
+    return {"text": "", "confidence": 0, "error": error}
 
-    avg_confidence = (total_confidence / word_count) if word_count > 0 else 0.0
+
+class CancelToken:
+    """Absolute deadline (epoch seconds) and/or explicit cancellation, checked between chunks."""
+
+    def __init__(self, deadline: float = None):
+        self.deadline = deadline
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def reason(self):
+        """Why the job should stop, or None while it may keep going."""
+        if self._cancelled.is_set():
+            return "Cancelled"
+        if self.deadline is not None and time.time() >= self.deadline:
+            return "Deadline exceeded"
+        return None
+
+
+def _cancelled(reason: str) -> dict:
+    return {**_empty(reason), "status": "cancelled"}
+
+
+def _summarize(segments) -> dict:
+    texts = [seg["text"] for seg in segments if seg.get("text")]
+    confidences = [w.get("conf", 0) for seg in segments for w in seg.get("result", [])
+                   if w.get("word") != UNKNOWN_WORD]
+
+    avg_confidence = (sum(confidences) / len(confidences)) if confidences else 0.0
 
     return {
-        "text": text,
+        "text": " ".join(w for w in " ".join(texts).split() if w != UNKNOWN_WORD),
         "confidence": round(avg_confidence, 3),
     }
 
 
-def transcribe_stdin(model_path: str) -> dict:
-    """Transcribe raw PCM audio from stdin."""
-    if not os.path.exists(model_path):
-        return {"text": "", "confidence": 0, "error": f"Model not found: {model_path}"}
+class _Recognition:
+    """One KaldiRecognizer plus the segment results it has produced so far.
+
+    `rec` reuses an existing recognizer (e.g. a pooled grammar one) instead
+    of building an open-vocabulary one for `model`.
+    """
+
+    def __init__(self, model, partial_words: bool = False, rec=None):
+        self.rec = rec or KaldiRecognizer(model, SAMPLE_RATE)
+        self.rec.SetWords(True)
+        if partial_words and hasattr(self.rec, "SetPartialWords"):
+            self.rec.SetPartialWords(True)
+        self.segments = []
+
+    def accept(self, chunk) -> bool:
+        if _libvosk is None or not isinstance(chunk, memoryview):
+            return self.rec.AcceptWaveform(bytes(chunk))
+        res = _libvosk.vosk_recognizer_accept_waveform(self.rec._handle, _ffi.from_buffer(chunk), len(chunk))
+        if res < 0:
+            raise Exception("Failed to process waveform")
+        return res != 0
+
+    def feed(self, chunk) -> bool:
+        """Feed one chunk (bytes or memoryview); return True when it completed a segment."""
+        if self.accept(chunk):
+            self.segments.append(json.loads(self.rec.Result()))
+            return True
+        return False
+
+    def partial_text(self) -> str:
+        return json.loads(self.rec.PartialResult()).get("partial", "")
+
+    def snapshot(self) -> dict:
+        """Result so far, counting the words of the current partial hypothesis.
+
+        PartialResult() re-runs word alignment with partial words on, so it
+        is called once here; "words" is the number of scored words so far.
+        """
+        partial = json.loads(self.rec.PartialResult())
+        current = {"text": partial.get("partial", ""), "result": partial.get("partial_result", [])}
+        words = sum(len(seg.get("result", [])) for seg in self.segments) + len(current["result"])
+        return {**_summarize(self.segments + [current]), "words": words}
+
+    def finish(self) -> dict:
+        self.segments.append(json.loads(self.rec.FinalResult()))
+        return _summarize(self.segments)
+
+
+def _decode(model, chunks, watch: Stopwatch = None, cancel: CancelToken = None, rec=None) -> dict:
+    """Feed PCM chunks to a fresh recognizer (or `rec`) and merge every segment result."""
+    watch = watch or Stopwatch()
+    recognition = _Recognition(model, rec=rec)
+    with watch.stage("decode"):
+        for chunk in chunks:
+            reason = cancel and cancel.reason()
+            if reason:
+                return _cancelled(reason)
+            recognition.feed(chunk)
+    with watch.stage("finalize"):
+        return recognition.finish()
+
 
-    model = Model(model_path)
-    rec = KaldiRecognizer(model, 16000)
-    rec.SetWords(True)
+def _chunks(pcm, chunk_bytes: int = None):
+    """Split PCM into zero-copy memoryview slices of `chunk_bytes` (whole samples)."""
+    view = memoryview(pcm)
+    size = max(2, (chunk_bytes or DEFAULT_CHUNK_BYTES) & ~1)
+    return [view[i:i + size] for i in range(0, len(view), size)]
 
-    # Read raw PCM from stdin
+
+# ─── Format Normalization ─────────────────────────────────────────────────────
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+RESAMPLE_ZERO_CROSSINGS = 10    # sinc lobes on each side of the filter centre
+RESAMPLE_BLOCK = 8192           # output samples computed per vectorized step
+
+
+def parse_wav_header(buf) -> dict:
+    """Walk the RIFF chunks of a WAV buffer; return its format and data chunk location."""
+    if len(buf) < 12 or bytes(buf[0:4]) != b"RIFF" or bytes(buf[8:12]) != b"WAVE":
+        raise ValueError("Not a RIFF/WAVE file")
+
+    fmt = None
+    pos = 12
+    while pos + 8 <= len(buf):
+        chunk_id = bytes(buf[pos:pos + 4])
+        (size,) = struct.unpack_from("<I", buf, pos + 4)
+        body = pos + 8
+
+        if chunk_id == b"fmt ":
+            tag, channels, rate, _, block_align, bits = struct.unpack_from("<HHIIHH", buf, body)
+            if tag == WAVE_FORMAT_EXTENSIBLE and size >= 26:
+                # The sub-format GUID starts with the real format tag
+                (tag,) = struct.unpack_from("<H", buf, body + 24)
+            fmt = {"format": tag, "channels": channels, "rate": rate,
+                   "width": bits // 8, "block_align": block_align}
+        elif chunk_id == b"data":
+            if fmt is None:
+                raise ValueError("WAV data chunk before fmt chunk")
+            # Streaming writers leave the size at 0 / 0xFFFFFFFF; trust the buffer length
+            size = len(buf) - body if size == 0 or body + size > len(buf) else size
+            return {**fmt, "offset": body, "size": size - size % max(1, fmt["block_align"])}
+
+        pos = body + size + (size & 1)
+
+    raise ValueError("WAV has no data chunk")
+
+
+def _describe(info: dict) -> str:
+    kind = "float" if info["format"] == WAVE_FORMAT_IEEE_FLOAT else f"format={info['format']}"
+    return f"channels={info['channels']}, width={info['width']}, rate={info['rate']}, {kind}"
+
+
+def _resample(samples, rate: int):
+    """Polyphase windowed-sinc resampling of float32 mono samples to SAMPLE_RATE."""
+    g = math.gcd(rate, SAMPLE_RATE)
+    up, down = SAMPLE_RATE // g, rate // g
+    factor = max(up, down)
+
+    # Low-pass at the lower of the two Nyquist rates, designed at rate * up
+    center = RESAMPLE_ZERO_CROSSINGS * factor
+    t = (np.arange(2 * center + 1) - center) / factor
+    taps = (up / factor) * np.sinc(t) * np.kaiser(t.size, 5.0)
+
+    # Split into `up` phases of K taps each: phases[p, j] = taps[p + j * up]
+    k = -(-taps.size // up)
+    phases = np.zeros(k * up, dtype=np.float32)
+    phases[:taps.size] = taps
+    phases = phases.reshape(k, up).T
+
+    padded = np.concatenate([np.zeros(k, np.float32), samples, np.zeros(k + 1, np.float32)])
+    n_out = -(-samples.size * up // down)
+    out = np.empty(n_out, dtype=np.float32)
+    lags = np.arange(k)
+
+    for start in range(0, n_out, RESAMPLE_BLOCK):
+        n = np.arange(start, min(start + RESAMPLE_BLOCK, n_out))
+        m = n * down + center
+        phase = m % up
+        base = (m - phase) // up
+        idx = np.clip(base[:, None] - lags[None, :] + k, 0, padded.size - 1)
+        out[start:start + n.size] = np.einsum("ij,ij->i", phases[phase], padded[idx])
+    return out
+
+
+def normalize_pcm(buf, info: dict) -> bytes:
+    """Convert the data chunk described by `info` to PCM 16kHz 16-bit mono.
+
+    Audio already in that format comes back as a memoryview into `buf`.
+    """
+    tag, channels, width, rate = info["format"], info["channels"], info["width"], info["rate"]
+    offset, size = info["offset"], info["size"]
+
+    if tag == WAVE_FORMAT_PCM and width == 2 and channels == 1 and rate == SAMPLE_RATE:
+        return memoryview(buf)[offset:offset + size]
+
+    if tag not in (WAVE_FORMAT_PCM, WAVE_FORMAT_IEEE_FLOAT) or channels < 1 or rate < 1:
+        raise ValueError(f"Unsupported WAV encoding: {_describe(info)}")
+    if np is None:
+        raise ValueError(f"Audio must be PCM 16kHz 16-bit mono (install NumPy to convert). "
+                         f"Got: {_describe(info)}")
+
+    if tag == WAVE_FORMAT_IEEE_FLOAT and width in (4, 8):
+        samples = np.frombuffer(buf, dtype=f"<f{width}", count=size // width, offset=offset).astype(np.float32)
+    elif tag == WAVE_FORMAT_PCM and width == 1:
+        samples = (np.frombuffer(buf, dtype=np.uint8, count=size, offset=offset).astype(np.float32) - 128) / 128
+    elif tag == WAVE_FORMAT_PCM and width == 2:
+        samples = np.frombuffer(buf, dtype="<i2", count=size // 2, offset=offset).astype(np.float32) / 32768
+    elif tag == WAVE_FORMAT_PCM and width == 3:
+        raw = np.frombuffer(buf, dtype=np.uint8, count=size, offset=offset).reshape(-1, 3).astype(np.int32)
+        packed = raw[:, 0] | (raw[:, 1] << 8) | (raw[:, 2] << 16)
+        samples = ((packed ^ 0x800000) - 0x800000).astype(np.float32) / 8388608
+    elif tag == WAVE_FORMAT_PCM and width == 4:
+        samples = np.frombuffer(buf, dtype="<i4", count=size // 4, offset=offset).astype(np.float32) / 2147483648
+    else:
+        raise ValueError(f"Unsupported WAV encoding: {_describe(info)}")
+
+    if channels > 1:
+        samples = samples[:samples.size - samples.size % channels].reshape(-1, channels).mean(axis=1)
+    if rate != SAMPLE_RATE:
+        samples = _resample(samples, rate)
+
+    return (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+
+
+def _read_wav(source):
+    """Read a WAV path, file-like object or bytes as PCM 16kHz 16-bit mono; return (pcm, error).
+
+    Files are memory-mapped, so native-format audio is decoded straight
+    from the page cache without being copied into Python objects.
+    """
+    try:
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            buf = source
+        elif hasattr(source, "read"):
+            buf = source.read()
+        else:
+            with open(source, "rb") as f:
+                buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        info = parse_wav_header(buf)
+    except Exception as e:
+        return None, f"Cannot open audio: {str(e)}"
+
+    try:
+        return normalize_pcm(buf, info), None
+    except ValueError as e:
+        return None, str(e)
+
+
+def _read_stdin():
+    """Read all of stdin as PCM 16kHz 16-bit mono; return (pcm, error).
+
+    Input starting with a RIFF/WAVE header is parsed like a WAV file, so
+    callers can pipe an upload straight in; anything else is raw PCM.
+    """
     data = sys.stdin.buffer.read()
     if len(data) == 0:
-        return {"text": "", "confidence": 0, "error": "No audio data received"}
+        return None, "No audio data received"
+    if data[:4] == b"RIFF" and data[8:12] == b"WAVE":
+        return _read_wav(data)
+    return data, None
+
+
+# ─── Voice Activity Detection ─────────────────────────────────────────────────
+
+VAD_FRAME = 480                 # 30 ms at 16 kHz
+VAD_PAD_FRAMES = 10             # keep 300 ms around detected speech
+VAD_MIN_SPEECH_FRAMES = 3       # shorter bursts (clicks, pops) are not speech
+SILENCE_DBFS = -50.0            # frames quieter than this are never speech
+CLIP_RATIO = 0.001              # >0.1% full-scale samples → clipped
+LONG_AUDIO_SECONDS = 20.0       # longer speech is split at pauses and decoded in parallel
+SEGMENT_SECONDS = 8.0           # aim for segments about this long ...
+SEGMENT_MAX_SECONDS = 15.0      # ... and cut at the quietest frame if no pause comes by this length
+SEGMENT_PAUSE_FRAMES = 8        # 240 ms without speech is a pause worth cutting at
+EARLY_CHECK_SECONDS = 0.5       # dual decode: compare partial confidences this often ...
+EARLY_CHECK_WINDOW = 3.0        # ... for this long after early_after, then decode to the end
+
+
+def _frame_levels(samples, n_frames: int):
+    """Per-frame level (dBFS) and speech flag for the first `n_frames` 30 ms frames."""
+    frames = samples[:n_frames * VAD_FRAME].reshape(n_frames, VAD_FRAME).astype(np.float32) / 32768.0
+    db = 20.0 * np.log10(np.maximum(np.sqrt(np.mean(frames * frames, axis=1)), 1e-10))
+    zcr = np.mean(np.signbit(frames[:, 1:]) != np.signbit(frames[:, :-1]), axis=1)
 
-    # Process in chunks
-    chunk_size = 8000
-    for i in range(0, len(data), chunk_size):
-        chunk = data[i:i + chunk_size]
-        rec.AcceptWaveform(chunk)
+    # Adaptive threshold: above the noise floor, below the loudest frame, never in silence
+    threshold = max(min(np.percentile(db, 10) + 12.0, db.max() - 12.0), SILENCE_DBFS)
+    # Quieter but noisy-looking frames are kept for fricatives ("s", "ch", "f")
+    speech = (db > threshold) | ((db > threshold - 6.0) & (zcr > 0.3))
+    return db, speech
 
-    final = json.loads(rec.FinalResult())
-    text = final.get("text", "")
 
-    total_confidence = 0.0
-    word_count = 0
-    if "result" in final:
-        for word_info in final["result"]:
-            total_confidence += word_info.get("conf", 0)
-            word_count += 1
+def detect_speech(pcm: bytes):
+    """Energy / zero-crossing VAD over 30 ms frames.
 
-    avg_confidence = (total_confidence / word_count) if word_count > 0 else 0.0
+    Returns (start, end, info): the byte range of `pcm` spanning detected
+    speech (plus padding), or (0, 0, info) when the clip has none.
+    Internal pauses are kept so word boundaries are not disturbed.
+    """
+    samples = np.frombuffer(pcm, dtype="<i2", count=len(pcm) // 2)
+    info = {"audio_seconds": round(samples.size / SAMPLE_RATE, 3), "speech_seconds": 0.0,
+            "clipped": False, "near_silent": True}
 
+    n_frames = samples.size // VAD_FRAME
+    if n_frames == 0:
+        return 0, 0, info
+
+    magnitude = np.abs(samples.astype(np.int32))
+    info["clipped"] = bool(np.count_nonzero(magnitude >= 32767) > CLIP_RATIO * samples.size)
+
+    db, speech = _frame_levels(samples, n_frames)
+    info["near_silent"] = bool(db.max() < SILENCE_DBFS)
+    count = int(np.count_nonzero(speech))
+    if count < VAD_MIN_SPEECH_FRAMES:
+        return 0, 0, info
+    info["speech_seconds"] = round(count * VAD_FRAME / SAMPLE_RATE, 3)
+
+    voiced = np.flatnonzero(speech)
+    first = max(0, int(voiced[0]) - VAD_PAD_FRAMES)
+    last = int(voiced[-1]) + 1 + VAD_PAD_FRAMES
+    start = first * VAD_FRAME * 2
+    end = len(pcm) if last >= n_frames else last * VAD_FRAME * 2
+    info["trimmed_seconds"] = round((len(pcm) - (end - start)) / 2 / SAMPLE_RATE, 3)
+    return start, end, info
+
+
+def split_at_pauses(pcm, target_seconds: float = SEGMENT_SECONDS, max_seconds: float = SEGMENT_MAX_SECONDS) -> list:
+    """Cut PCM into (start, end) byte ranges of about `target_seconds`.
+
+    Each cut falls in the middle of a pause (SEGMENT_PAUSE_FRAMES or more
+    without speech), so no word is split; stretches with no pause within
+    `max_seconds` are cut at their quietest frame instead.
+    """
+    samples = np.frombuffer(pcm, dtype="<i2", count=len(pcm) // 2)
+    n_frames = samples.size // VAD_FRAME
+    target = int(target_seconds * SAMPLE_RATE / VAD_FRAME)
+    limit = max(target + 1, int(max_seconds * SAMPLE_RATE / VAD_FRAME))
+    if n_frames <= limit:
+        return [(0, len(pcm))]
+
+    db, speech = _frame_levels(samples, n_frames)
+    # Runs of non-speech frames: edges where the flag flips
+    edges = np.diff(np.concatenate(([1], speech.astype(np.int8), [1])))
+    pause_starts, pause_ends = np.flatnonzero(edges == -1), np.flatnonzero(edges == 1)
+    long_pauses = pause_ends - pause_starts >= SEGMENT_PAUSE_FRAMES
+    midpoints = ((pause_starts + pause_ends) // 2)[long_pauses]
+
+    cuts = [0]
+
+    def cut_until(frame: int):
+        while frame - cuts[-1] > limit:
+            window = cuts[-1] + target
+            cuts.append(window + int(np.argmin(db[window:cuts[-1] + limit])))
+
+    for mid in midpoints.tolist():
+        cut_until(mid)
+        if mid - cuts[-1] >= target and n_frames - mid >= target // 2:
+            cuts.append(mid)
+    cut_until(n_frames)
+
+    bounds = [cut * VAD_FRAME * 2 for cut in cuts] + [len(pcm)]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _speech_region(pcm: bytes, vad: bool = True, watch: Stopwatch = None):
+    """Return (pcm to decode or None when silent, VAD info or None when VAD is off)."""
+    if not vad or np is None:
+        return pcm, None
+    with (watch or Stopwatch()).stage("vad"):
+        start, end, info = detect_speech(pcm)
+    if start == end:
+        return None, info
+    return pcm[start:end], info
+
+
+def _with_vad(result: dict, info) -> dict:
+    if info is not None:
+        result["vad"] = info
+    return result
+
+
+def _no_speech(info) -> dict:
+    return _with_vad({"text": "", "confidence": 0}, info)
+
+
+# ─── Transcription ────────────────────────────────────────────────────────────
+
+def _with_timings(result: dict, watch: Stopwatch, pcm) -> dict:
+    if watch is not None:
+        result["timings"] = watch.report(len(pcm) if pcm is not None else 0)
+    return result
+
+
+def transcribe_wav(model, source, vad: bool = True, chunk_bytes: int = None, watch: Stopwatch = None,
+                   cancel: CancelToken = None) -> dict:
+    """Transcribe a WAV file path, file-like object or bytes with an already loaded model."""
+    with (watch or Stopwatch()).stage("read"):
+        pcm, error = _read_wav(source)
+    if error:
+        return _empty(error)
+    return transcribe_pcm(model, pcm, vad, chunk_bytes, watch, cancel)
+
+
+def transcribe_pcm(model, pcm, vad: bool = True, chunk_bytes: int = None, watch: Stopwatch = None,
+                   cancel: CancelToken = None) -> dict:
+    """Transcribe PCM 16kHz 16-bit mono with an already loaded model.
+
+    With a `watch`, per-stage timings are added to the result; with a
+    `cancel` token, decoding stops once it is cancelled or past its deadline.
+    """
+    region, info = _speech_region(pcm, vad, watch)
+    if region is None:
+        return _with_timings(_no_speech(info), watch, pcm)
+    result = _decode(model, _chunks(region, chunk_bytes), watch, cancel)
+    return _with_timings(_with_vad(result, info), watch, pcm)
+
+
+def transcribe_file(model_path: str, audio_path: str, vad: bool = True, chunk_bytes: int = None,
+                    watch: Stopwatch = None, cancel: CancelToken = None, small_model_path: str = None,
+                    policy: "TierPolicy" = None, phrases: list = None, segment_workers: int = None) -> dict:
+    """Transcribe a WAV file (any PCM/float WAV; converted to 16kHz 16-bit mono).
+
+    With `small_model_path`, `policy` decides per clip which model to load;
+    with `phrases`, recognition is restricted to that closed vocabulary.
+    Long recordings are decoded in segments on `segment_workers` threads.
+    """
+    if not os.path.exists(model_path):
+        return _empty(f"Model not found: {model_path}")
+
+    with (watch or Stopwatch()).stage("read"):
+        pcm, error = _read_wav(audio_path)
+    if error:
+        return _empty(error)
+
+    return _transcribe_one_shot(model_path, pcm, vad, chunk_bytes, watch, cancel, small_model_path, policy,
+                                phrases, segment_workers)
+
+
+def transcribe_stdin(model_path: str, vad: bool = True, chunk_bytes: int = None, watch: Stopwatch = None,
+                     cancel: CancelToken = None, small_model_path: str = None, policy: "TierPolicy" = None,
+                     phrases: list = None, segment_workers: int = None) -> dict:
+    """Transcribe a WAV file or raw PCM audio piped to stdin."""
+    if not os.path.exists(model_path):
+        return _empty(f"Model not found: {model_path}")
+
+    # Decoded through memoryview slices, not copies
+    with (watch or Stopwatch()).stage("read"):
+        data, error = _read_stdin()
+    if error:
+        return _empty(error)
+
+    return _transcribe_one_shot(model_path, data, vad, chunk_bytes, watch, cancel, small_model_path, policy,
+                                phrases, segment_workers)
+
+
+# ─── Long Recordings ──────────────────────────────────────────────────────────
+
+def decode_segments(model, pcm, ranges, workers: int = None, chunk_bytes: int = None,
+                    cancel: CancelToken = None, submit=None) -> dict:
+    """Decode byte `ranges` of PCM on parallel recognizers and stitch the texts in order.
+
+    The calling thread decodes segments itself, helped by up to `workers`
+    - 1 jobs on a private pool or, with `submit` (a DecodeEngine's), on a
+    shared one, so a server never runs more decode threads than its pool
+    allows. A helper that starts once every segment is taken has nothing
+    to do, and helpers still queued by then are cancelled, so waiting on
+    a busy pool cannot deadlock.
+
+    The confidence is the mean of the segment confidences weighted by
+    their word counts; "segments" says how many were decoded.
+    """
+    view = memoryview(pcm)
+    results = [None] * len(ranges)
+    todo = iter(enumerate(ranges))
+    lock = threading.Lock()
+
+    def drain():
+        while True:
+            with lock:
+                index, span = next(todo, (None, None))
+            if span is None:
+                return
+            results[index] = _decode(model, _chunks(view[span[0]:span[1]], chunk_bytes), cancel=cancel)
+
+    helpers = max(0, min(len(ranges), workers or os.cpu_count() or 1) - 1)
+    pool = ThreadPoolExecutor(max_workers=helpers) if helpers and submit is None else None
+    try:
+        futures = [(submit or pool.submit)(drain) for _ in range(helpers)]
+        drain()
+        for future in futures:
+            if not future.cancel():
+                future.result()
+    finally:
+        if pool:
+            pool.shutdown()
+
+    failed = next((result for result in results if result.get("error")), None)
+    if failed:
+        return failed
+    words = [len(result["text"].split()) for result in results]
+    total = sum(words)
+    confidence = sum(result["confidence"] * n for result, n in zip(results, words)) / total if total else 0.0
     return {
-        "text": text,
-        "confidence": round(avg_confidence, 3),
+        "text": " ".join(result["text"] for result in results if result["text"]),
+        "confidence": round(confidence, 3),
+        "segments": len(ranges),
     }
 
 
+def _decode_speech(model, pcm, chunk_bytes: int = None, watch: Stopwatch = None, cancel: CancelToken = None,
+                   segment_workers: int = None, submit=None) -> dict:
+    """Decode speech, splitting it at pauses across `segment_workers` threads
+    (default: CPU count; 1 = never) when longer than LONG_AUDIO_SECONDS.
+    Helper threads come from `submit` when given (see `decode_segments`)."""
+    workers = segment_workers or os.cpu_count() or 1
+    if workers > 1 and np is not None and len(pcm) > LONG_AUDIO_SECONDS * SAMPLE_RATE * 2:
+        ranges = split_at_pauses(pcm)
+        if len(ranges) > 1:
+            # Segments overlap in time, so the whole parallel decode is one stage
+            with (watch or Stopwatch()).stage("decode"):
+                return decode_segments(model, pcm, ranges, workers, chunk_bytes, cancel, submit)
+    return _decode(model, _chunks(pcm, chunk_bytes), watch, cancel)
+
+
+# ─── Grammars ─────────────────────────────────────────────────────────────────
+
+_PHRASE_NOISE = re.compile(r"[^\w' -]+")
+
+
+def normalize_phrases(phrases) -> list:
+    """Lowercase, strip punctuation from and dedupe a phrase list (sorted, so order does not matter)."""
+    normalized = set()
+    for phrase in phrases or []:
+        text = " ".join(_PHRASE_NOISE.sub(" ", str(phrase).lower()).split())
+        if text:
+            normalized.add(text)
+    return sorted(normalized)
+
+
+def supports_grammar(model_path: str) -> bool:
+    """Whether a model directory has a runtime graph; static-graph models ignore grammars."""
+    return bool(model_path) and all(os.path.exists(os.path.join(model_path, "graph", name))
+                                    for name in ("HCLr.fst", "Gr.fst"))
+
+
+def grammar_key(phrases) -> str:
+    """Stable hash of a normalized phrase list."""
+    return hashlib.blake2b(json.dumps(phrases, ensure_ascii=False).encode("utf-8"), digest_size=16).hexdigest()
+
+
+class GrammarCache:
+    """KaldiRecognizers compiled for a phrase list, reused across jobs.
+
+    Building a recognizer with a grammar compiles a small decoding graph,
+    so recognizers are Reset() after each job and pooled per (model,
+    grammar hash): up to `per_grammar` idle ones for each of the
+    `max_grammars` most recently used grammars. A recognizer decodes one
+    job at a time. Only models with a runtime graph (the small ones)
+    honour the grammar; others decode with their full vocabulary.
+    """
+
+    def __init__(self, max_grammars: int = 32, per_grammar: int = 4):
+        self.max_grammars = max_grammars
+        self.per_grammar = per_grammar
+        self._idle = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @contextmanager
+    def recognizer(self, model, phrases: list):
+        slot = (id(model), grammar_key(phrases))
+        with self._lock:
+            pool = self._idle.get(slot)
+            rec = pool.pop() if pool else None
+            if rec is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if rec is None:
+            grammar = json.dumps(phrases + [UNKNOWN_WORD], ensure_ascii=False)
+            rec = KaldiRecognizer(model, SAMPLE_RATE, grammar)
+        try:
+            yield rec
+        finally:
+            rec.Reset()
+            with self._lock:
+                pool = self._idle.setdefault(slot, [])
+                self._idle.move_to_end(slot)
+                if len(pool) < self.per_grammar:
+                    pool.append(rec)
+                while len(self._idle) > self.max_grammars:
+                    self._idle.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"grammars": len(self._idle), "hits": self.hits, "misses": self.misses}
+
+
+# ─── Model Tiers ──────────────────────────────────────────────────────────────
+
+class TierPolicy:
+    """Choose between a language's small and large model for one utterance.
+
+    Speech up to `short_seconds` goes to the small model, and so does
+    everything when the deadline leaves no room for a large-model decode
+    (estimated at `large_rtf` x speech duration) or the decode threads are
+    saturated. A small-model result under `escalate_below` confidence is
+    decoded again with the large model when those limits allow it.
+    """
+
+    def __init__(self, short_seconds: float = ROUTE_SHORT_SECONDS, escalate_below: float = ESCALATE_BELOW,
+                 large_rtf: float = LARGE_MODEL_RTF):
+        self.short_seconds = short_seconds
+        self.escalate_below = escalate_below
+        self.large_rtf = large_rtf
+
+    def _large_fits(self, speech_seconds: float, remaining: float, overloaded: bool) -> bool:
+        return not overloaded and (remaining is None or remaining > speech_seconds * self.large_rtf)
+
+    def choose(self, tiers, speech_seconds: float, remaining: float = None, overloaded: bool = False) -> str:
+        if "small" not in tiers or "large" not in tiers:
+            return next(iter(tiers))
+        if speech_seconds <= self.short_seconds or not self._large_fits(speech_seconds, remaining, overloaded):
+            return "small"
+        return "large"
+
+    def escalate(self, tiers, result: dict, speech_seconds: float, remaining: float = None,
+                 overloaded: bool = False) -> bool:
+        return "large" in tiers and not result.get("error") \
+            and result["confidence"] < self.escalate_below \
+            and self._large_fits(speech_seconds, remaining, overloaded)
+
+    def degraded(self, tiers, result: dict, speech_seconds: float, remaining: float = None,
+                 overloaded: bool = False) -> bool:
+        """Whether only the deadline or load kept this small-model result from the large model."""
+        wanted_large = speech_seconds > self.short_seconds or result["confidence"] < self.escalate_below
+        return "large" in tiers and not result.get("error") and wanted_large \
+            and not self._large_fits(speech_seconds, remaining, overloaded)
+
+
+def _remaining(cancel: CancelToken):
+    return cancel.deadline - time.time() if cancel is not None and cancel.deadline is not None else None
+
+
+def transcribe_tiered(tiers: dict, pcm, policy: TierPolicy = None, vad: bool = True, chunk_bytes: int = None,
+                      watch: Stopwatch = None, cancel: CancelToken = None, overloaded: bool = False,
+                      phrases: list = None, grammars: GrammarCache = None, segment_workers: int = None,
+                      grammar_tiers=(), submit=None) -> dict:
+    """Transcribe PCM with the model tier `policy` routes it to.
+
+    `tiers` maps "small" / "large" to a loaded Model, or to a zero-argument
+    loader so one-shot runs only load the tier they use. With more than one
+    tier the result says which one answered ("model"), whether a
+    low-confidence small-model result was "escalated" to the large model,
+    and whether the deadline or load kept the large model from a clip it
+    would otherwise have decoded ("degraded").
+
+    With normalized `phrases`, the clip is decoded against that grammar
+    (recognizers reused from `grammars`) on the small tier when it is in
+    `grammar_tiers` (the tiers whose models have a runtime graph), else
+    the large one, and never escalated: speech matching none of the
+    phrases comes back as empty text. When no tier can take a grammar the
+    phrases are ignored and the clip is decoded normally.
+
+    Open-vocabulary speech longer than LONG_AUDIO_SECONDS is split at pauses
+    and decoded on up to `segment_workers` threads, taken from `submit`
+    when given (see `_decode_speech`).
+    """
+    policy = policy or TierPolicy()
+    region, info = _speech_region(pcm, vad, watch)
+    if region is None:
+        return _with_timings(_no_speech(info), watch, pcm)
+    # Silent clips never pay for loading a model, nor do jobs already past their deadline
+    reason = cancel and cancel.reason()
+    if reason:
+        return _cancelled(reason)
+
+    tier = next((tier for tier in ("small", "large") if tier in tiers and tier in grammar_tiers), None)
+    if phrases and tier:
+        model = _resolve_model(tiers[tier])
+        with (grammars or GrammarCache()).recognizer(model, phrases) as rec:
+            result = {**_decode(model, _chunks(region, chunk_bytes), watch, cancel, rec), "grammar": True}
+        if len(tiers) > 1:
+            result["model"] = tier
+        return _with_timings(_with_vad(result, info), watch, pcm)
+
+    speech_seconds = len(region) / (SAMPLE_RATE * 2)
+    tier = policy.choose(tiers, speech_seconds, _remaining(cancel), overloaded)
+    result = _decode_speech(_resolve_model(tiers[tier]), region, chunk_bytes, watch, cancel, segment_workers,
+                            submit)
+
+    if tier == "small" and policy.escalate(tiers, result, speech_seconds, _remaining(cancel), overloaded):
+        retry = _decode_speech(_resolve_model(tiers["large"]), region, chunk_bytes, watch, cancel, segment_workers,
+                               submit)
+        if not retry.get("error"):
+            result, tier = {**retry, "escalated": True}, "large"
+    elif tier == "small" and policy.degraded(tiers, result, speech_seconds, _remaining(cancel), overloaded):
+        result["degraded"] = True
+    if len(tiers) > 1:
+        result["model"] = tier
+    return _with_timings(_with_vad(result, info), watch, pcm)
+
+
+def _resolve_model(model):
+    return model() if callable(model) else model
+
+
+def _transcribe_one_shot(model_path: str, pcm, vad: bool, chunk_bytes: int, watch: Stopwatch,
+                         cancel: CancelToken, small_model_path: str = None, policy: TierPolicy = None,
+                         phrases: list = None, segment_workers: int = None) -> dict:
+    tiers = {"large": lambda: _load_model(model_path, watch)}
+    grammar_tiers = {"large"} if supports_grammar(model_path) else set()
+    if small_model_path and os.path.exists(small_model_path):
+        tiers["small"] = lambda: _load_model(small_model_path, watch)
+        if supports_grammar(small_model_path):
+            grammar_tiers.add("small")
+    return transcribe_tiered(tiers, pcm, policy, vad, chunk_bytes, watch, cancel,
+                             phrases=normalize_phrases(phrases), segment_workers=segment_workers,
+                             grammar_tiers=grammar_tiers)
+
+
+# ─── Streaming Mode ───────────────────────────────────────────────────────────
+
+def _emit(event: dict):
+    print(json.dumps(event, ensure_ascii=False), flush=True)
+
+
+def _stream_step(recognition: _Recognition, chunk, emit, last_partial: str) -> str:
+    """Feed one live chunk, emit a finished segment or a changed partial; return the current partial."""
+    if recognition.feed(chunk):
+        emit({"event": "result", **_summarize(recognition.segments[-1:])})
+        return ""
+    partial = recognition.partial_text()
+    if partial != last_partial:
+        emit({"event": "partial", "text": partial})
+    return partial
+
+
+def transcribe_stream(model_path: str, chunk_bytes: int = None, watch: Stopwatch = None,
+                      cancel: CancelToken = None):
+    """Decode raw PCM from stdin as it arrives, printing one JSON event per line."""
+    if not os.path.exists(model_path):
+        _emit({"event": "final", **_empty(f"Model not found: {model_path}")})
+        return
+
+    recognition = _Recognition(_load_model(model_path, watch))
+    # The model is loaded: audio written from now on is decoded as it arrives
+    _emit({"event": "ready"})
+    timer = watch or Stopwatch()
+    stdin = sys.stdin.buffer
+    frame = bytearray(max(2, (chunk_bytes or DEFAULT_CHUNK_BYTES) & ~1))
+    view = memoryview(frame)
+    received = 0
+    last_partial = ""
+
+    # BufferedReader.readinto() fills the frame unless EOF; one buffer is reused throughout
+    while True:
+        n = stdin.readinto(frame)
+        if not n:
+            break
+        received += n
+
+        reason = cancel and cancel.reason()
+        if reason:
+            _emit({"event": "final", **_cancelled(reason)})
+            return
+
+        with timer.stage("decode"):
+            last_partial = _stream_step(recognition, view[:n], _emit, last_partial)
+
+    if received == 0:
+        _emit({"event": "final", **_empty("No audio data received")})
+        return
+
+    with timer.stage("finalize"):
+        final = recognition.finish()
+    if watch is not None:
+        final["timings"] = watch.report(received)
+    _emit({"event": "final", **final})
+
+
+# ─── Dual-Language Decoding ───────────────────────────────────────────────────
+
+def _early_winner(snapshots: dict, margin: float):
+    """Return the language whose partial word confidence leads by `margin`, if any."""
+    scores = sorted(((snap["confidence"], snap["words"], lang) for lang, snap in snapshots.items()), reverse=True)
+    (best, best_words, lang), (runner_up, _, _) = scores[0], scores[1]
+    if best_words > 0 and best - runner_up >= margin:
+        return lang, best
+    return None
+
+
+def decode_dual(models: dict, pcm, chunk_bytes: int = None, early_margin: float = None,
+                early_after: float = 1.0, on_event=None, vad: bool = True, watch: Stopwatch = None,
+                cancel: CancelToken = None) -> dict:
+    """Feed the same PCM chunks to one recognizer per language, in parallel.
+
+    `models` maps language to a loaded Model, or to an error string when
+    that language is unavailable. The first language wins ties.
+
+    With `early_margin`, partial word confidences are compared every
+    EARLY_CHECK_SECONDS of audio from `early_after` seconds on, for at
+    most EARLY_CHECK_WINDOW seconds (a clip still ambiguous by then is
+    decoded to the end); as soon as one language leads by the margin the
+    others stop decoding and keep their partial result (marked
+    "abandoned"). `on_event` is then called with a "language" event so
+    callers can act before the decode finishes.
+
+    A `cancel` token stops every recognizer at the next chunk.
+    """
+    timer = watch or Stopwatch()
+    region, info = _speech_region(pcm, vad, timer)
+    if region is None:
+        results = {lang: _empty(model) if isinstance(model, str) else _no_speech(info)
+                   for lang, model in models.items()}
+        return _with_timings({"results": results, "best_lang": next(iter(models), None), "vad": info}, watch, pcm)
+
+    chunks = _chunks(region, chunk_bytes)
+    results = {lang: _empty(model) for lang, model in models.items() if isinstance(model, str)}
+    live = {lang: _Recognition(model, partial_words=early_margin is not None)
+            for lang, model in models.items() if not isinstance(model, str)}
+    early = None
+    fed = 0
+    bytes_per_second = SAMPLE_RATE * 2
+    next_check = early_after * bytes_per_second
+    last_check = (early_after + EARLY_CHECK_WINDOW) * bytes_per_second
+
+    # Kaldi releases the GIL, so the recognizers really decode side by side
+    with ThreadPoolExecutor(max_workers=max(1, len(live))) as pool:
+        for chunk in chunks:
+            reason = cancel and cancel.reason()
+            if reason:
+                return _dual_cancelled(models, reason)
+            with timer.stage("decode"):
+                list(pool.map(lambda rec: rec.feed(chunk), live.values()))
+            fed += len(chunk)
+
+            if early is None and early_margin is not None and len(live) > 1 \
+                    and next_check <= fed and next_check <= last_check:
+                next_check += EARLY_CHECK_SECONDS * bytes_per_second
+                # One PartialResult() per language, aligned in parallel like the decode
+                with timer.stage("decode"):
+                    snapshots = dict(zip(live, pool.map(lambda rec: rec.snapshot(), live.values())))
+                winner = _early_winner(snapshots, early_margin)
+                if winner:
+                    lang, confidence = winner
+                    early = {"event": "language", "lang": lang, "confidence": confidence,
+                             "at_seconds": round(fed / bytes_per_second, 2)}
+                    for other in [other for other in live if other != lang]:
+                        live.pop(other)
+                        snapshot = snapshots[other]
+                        snapshot.pop("words")
+                        results[other] = {**snapshot, "abandoned": True}
+                    if on_event:
+                        on_event(early)
+
+        with timer.stage("finalize"):
+            results.update(pool.map(lambda item: (item[0], item[1].finish()), live.items()))
+
+    best_lang = None
+    for lang in models:
+        if best_lang is None or results[lang]["confidence"] > results[best_lang]["confidence"]:
+            best_lang = lang
+
+    result = _with_vad({"results": {lang: results[lang] for lang in models}, "best_lang": best_lang}, info)
+    if early:
+        result["early_lang"] = early["lang"]
+        result["early_at_seconds"] = early["at_seconds"]
+    return _with_timings(result, watch, pcm)
+
+
+def _dual_error(langs, error: str) -> dict:
+    return {"results": {lang: _empty(error) for lang in langs},
+            "best_lang": next(iter(langs), None), "error": error}
+
+
+def _dual_cancelled(langs, reason: str) -> dict:
+    return {"results": {lang: _cancelled(reason) for lang in langs},
+            "best_lang": next(iter(langs), None), "error": reason, "status": "cancelled"}
+
+
+def transcribe_dual(model_paths: dict, audio_path: str = None, early_margin: float = None,
+                    early_after: float = 1.0, vad: bool = True, chunk_bytes: int = None,
+                    watch: Stopwatch = None, cancel: CancelToken = None) -> dict:
+    """Load each language model once and decode a WAV file (or WAV/raw PCM on stdin) with all of them."""
+    if not model_paths:
+        return _dual_error([], "Specify at least one --lang-model")
+
+    with (watch or Stopwatch()).stage("read"):
+        if audio_path:
+            pcm, error = _read_wav(audio_path)
+        else:
+            pcm, error = _read_stdin()
+    if error:
+        return _dual_error(model_paths, error)
+    reason = cancel and cancel.reason()
+    if reason:
+        return _dual_cancelled(model_paths, reason)
+
+    models = {lang: _load_model(model_path, watch) if os.path.exists(model_path) else f"Model not found: {model_path}"
+              for lang, model_path in model_paths.items()}
+    return decode_dual(models, pcm, chunk_bytes, early_margin=early_margin, early_after=early_after, vad=vad,
+                       watch=watch, cancel=cancel)
+
+
+# ─── Batch Mode ───────────────────────────────────────────────────────────────
+
+def _batch_entries(source: str) -> list:
+    """List (key, path, lang) from a manifest file, a directory or a glob pattern.
+
+    Manifest lines are `path` or `path<TAB>lang`; blank lines and `#`
+    comments are ignored and relative paths resolve against the manifest.
+    """
+    if os.path.isdir(source):
+        paths = sorted(glob.glob(os.path.join(source, "**", "*.wav"), recursive=True))
+        return [(path, path, None) for path in paths]
+    if any(c in source for c in "*?["):
+        return [(path, path, None) for path in sorted(glob.glob(source, recursive=True))]
+
+    base = os.path.dirname(os.path.abspath(source))
+    entries = []
+    with open(source, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            key, _, lang = line.partition("\t")
+            key = key.strip()
+            entries.append((key, key if os.path.isabs(key) else os.path.join(base, key), lang.strip() or None))
+    return entries
+
+
+def _completed(output_path: str) -> set:
+    """Files a previous run's JSONL output holds a result for; failed ones are left to retry."""
+    done = set()
+    if not output_path or not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+                if not record.get("error"):
+                    done.add(record["file"])
+            except (ValueError, KeyError, TypeError, AttributeError):
+                # Last line cut short by the interruption; that file is redone
+                pass
+    return done
+
+
+def transcribe_batch(source: str, model_paths: dict, output_path: str = None, workers: int = None,
+                     vad: bool = True, chunk_bytes: int = None, timings: bool = False) -> dict:
+    """Transcribe every entry of `source` with models loaded once, writing JSON lines.
+
+    Files run on a thread pool sharing the models. Entries without a
+    language are decoded with every model (dual mode) when several are
+    loaded. With `output_path`, entries already transcribed there are
+    skipped, so an interrupted run resumes where it stopped; entries
+    recorded with an error are retried (their new line follows the old).
+
+    At most two files per thread are queued at a time; on Ctrl-C the
+    queued ones are dropped and the running ones stop at their next chunk.
+    """
+    started = time.perf_counter()
+    entries = _batch_entries(source)
+    done = _completed(output_path)
+    todo = [entry for entry in entries if entry[0] not in done]
+
+    models = {lang: _load_model(model_path) if os.path.exists(model_path) else f"Model not found: {model_path}"
+              for lang, model_path in model_paths.items()} if todo else {}
+    stop = CancelToken()
+
+    def run(key, path, lang):
+        job_started = time.perf_counter()
+        watch = Stopwatch() if timings else None
+        try:
+            if lang is None and len(models) > 1:
+                with (watch or Stopwatch()).stage("read"):
+                    pcm, error = _read_wav(path)
+                result = _dual_error(models, error) if error else \
+                    decode_dual(models, pcm, chunk_bytes, vad=vad, watch=watch, cancel=stop)
+            else:
+                fallback = next(iter(models.values())) if len(models) == 1 else None
+                model = models.get(lang, fallback) or f"No model loaded for language: {lang}"
+                result = _empty(model) if isinstance(model, str) else \
+                    transcribe_wav(model, path, vad, chunk_bytes, watch, stop)
+        except Exception as e:
+            result = _empty(f"Transcription failed: {str(e)}")
+        return {"file": key, **({"lang": lang} if lang else {}), **result,
+                "elapsed_ms": round((time.perf_counter() - job_started) * 1000, 1)}
+
+    out = open(output_path, "a+", encoding="utf-8") if output_path else sys.stdout
+    failed = 0
+    try:
+        if output_path and out.tell() > 0:
+            out.seek(out.tell() - 1)
+            if out.read(1) != "\n":
+                out.write("\n")
+
+        workers = workers or os.cpu_count() or 1
+        pending = iter(todo)
+        running = set()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            try:
+                while True:
+                    for entry in pending:
+                        running.add(pool.submit(run, *entry))
+                        if len(running) >= 2 * workers:
+                            break
+                    if not running:
+                        break
+                    finished, running = wait(running, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        result = future.result()
+                        failed += bool(result.get("error"))
+                        out.write(json.dumps(result, ensure_ascii=False) + "\n")
+                        out.flush()
+            except KeyboardInterrupt:
+                # Unwritten files are redone on resume; don't decode them on the way out
+                stop.cancel()
+                pool.shutdown(wait=False, cancel_futures=True)
+                raise
+    finally:
+        if output_path:
+            out.close()
+
+    summary = {"event": "batch_done", "total": len(entries), "transcribed": len(todo),
+               "skipped": len(entries) - len(todo), "failed": failed,
+               "elapsed_s": round(time.perf_counter() - started, 2)}
+    print(json.dumps(summary), file=sys.stderr)
+    return summary
+
+
+# ─── Result Cache ─────────────────────────────────────────────────────────────
+
+class ResultCache:
+    """Bounded LRU of results keyed by a hash of the PCM and the model identity.
+
+    Entries are kept in memory (up to `max_entries`) and, with `directory`,
+    as JSON files on disk (up to `max_bytes`, oldest evicted first). Both
+    tiers expire entries after `ttl` seconds.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 3600.0, directory: str = None,
+                 max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._disk_bytes = 0
+
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._disk_bytes = sum(entry.stat().st_size for entry in os.scandir(directory)
+                                   if entry.name.endswith(".json"))
+
+    @staticmethod
+    def key(pcm, *identity) -> str:
+        digest = hashlib.blake2b(json.dumps(identity, sort_keys=True).encode("utf-8"), digest_size=20)
+        digest.update(pcm)
+        return digest.hexdigest()
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[0] > now:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return dict(entry[1])
+            self._memory.pop(key, None)
+
+        result = self._read_disk(key, now)
+        with self._lock:
+            if result is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        self._remember(key, result, now)
+        return dict(result)
+
+    def put(self, key: str, result: dict):
+        now = time.time()
+        self._remember(key, result, now)
+        if self.directory:
+            self._write_disk(key, result)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._memory),
+                    "disk_bytes": self._disk_bytes}
+
+    def _remember(self, key: str, result: dict, now: float):
+        with self._lock:
+            self._memory[key] = (now + self.ttl, result)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _read_disk(self, key: str, now: float):
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            if now - os.stat(path).st_mtime > self.ttl:
+                self._remove(path)
+                return None
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, key: str, result: dict):
+        body = json.dumps(result, ensure_ascii=False).encode("utf-8")
+        path = self._path(key)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(body)
+        except OSError:
+            return
+        with self._lock:
+            # Rewriting a key replaces its file, so only the size difference is new
+            try:
+                replaced = os.stat(path).st_size
+            except OSError:
+                replaced = 0
+            try:
+                os.replace(tmp, path)
+            except OSError:
+                return
+            self._disk_bytes += len(body) - replaced
+            over = self._disk_bytes > self.max_bytes
+        if over:
+            self._evict_disk()
+
+    def _remove(self, path: str):
+        try:
+            size = os.stat(path).st_size
+            os.unlink(path)
+        except OSError:
+            return
+        with self._lock:
+            self._disk_bytes -= size
+
+    def _evict_disk(self):
+        """Delete expired files, then the oldest ones until under max_bytes."""
+        entries = sorted((entry.stat().st_mtime, entry.path) for entry in os.scandir(self.directory)
+                         if entry.name.endswith(".json"))
+        cutoff = time.time() - self.ttl
+        for mtime, path in entries:
+            if mtime >= cutoff and self._disk_bytes <= self.max_bytes * 0.9:
+                break
+            self._remove(path)
+
+
+# ─── Decode Engine ────────────────────────────────────────────────────────────
+
+class DecodeEngine:
+    """Thread pool running KaldiRecognizer decodes against shared models.
+
+    Kaldi releases the GIL while decoding, so recognizers on different
+    threads run in parallel against the same in-memory Model. The pool
+    keeps `min_workers` threads, adds one whenever a job is queued and no
+    thread is idle, and lets extra threads exit after `idle_timeout`
+    seconds without work.
+    """
+
+    def __init__(self, min_workers: int = 1, max_workers: int = None, idle_timeout: float = 30.0):
+        self.min_workers = max(1, min_workers)
+        self.max_workers = max(self.min_workers, max_workers or os.cpu_count() or 1)
+        self.idle_timeout = idle_timeout
+
+        self._jobs = queue.Queue()
+        self._lock = threading.Lock()
+        self._workers = 0
+        self._busy = 0
+        self._shutdown = False
+
+        with self._lock:
+            for _ in range(self.min_workers):
+                self._spawn()
+
+    def submit(self, fn, *args) -> Future:
+        """Queue `fn(*args)` and return a Future for its result."""
+        future = Future()
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("Decode engine is shut down")
+            self._jobs.put((future, fn, args))
+            idle = self._workers - self._busy
+            if self._jobs.qsize() > idle and self._workers < self.max_workers:
+                self._spawn()
+        return future
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"workers": self._workers, "busy": self._busy, "queued": self._jobs.qsize()}
+
+    def saturated(self) -> bool:
+        """True when every thread the pool may run is busy and jobs are waiting for one."""
+        with self._lock:
+            return self._busy >= self.max_workers and self._jobs.qsize() > 0
+
+    def shutdown(self):
+        """Stop accepting jobs and let every thread exit once the queue drains."""
+        with self._lock:
+            self._shutdown = True
+            for _ in range(self._workers):
+                self._jobs.put(None)
+
+    def _spawn(self):
+        # Caller holds self._lock
+        self._workers += 1
+        threading.Thread(target=self._run, name=f"vosk-decode-{self._workers}", daemon=True).start()
+
+    def _run(self):
+        while True:
+            try:
+                job = self._jobs.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                with self._lock:
+                    if self._workers > self.min_workers:
+                        self._workers -= 1
+                        return
+                continue
+
+            if job is None:
+                with self._lock:
+                    self._workers -= 1
+                return
+
+            future, fn, args = job
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            with self._lock:
+                self._busy += 1
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                with self._lock:
+                    self._busy -= 1
+
+
+# ─── Shared-Memory Streams ────────────────────────────────────────────────────
+
+def _is_int(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _attach_shm(name: str):
+    """Open an existing POSIX shared-memory segment without taking ownership of it."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)    # Python 3.13+
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        # The client created the segment and unlinks it; our tracker must not
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+class ShmStream:
+    """Live PCM arriving through a shared-memory ring the client writes into.
+
+    Frame `seq` sits in slot `seq % slots`, at SHM_HEADER_BYTES + slot *
+    slot_bytes. Only ("audio", seq, lengths) notices travel over the
+    socket; the decoder reads each slot through a memoryview and then
+    publishes how many frames it has consumed in the segment header, so
+    the writer can reuse slots without a reply per frame.
+    """
+
+    def __init__(self, name: str, slots: int, slot_bytes: int, idle_timeout: float = STREAM_IDLE_SECONDS):
+        if shared_memory is None:
+            raise ValueError("Shared memory is not available on this platform")
+        if slots < 2 or slot_bytes < 2 or slot_bytes % 2:
+            raise ValueError(f"Invalid ring geometry: {slots} x {slot_bytes} bytes")
+        self.shm = _attach_shm(name)
+        if self.shm.size < SHM_HEADER_BYTES + slots * slot_bytes:
+            self.shm.close()
+            raise ValueError(f"Shared memory segment {name} is smaller than its ring")
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.idle_timeout = idle_timeout
+        self.received = 0
+        self.error = None
+        self._expected = 0
+        self._frames = queue.Queue()
+
+    def push(self, seq, lengths):
+        """Queue frames `seq`, `seq + 1`, ... written by the client; a bad notice ends the stream."""
+        if not _is_int(seq) or not isinstance(lengths, list) or not all(_is_int(n) for n in lengths):
+            self.end("Invalid audio notice: seq must be an integer and lens a list of integers")
+        elif seq != self._expected:
+            self.end(f"Out-of-order frame {seq} (expected {self._expected})")
+        elif any(not 0 < n <= self.slot_bytes for n in lengths):
+            self.end(f"Frame length outside 1..{self.slot_bytes} bytes")
+        else:
+            for n in lengths:
+                self._frames.put((self._expected, n))
+                self._expected += 1
+
+    def end(self, error: str = None):
+        self.error = self.error or error
+        self._frames.put(None)
+
+    def frames(self, cancel: CancelToken):
+        """Yield (seq, memoryview) per frame until the client ends the stream or `cancel` fires.
+
+        Each view is released, and the frame marked consumed, once the
+        caller asks for the next one. A client silent for `idle_timeout`
+        seconds ends the stream with an error.
+        """
+        buf = self.shm.buf
+        last = time.monotonic()
+        while not cancel.reason():
+            try:
+                item = self._frames.get(timeout=0.25)
+            except queue.Empty:
+                if time.monotonic() - last > self.idle_timeout:
+                    self.error = self.error or f"No audio for {self.idle_timeout:g} s"
+                    return
+                continue
+            if item is None:
+                return
+            seq, n = item
+            offset = SHM_HEADER_BYTES + (seq % self.slots) * self.slot_bytes
+            with buf[offset:offset + n] as frame:
+                yield seq, frame
+            self.received += n
+            SHM_CONSUMED.pack_into(buf, 0, seq + 1)
+            last = time.monotonic()
+
+    def close(self):
+        self.shm.close()
+
+
+# ─── Server Mode ──────────────────────────────────────────────────────────────
+
+def _recv_exact(sock, n: int) -> bytes:
+    buf = bytearray(n)
+    view = memoryview(buf)
+    got = 0
+    while got < n:
+        read = sock.recv_into(view[got:], n - got)
+        if read == 0:
+            raise EOFError("Connection closed")
+        got += read
+    return bytes(buf)
+
+
+def read_frame(sock):
+    """Read one length-prefixed JSON frame (and its audio payload, if any)."""
+    (length,) = HEADER.unpack(_recv_exact(sock, HEADER.size))
+    if length > MAX_FRAME_BYTES:
+        raise ValueError(f"Frame too large: {length} bytes")
+    message = json.loads(_recv_exact(sock, length).decode("utf-8"))
+    if not isinstance(message, dict):
+        raise ValueError("frame header must be a JSON object")
+
+    try:
+        audio_len = int(message.get("audio_len") or 0)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid audio_len: {message.get('audio_len')!r}")
+    if audio_len > MAX_FRAME_BYTES:
+        raise ValueError(f"Audio payload too large: {audio_len} bytes")
+    audio = _recv_exact(sock, audio_len) if audio_len else b""
+    return message, audio
+
+
+def encode_frame(message: dict) -> bytes:
+    body = json.dumps(message, ensure_ascii=False).encode("utf-8")
+    return HEADER.pack(len(body)) + body
+
+
+class VoskServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix socket server holding warm Models per language.
+
+    `models` is keyed by language ("fr") or language and tier ("fr:small");
+    a bare language is the large tier. Transcriptions are routed between
+    tiers by `policy`; dual decoding and live streams use the large model
+    when one is loaded. Jobs carrying "phrases" decode against that
+    grammar on a tier whose model has a runtime graph (the small one
+    first), with compiled recognizers kept in `grammars`. Live streams
+    mostly wait for audio, so they run on `stream_engine`, never taking a
+    decode thread from `engine`. Long transcriptions are split into
+    segments decoded by up to `segment_workers` threads of `engine` (never
+    more than it may run), unless the decode threads are saturated.
+
+    The wire protocol is described in docs/VOSK_TRANSCRIBE.md.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, models: dict, engine: DecodeEngine, chunk_bytes: int = None,
+                 cache: ResultCache = None, model_ids: dict = None, policy: TierPolicy = None,
+                 grammars: GrammarCache = None, segment_workers: int = None, stream_engine: DecodeEngine = None):
+        self.engine = engine
+        self.stream_engine = stream_engine or DecodeEngine(1, MAX_STREAMS)
+        self.chunk_bytes = chunk_bytes
+        self.cache = cache
+        self.policy = policy or TierPolicy()
+        self.grammars = grammars or GrammarCache()
+        self.segment_workers = segment_workers
+        # Cache keys use the resolved model directories, so swapping a model invalidates them
+        self.model_ids = model_ids or {}
+        self.tiers = {}
+        self.tier_ids = {}
+        # Language -> tiers whose model has a runtime graph, so it can honour "phrases"
+        self.grammar_tiers = {}
+        for key, model in models.items():
+            lang, _, tier = key.partition(":")
+            self.tiers.setdefault(lang, {})[tier or "large"] = model
+            self.tier_ids.setdefault(lang, []).append(self.model_ids.get(key))
+            if supports_grammar(self.model_ids.get(key)):
+                self.grammar_tiers.setdefault(lang, set()).add(tier or "large")
+        self.models = {lang: tiers.get("large") or next(iter(tiers.values())) for lang, tiers in self.tiers.items()}
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        super().__init__(socket_path, _JobHandler)
+
+    def handle_job(self, message: dict, audio: bytes, emit=None, cancel: CancelToken = None) -> dict:
+        op = message.get("op", "transcribe")
+        chunk_bytes = message.get("chunk_bytes") or self.chunk_bytes
+        vad = message.get("vad", True)
+        watch = Stopwatch() if message.get("timings") else None
+
+        if op == "ping":
+            stats = {"ok": True, "langs": sorted(self.models),
+                     "tiers": {lang: sorted(tiers) for lang, tiers in self.tiers.items()}, **self.engine.stats(),
+                     "streams": self.stream_engine.stats(), "grammars": self.grammars.stats()}
+            if self.cache:
+                stats["cache"] = self.cache.stats()
+            return stats
+
+        # A job that waited in the queue past its deadline is dropped before any work
+        cancel = cancel or CancelToken(message.get("deadline"))
+        reason = cancel.reason()
+
+        if op == "dual":
+            langs = message.get("langs") or sorted(self.models)
+            if reason:
+                return _dual_cancelled(langs, reason)
+            with (watch or Stopwatch()).stage("read"):
+                pcm, error = _read_wav(audio) if audio else (None, "No audio data received")
+            if error:
+                return _dual_error(langs, error)
+            models = {lang: self.models.get(lang, f"No model loaded for language: {lang}") for lang in langs}
+            return self._cached(
+                pcm, ("dual", [self.model_ids.get(lang) for lang in langs], vad,
+                      message.get("early_margin"), message.get("early_after", 1.0)),
+                lambda: decode_dual(models, pcm, chunk_bytes, early_margin=message.get("early_margin"),
+                                    early_after=message.get("early_after", 1.0), on_event=emit, vad=vad,
+                                    watch=watch, cancel=cancel))
+
+        if op != "transcribe":
+            return _empty(f"Unknown op: {op}")
+        if reason:
+            return _cancelled(reason)
+
+        lang = message.get("lang")
+        tiers = self.tiers.get(lang)
+        if tiers is None:
+            return _empty(f"No model loaded for language: {lang}")
+        if not audio:
+            return _empty("No audio data received")
+
+        with (watch or Stopwatch()).stage("read"):
+            pcm, error = _read_wav(audio)
+        if error:
+            return _empty(error)
+        grammar_tiers = self.grammar_tiers.get(lang, set())
+        # Without a runtime graph the phrases would be ignored anyway
+        phrases = normalize_phrases(message.get("phrases")) if grammar_tiers else []
+        overloaded = self.engine.saturated()
+        return self._cached(pcm, ("transcribe", self.tier_ids.get(lang), vad, phrases and grammar_key(phrases)),
+                            lambda: transcribe_tiered(tiers, pcm, self.policy, vad, chunk_bytes, watch, cancel,
+                                                      overloaded=overloaded, phrases=phrases, grammars=self.grammars,
+                                                      segment_workers=1 if overloaded else self.segment_workers,
+                                                      grammar_tiers=grammar_tiers, submit=self.engine.submit))
+
+    def handle_stream(self, message: dict, stream: ShmStream, emit, cancel: CancelToken) -> dict:
+        """Decode a live shared-memory stream, emitting partials, until the client ends it."""
+        lang = message.get("lang")
+        model = self.models.get(lang)
+        if model is None:
+            return _empty(f"No model loaded for language: {lang}")
+        phrases = normalize_phrases(message.get("phrases"))
+        grammar_tiers = self.grammar_tiers.get(lang, ())
+        tier = next((tier for tier in ("small", "large") if tier in grammar_tiers), None)
+        if phrases and tier:
+            model = self.tiers[lang][tier]
+        else:
+            phrases = None
+
+        watch = Stopwatch() if message.get("timings") else None
+        timer = watch or Stopwatch()
+        with self.grammars.recognizer(model, phrases) if phrases else nullcontext() as rec:
+            recognition = _Recognition(model, rec=rec)
+            last_partial = ""
+            for _, frame in stream.frames(cancel):
+                with timer.stage("decode"):
+                    last_partial = _stream_step(recognition, frame, emit, last_partial)
+
+            reason = cancel.reason()
+            if reason:
+                return _cancelled(reason)
+            if stream.error:
+                return _empty(stream.error)
+            if stream.received == 0:
+                return _empty("No audio data received")
+            with timer.stage("finalize"):
+                final = recognition.finish()
+        if phrases:
+            final["grammar"] = True
+        if watch is not None:
+            final["timings"] = watch.report(stream.received)
+        return final
+
+    def _cached(self, pcm, identity: tuple, decode) -> dict:
+        """Serve a repeated (audio, model, options) job from the cache, else decode and store it."""
+        if not self.cache:
+            return decode()
+
+        key = self.cache.key(pcm, *identity)
+        result = self.cache.get(key)
+        if result is not None:
+            result["cached"] = True
+            return result
+
+        result = decode()
+        # A degraded result only reflects this moment's load or deadline; a retry may do better
+        if not result.get("error") and not result.get("degraded"):
+            self.cache.put(key, {k: v for k, v in result.items() if k != "timings"})
+        return dict(result)
+
+
+class _JobHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        self.write_lock = threading.Lock()
+        # Job id -> (CancelToken, Future) for jobs still queued or decoding
+        self.jobs = {}
+        self.jobs_lock = threading.Lock()
+        # Job id -> ShmStream for live streams still accepting audio
+        self.streams = {}
+        try:
+            self._serve_jobs()
+        finally:
+            # The client is gone; nobody will read these results
+            with self.jobs_lock:
+                jobs = list(self.jobs.values())
+            for token, future in jobs:
+                token.cancel()
+                future.cancel()
+
+    def _serve_jobs(self):
+        while True:
+            try:
+                message, audio = read_frame(self.request)
+            except (EOFError, ConnectionError):
+                return
+            except ValueError as e:
+                self.reply(message={}, result=_empty(str(e)))
+                return
+
+            if message.get("op") == "ping":
+                self.reply(message, self.server.handle_job(message, audio))
+                continue
+
+            if message.get("op") == "cancel":
+                with self.jobs_lock:
+                    job = self.jobs.get(message.get("target"))
+                if job:
+                    job[0].cancel()
+                    job[1].cancel()
+                continue
+
+            if message.get("op") in ("audio", "stream_end"):
+                self._stream_control(message)
+                continue
+
+            # Decode on the engine so one connection can carry many jobs at once
+            def emit(event, message=message):
+                self.reply(message, event)
+
+            job_id = message.get("id")
+            token = CancelToken(message.get("deadline"))
+            engine = self.server.engine
+            if message.get("op") == "stream":
+                if token.deadline is None:
+                    token.deadline = time.time() + STREAM_MAX_SECONDS
+                try:
+                    stream = ShmStream(message.get("shm"), int(message.get("slots") or 0),
+                                       int(message.get("slot_bytes") or 0))
+                except (OSError, TypeError, ValueError) as e:
+                    self.reply(message, _empty(f"Cannot attach audio ring: {str(e)}"))
+                    continue
+                self.streams[job_id] = stream
+                engine = self.server.stream_engine
+                job = (self.server.handle_stream, message, stream, emit, token)
+            else:
+                job = (self.server.handle_job, message, audio, emit, token)
+
+            with self.jobs_lock:
+                future = engine.submit(*job)
+                self.jobs[job_id] = (token, future)
+            future.add_done_callback(lambda f, message=message: self._done(message, f))
+
+    def _stream_control(self, message: dict):
+        """Hand frames already written to a stream's ring to its decoder (never replied to)."""
+        target = message.get("target")
+        stream = self.streams.get(target) if isinstance(target, (int, str)) else None
+        if stream is None:
+            return
+        if message["op"] == "stream_end":
+            stream.end()
+        else:
+            # A malformed notice ends the stream; its reply carries the error
+            stream.push(message.get("seq"), message.get("lens", []))
+
+    def _done(self, message: dict, future: Future):
+        with self.jobs_lock:
+            self.jobs.pop(message.get("id"), None)
+        stream = self.streams.pop(message.get("id"), None)
+        if stream:
+            stream.close()
+        self.reply(message, self._result(future))
+
+    @staticmethod
+    def _result(future: Future) -> dict:
+        if future.cancelled():
+            return _cancelled("Cancelled")
+        try:
+            return future.result()
+        except Exception as e:
+            return _empty(f"Transcription failed: {str(e)}")
+
+    def reply(self, message: dict, result: dict):
+        result["id"] = message.get("id")
+        try:
+            with self.write_lock:
+                self.request.sendall(encode_frame(result))
+        except OSError:
+            # Client went away; nobody is waiting for this result
+            pass
+
+
+def _parse_lang_models(specs) -> dict:
+    paths = {}
+    for spec in specs or []:
+        lang, sep, model_path = spec.partition("=")
+        if not sep or not lang or not model_path:
+            raise ValueError(f"Invalid --lang-model (expected LANG=PATH): {spec}")
+        paths[lang] = model_path
+    return paths
+
+
+def serve(socket_path: str, model_paths: dict, min_workers: int = 1, max_workers: int = None,
+          chunk_bytes: int = None, cache: ResultCache = None, policy: TierPolicy = None,
+          segment_workers: int = None, max_streams: int = MAX_STREAMS):
+    """Load every model once, then answer transcription jobs until killed."""
+    found = {}
+    for lang, model_path in model_paths.items():
+        if not os.path.exists(model_path):
+            print(f"[Vosk] Model not found for {lang}: {model_path}", file=sys.stderr)
+            continue
+        found[lang] = model_path
+
+    if not found:
+        print(json.dumps(_empty("No Vosk model could be loaded")), flush=True)
+        sys.exit(1)
+
+    _import_vosk()
+    SetLogLevel(-1)
+    models = {lang: Model(model_path) for lang, model_path in found.items()}
+
+    engine = DecodeEngine(min_workers, max_workers)
+    stream_engine = DecodeEngine(1, max_streams)
+    model_ids = {lang: os.path.realpath(model_paths[lang]) for lang in models}
+    with VoskServer(socket_path, models, engine, chunk_bytes, cache, model_ids, policy,
+                    segment_workers=segment_workers, stream_engine=stream_engine) as server:
+        print(json.dumps({"event": "ready", "socket": socket_path, "langs": sorted(server.models)}), flush=True)
+        try:
+            server.serve_forever()
+        finally:
+            engine.shutdown()
+            stream_engine.shutdown()
+            try:
+                os.unlink(socket_path)
+            except OSError:
+                pass
+
+
+# ─── Preload Check ────────────────────────────────────────────────────────────
+
+def preload_check(model_paths: dict) -> dict:
+    """Import vosk and load each model once, timing the two separately (health checks).
+
+    "startup_ms" covers the script's own imports (NumPy, ...), "import_ms"
+    the vosk / Kaldi import, and each entry of "models" its "load_ms".
+    """
+    watch = Stopwatch()
+    report = {"ok": True, "startup_ms": round(IMPORT_MS, 2), "import_ms": None, "models": {}}
+    try:
+        _import_vosk(watch)
+    except ImportError as e:
+        return {**report, "ok": False, "error": f"Cannot import vosk: {e}"}
+    report["import_ms"] = round(watch.ms["import"], 2)
+    SetLogLevel(-1)
+
+    for name, model_path in model_paths.items():
+        entry = {"path": model_path}
+        if not os.path.exists(model_path):
+            entry["error"] = "Model not found"
+        else:
+            started = time.perf_counter()
+            try:
+                Model(model_path)
+                entry["load_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            except Exception as e:
+                entry["error"] = f"Model failed to load: {e}"
+        report["ok"] = report["ok"] and "error" not in entry
+        report["models"][name] = entry
+    return report
+
+
 def main():
     parser = argparse.ArgumentParser(description="Vosk speech-to-text transcription")
-    parser.add_argument("--model", required=True, help="Path to the Vosk model directory")
-    parser.add_argument("--file", help="Path to WAV audio file (PCM 16kHz 16-bit mono)")
-    parser.add_argument("--stdin", action="store_true", help="Read raw PCM audio from stdin")
+    parser.add_argument("--model", help="Path to the Vosk model directory")
+    parser.add_argument("--file", help="Path to WAV audio file (converted to PCM 16kHz 16-bit mono)")
+    parser.add_argument("--stdin", action="store_true",
+                        help="Read a WAV file or raw PCM 16kHz 16-bit mono audio from stdin")
+    parser.add_argument("--timings", action="store_true",
+                        help="Add per-stage timings, real-time factor and peak RSS to the output")
+    parser.add_argument("--no-vad", action="store_true",
+                        help="Decode the whole recording instead of trimming silence first")
+    parser.add_argument("--stream", action="store_true",
+                        help="Decode raw PCM from stdin incrementally, printing JSON-lines events")
+    parser.add_argument("--deadline", type=float, metavar="EPOCH_SECONDS",
+                        help="Stop decoding once this wall-clock time passes (result status: cancelled)")
+    parser.add_argument("--chunk-bytes", type=int,
+                        help="PCM bytes fed to the recognizer per call "
+                             f"(default: $VOSK_CHUNK_BYTES or {DEFAULT_CHUNK_BYTES}; tune with bench_vosk.py)")
+    parser.add_argument("--dual", action="store_true",
+                        help="Decode --file/--stdin with every --lang-model and pick the best language")
+    parser.add_argument("--early-margin", type=float,
+                        help="--dual: stop losing languages once the leader is ahead by this confidence")
+    parser.add_argument("--early-after", type=float, default=1.0,
+                        help="--dual: seconds of audio to decode before comparing languages (default: 1.0)")
+    parser.add_argument("--batch", metavar="SOURCE",
+                        help="Transcribe a manifest file, directory or glob of WAVs (JSON lines out)")
+    parser.add_argument("--output", help="--batch: append results to this JSONL file and resume from it")
+    parser.add_argument("--serve", action="store_true", help="Run as a persistent server on a Unix socket")
+    parser.add_argument("--socket", help="Unix socket path for --serve")
+    parser.add_argument("--lang-model", action="append", metavar="LANG=PATH",
+                        help="Model to load for --serve, --dual or --batch (repeatable); "
+                             "--serve also takes LANG:small=PATH for a faster small-model tier")
+    parser.add_argument("--small-model",
+                        help="Small model used instead of --model for short or urgent clips (see --route-short)")
+    parser.add_argument("--route-short", type=float, default=ROUTE_SHORT_SECONDS, metavar="SECONDS",
+                        help="Speech up to this long goes to the small model "
+                             f"(default: {ROUTE_SHORT_SECONDS})")
+    parser.add_argument("--escalate-below", type=float, default=ESCALATE_BELOW, metavar="CONFIDENCE",
+                        help="Redo small-model results below this confidence with the large model "
+                             f"(default: {ESCALATE_BELOW})")
+    parser.add_argument("--phrases", metavar="JSON",
+                        help='Only recognize these phrases, e.g. \'["oui", "non"]\' '
+                             '(decoded on --small-model when given)')
+    parser.add_argument("--cache-entries", type=int, default=256,
+                        help="--serve: results kept in the in-memory cache (0 disables caching)")
+    parser.add_argument("--cache-dir", help="--serve: also keep cached results as JSON files here")
+    parser.add_argument("--cache-max-mb", type=float, default=64,
+                        help="--serve: size limit of --cache-dir before oldest entries go (default: 64)")
+    parser.add_argument("--cache-ttl", type=float, default=3600,
+                        help="--serve: seconds a cached result stays valid (default: 3600)")
+    parser.add_argument("--workers", type=int,
+                        help="Decode threads: kept alive in --serve mode (default: 1), "
+                             "pool size for --batch (default: CPU count)")
+    parser.add_argument("--max-workers", type=int,
+                        help="Upper bound on decode threads under load (default: CPU count)")
+    parser.add_argument("--max-streams", type=int, default=MAX_STREAMS,
+                        help=f"--serve: live shared-memory streams decoded at once, on their own threads "
+                             f"(default: {MAX_STREAMS})")
+    parser.add_argument("--preload-check", action="store_true",
+                        help="Time the vosk import and loading --model / --small-model / --lang-model, then exit")
+    parser.add_argument("--segment-workers", type=int,
+                        help=f"Speech over {LONG_AUDIO_SECONDS:g}s is split at pauses and decoded on this many "
+                             "threads (default: CPU count; 1 decodes it in one piece)")
 
     args = parser.parse_args()
+    policy = TierPolicy(args.route_short, args.escalate_below)
+    phrases = None
+    if args.phrases:
+        try:
+            phrases = json.loads(args.phrases)
+        except json.JSONDecodeError as e:
+            parser.error(f"--phrases is not valid JSON: {e}")
+        if not isinstance(phrases, list):
+            parser.error("--phrases must be a JSON list of strings")
+
+    if args.preload_check:
+        try:
+            model_paths = _parse_lang_models(args.lang_model)
+        except ValueError as e:
+            parser.error(str(e))
+        for name, model_path in (("default", args.model), ("small", args.small_model)):
+            if model_path:
+                model_paths[name] = model_path
+        print(json.dumps(preload_check(model_paths), ensure_ascii=False))
+        return
+
+    if args.serve:
+        if not args.socket:
+            parser.error("--serve requires --socket")
+        try:
+            model_paths = _parse_lang_models(args.lang_model)
+        except ValueError as e:
+            parser.error(str(e))
+        cache = ResultCache(args.cache_entries, args.cache_ttl, args.cache_dir,
+                            int(args.cache_max_mb * 1024 * 1024)) if args.cache_entries > 0 else None
+        serve(args.socket, model_paths, args.workers or 1, args.max_workers, args.chunk_bytes, cache, policy,
+              args.segment_workers, args.max_streams)
+        return
+
+    if args.batch:
+        try:
+            model_paths = _parse_lang_models(args.lang_model)
+        except ValueError as e:
+            parser.error(str(e))
+        if args.model:
+            model_paths.setdefault("default", args.model)
+        if not model_paths:
+            parser.error("--batch requires --model or --lang-model")
+        transcribe_batch(args.batch, model_paths, args.output, args.workers,
+                         vad=not args.no_vad, chunk_bytes=args.chunk_bytes, timings=args.timings)
+        return
+
+    if args.stream:
+        if not args.model:
+            _emit({"event": "final", **_empty("Specify --model")})
+        else:
+            transcribe_stream(args.model, args.chunk_bytes, _cli_stopwatch() if args.timings else None,
+                              CancelToken(args.deadline))
+        return
+
+    watch = _cli_stopwatch() if args.timings else None
+    cancel = CancelToken(args.deadline)
 
-    if args.file:
-        result = transcribe_file(args.model, args.file)
+    if args.dual:
+        try:
+            model_paths = _parse_lang_models(args.lang_model)
+        except ValueError as e:
+            parser.error(str(e))
+        if args.file or args.stdin:
+            result = transcribe_dual(model_paths, args.file, args.early_margin, args.early_after,
+                                     vad=not args.no_vad, chunk_bytes=args.chunk_bytes, watch=watch,
+                                     cancel=cancel)
+        else:
+            result = _dual_error(model_paths, "Specify --file or --stdin")
+    elif not args.model:
+        result = _empty("Specify --model")
+    elif args.file:
+        result = transcribe_file(args.model, args.file, vad=not args.no_vad, chunk_bytes=args.chunk_bytes,
+                                 watch=watch, cancel=cancel, small_model_path=args.small_model, policy=policy,
+                                 phrases=phrases, segment_workers=args.segment_workers)
     elif args.stdin:
-        result = transcribe_stdin(args.model)
+        result = transcribe_stdin(args.model, vad=not args.no_vad, chunk_bytes=args.chunk_bytes,
+                                  watch=watch, cancel=cancel, small_model_path=args.small_model, policy=policy,
+                                  phrases=phrases, segment_workers=args.segment_workers)
     else:
-        result = {"text": "", "confidence": 0, "error": "Specify --file or --stdin"}
+        result = _empty("Specify --file or --stdin")
 
     # Output JSON to stdout
     print(json.dumps(result, ensure_ascii=False))
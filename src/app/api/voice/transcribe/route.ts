@@ -42,16 +42,23 @@ export async function POST(req: NextRequest) {
 
         const openai = new OpenAI({ apiKey });
 
-        // Call Whisper API
-        const transcription = await openai.audio.transcriptions.create({
-            file: createReadStream(tempFilePath),
-            model: 'whisper-1',
-            language: 'fr',
-        });
+        // Call Whisper API — aborted if the client disconnects, so nobody pays for an unread result
+        const transcription = await openai.audio.transcriptions.create(
+            {
+                file: createReadStream(tempFilePath),
+                model: 'whisper-1',
+                language: 'fr',
+            },
+            { signal: req.signal }
+        );
 
         return NextResponse.json({ text: transcription.text });
 
     } catch (error: unknown) {
+        if (req.signal.aborted) {
+            // Client went away; there is no one left to answer
+            return new NextResponse(null, { status: 499 });
+        }
         const message = error instanceof Error ? error.message : 'Internal Server Error';
         console.error('[Transcribe] Error:', message);
         return NextResponse.json({ error: message }, { status: 500 });
@@ -503,3 +503,19 @@ export function getNicheQuestions(
     if (!def) return [];
     return def.questions[mode][language];
 }
+
+/**
+ * Phrases a visitor may say to pick a niche: each label and its parts
+ * ("Beauté & Coiffure" → also "Beauté", "Coiffure").
+ */
+export function getNicheVocabulary(language: Language): string[] {
+    const phrases = new Set<string>();
+    for (const niche of NICHES) {
+        const label = niche.label[language];
+        phrases.add(label);
+        for (const part of label.split(/[&/]/)) {
+            if (part.trim()) phrases.add(part.trim());
+        }
+    }
+    return [...phrases];
+}
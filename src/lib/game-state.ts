@@ -1,4 +1,5 @@
 import type { SessionMode, Language, Niche, ConversationMessage, ReportJson } from '@/types/database';
+import { getNicheVocabulary } from '@/data/templates/niches';
 
 // ─── Game State Types ─────────────────────────────────────────────────────────
 
@@ -176,3 +177,31 @@ export function getPhaseLabel(phase: GamePhase, language: Language): string {
     };
     return labels[phase][language];
 }
+
+const MODE_VOCABULARY: Record<Language, string[]> = {
+    fr: ['démarrage', 'démarrage entreprise', 'startup', 'portfolio', 'portfolio par niche', 'audit', 'audit site existant'],
+    en: ['startup', 'start a business', 'portfolio', 'niche portfolio', 'audit', 'website audit'],
+};
+
+const CONFIRM_VOCABULARY: Record<Language, string[]> = {
+    fr: ['oui', 'non', "d'accord", 'ok', 'exactement', 'pas du tout'],
+    en: ['yes', 'no', 'okay', 'sure', 'exactly', 'not at all'],
+};
+
+/**
+ * Closed vocabulary expected at a step, for grammar-constrained speech
+ * recognition (`phrases` in `transcribe`). `confirm` covers yes/no prompts.
+ * Returns undefined for open-ended steps, which need full decoding.
+ */
+export function getPhaseVocabulary(phase: GamePhase | 'confirm', language: Language): string[] | undefined {
+    switch (phase) {
+        case 'mode_select':
+            return MODE_VOCABULARY[language];
+        case 'niche_select':
+            return getNicheVocabulary(language);
+        case 'confirm':
+            return CONFIRM_VOCABULARY[language];
+        default:
+            return undefined;
+    }
+}
@@ -0,0 +1,124 @@
+import { NextResponse } from 'next/server';
+
+// ─── Types ────────────────────────────────────────────────────────────────────
+
+interface JobQueueConfig {
+    /** Jobs allowed to run at the same time */
+    maxInFlight: number;
+    /** Jobs allowed to wait for a slot; beyond this, new jobs are rejected */
+    maxQueued: number;
+}
+
+export interface JobQueueStats {
+    inFlight: number;
+    queued: number;
+    maxInFlight: number;
+    maxQueued: number;
+    rejected: number;
+    /** Moving average of job duration, used for Retry-After */
+    avgJobMs: number;
+}
+
+interface Waiter {
+    start: () => void;
+}
+
+/**
+ * Thrown when the queue is full. Callers should answer 503 with
+ * `Retry-After: retryAfterSeconds` (see `overloadedResponse`).
+ */
+export class QueueFullError extends Error {
+    constructor(public readonly retryAfterSeconds: number) {
+        super('Server busy, please retry shortly.');
+        this.name = 'QueueFullError';
+    }
+}
+
+// ─── Bounded Job Queue ────────────────────────────────────────────────────────
+
+/**
+ * Admission control for expensive jobs: at most `maxInFlight` run at once,
+ * at most `maxQueued` wait (FIFO), and anything beyond that fails fast
+ * instead of piling up.
+ */
+export class JobQueue {
+    private inFlight = 0;
+    private waiting: Waiter[] = [];
+    private rejected = 0;
+    private avgJobMs = 2_000;
+
+    constructor(private readonly config: JobQueueConfig) {}
+
+    /**
+     * Run `job` once a slot is free. Throws QueueFullError if the queue is full.
+     * If `signal` aborts while the job is still waiting, it leaves the queue
+     * and the promise rejects with `signal.reason`.
+     */
+    async run<T>(job: () => Promise<T>, signal?: AbortSignal): Promise<T> {
+        signal?.throwIfAborted();
+
+        if (this.inFlight >= this.config.maxInFlight) {
+            if (this.waiting.length >= this.config.maxQueued) {
+                this.rejected++;
+                throw new QueueFullError(this.retryAfterSeconds());
+            }
+            // The finishing job hands its slot straight to us (inFlight unchanged)
+            await new Promise<void>((start, reject) => {
+                const waiter: Waiter = {
+                    start: () => {
+                        signal?.removeEventListener('abort', onAbort);
+                        start();
+                    },
+                };
+                const onAbort = () => {
+                    this.waiting.splice(this.waiting.indexOf(waiter), 1);
+                    reject(signal!.reason);
+                };
+                signal?.addEventListener('abort', onAbort, { once: true });
+                this.waiting.push(waiter);
+            });
+        } else {
+            this.inFlight++;
+        }
+
+        const startedAt = Date.now();
+        try {
+            return await job();
+        } finally {
+            this.avgJobMs = this.avgJobMs * 0.8 + (Date.now() - startedAt) * 0.2;
+            const next = this.waiting.shift();
+            if (next) next.start();
+            else this.inFlight--;
+        }
+    }
+
+    stats(): JobQueueStats {
+        return {
+            inFlight: this.inFlight,
+            queued: this.waiting.length,
+            maxInFlight: this.config.maxInFlight,
+            maxQueued: this.config.maxQueued,
+            rejected: this.rejected,
+            avgJobMs: Math.round(this.avgJobMs),
+        };
+    }
+
+    /** Rough time until a newly queued job would start. */
+    private retryAfterSeconds(): number {
+        const rounds = Math.ceil((this.waiting.length + 1) / this.config.maxInFlight);
+        return Math.max(1, Math.ceil((rounds * this.avgJobMs) / 1000));
+    }
+}
+
+/**
+ * Convenience: 503 NextResponse for a QueueFullError, with Retry-After.
+ */
+export function overloadedResponse(err: QueueFullError): NextResponse {
+    return NextResponse.json(
+        { error: err.message },
+        {
+            status: 503,
+            headers: { 'Retry-After': String(err.retryAfterSeconds) },
+        }
+    );
+}
@@ -0,0 +1,87 @@
+import fs from 'fs';
+import path from 'path';
+
+// ─── Layout ───────────────────────────────────────────────────────────────────
+
+// Must match SHM_HEADER_BYTES in scripts/vosk_transcribe.py: the first
+// uint64 (little-endian) is the number of frames the reader has consumed.
+const HEADER_BYTES = 64;
+const SHM_DIR = '/dev/shm';
+
+// Reader lagging behind: poll its consumed counter at this interval
+const FULL_POLL_MS = 2;
+
+let nextRing = 1;
+
+// ─── Shared-Memory Ring ───────────────────────────────────────────────────────
+
+/**
+ * Writer side of a POSIX shared-memory ring (`/dev/shm/<name>`), read by
+ * the Vosk worker through `multiprocessing.shared_memory`.
+ * Frame N goes in slot N % slots; the reader publishes how many frames it
+ * has consumed in the header, so the writer only checks it when the ring
+ * looks full.
+ */
+export class ShmRing {
+    readonly name = `vosk-${process.pid}-${nextRing++}`;
+    private fd: number | null;
+    private written = 0;
+    private consumed = 0;
+    private readonly counter = Buffer.alloc(8);
+
+    constructor(
+        readonly slots = 64,
+        readonly slotBytes = 16_384
+    ) {
+        this.fd = fs.openSync(path.join(SHM_DIR, this.name), 'w+', 0o600);
+        fs.ftruncateSync(this.fd, HEADER_BYTES + slots * slotBytes);
+    }
+
+    /** POSIX shared memory is only wired up on Linux. */
+    static available(): boolean {
+        return process.platform === 'linux' && fs.existsSync(SHM_DIR);
+    }
+
+    /** Sequence number the next frame will get. */
+    get nextSeq(): number {
+        return this.written;
+    }
+
+    /** True when every slot holds a frame the reader has not consumed yet. */
+    full(): boolean {
+        if (this.written - this.consumed < this.slots || this.fd === null) return false;
+        fs.readSync(this.fd, this.counter, 0, 8, 0);
+        this.consumed = Number(this.counter.readBigUInt64LE(0));
+        return this.written - this.consumed >= this.slots;
+    }
+
+    /** Wait until a slot is free; false if `isDone()` turns true first. */
+    async waitForSlot(isDone: () => boolean): Promise<boolean> {
+        while (this.full()) {
+            if (isDone()) return false;
+            await new Promise((resolve) => setTimeout(resolve, FULL_POLL_MS));
+        }
+        return this.fd !== null;
+    }
+
+    /** Copy one frame (at most `slotBytes`) into the next slot; returns its sequence number. */
+    write(frame: Buffer): number {
+        if (this.fd === null) throw new Error('Shared-memory ring is closed');
+        if (frame.length > this.slotBytes) throw new Error('Frame larger than a ring slot');
+        const seq = this.written++;
+        fs.writeSync(this.fd, frame, 0, frame.length, HEADER_BYTES + (seq % this.slots) * this.slotBytes);
+        return seq;
+    }
+
+    /** Close and unlink the segment (idempotent). The reader's mapping stays valid. */
+    close(): void {
+        if (this.fd === null) return;
+        fs.closeSync(this.fd);
+        this.fd = null;
+        try {
+            fs.unlinkSync(path.join(SHM_DIR, this.name));
+        } catch {
+            // already gone
+        }
+    }
+}
@@ -1,15 +1,65 @@
-import { spawn } from 'child_process';
+import { spawn, type ChildProcess } from 'child_process';
 import path from 'path';
 import fs from 'fs';
-import os from 'os';
+import readline from 'readline';
+import type { Readable } from 'stream';
 import type { Language } from '@/types/database';
+import type { LangGuess } from './language-detector';
+import { VoskWorker, cancelledResult, type VoskLiveStream } from './vosk-worker';
+import { ShmRing } from './shm-ring';
+import { JobQueue, type JobQueueStats } from './job-queue';
 
 // ─── Types ────────────────────────────────────────────────────────────────────
 
+export interface VadInfo {
+    audioSeconds: number;
+    speechSeconds: number;
+    trimmedSeconds?: number;
+    /** Input hit full scale — ask the speaker to step back from the mic */
+    clipped: boolean;
+    /** Input barely above the noise floor — mic muted or too far away */
+    nearSilent: boolean;
+}
+
+export interface VoskTimings {
+    /** Spawn-to-exit wall time of a one-shot subprocess (includes Python startup) */
+    processMs?: number;
+    importMs?: number;
+    modelLoadMs?: number;
+    readMs?: number;
+    vadMs?: number;
+    decodeMs?: number;
+    finalizeMs?: number;
+    audioSeconds: number;
+    /** Real-time factor: decode + finalize time over audio duration */
+    rtf: number | null;
+    peakRssMb: number | null;
+}
+
 export interface VoskTranscription {
     text: string;
     confidence: number;
     error?: string;
+    /** Speech detection stats (absent when VAD is disabled) */
+    vad?: VadInfo;
+    /** Per-stage timings (only when VOSK_TIMINGS is on) */
+    timings?: VoskTimings;
+    /** Set when the job was cancelled or ran past its deadline */
+    status?: 'cancelled';
+    /** Model tier that produced the text, when a small model is installed */
+    model?: 'small' | 'large';
+    /** The small model was not confident enough; the large model redid it */
+    escalated?: boolean;
+    /** The deadline or load kept the large model from this clip; the result is not cached */
+    degraded?: boolean;
+    /**
+     * Decoded against `options.phrases`; empty text means none of them was heard.
+     * Absent when no installed model has a runtime graph (static-graph models such as
+     * vosk-model-fr-0.22 ignore grammars), in which case the phrases were not applied.
+     */
+    grammar?: boolean;
+    /** Long recording split at pauses into this many segments, decoded in parallel */
+    segments?: number;
 }
 
 export interface DualLangTranscription {
@@ -18,6 +68,42 @@ export interface DualLangTranscription {
     bestLang: Language;
     bestText: string;
     bestConfidence: number;
+    /** Language picked before the full decode finished, if any */
+    earlyLang?: Language;
+}
+
+export interface TranscribeOptions {
+    /** Abort the job — pass `req.signal` so a client disconnect stops the decode */
+    signal?: AbortSignal;
+    /**
+     * Absolute deadline in epoch ms, queue wait included (default: now +
+     * VOSK_DEADLINE_MS, plus VOSK_DEADLINE_PER_AUDIO_SECOND_MS per second of audio)
+     */
+    deadline?: number;
+    /**
+     * Closed vocabulary expected at this step (e.g. `getPhaseVocabulary`):
+     * recognition is restricted to these phrases, on the small model (or the
+     * large one) when it has a runtime graph; otherwise decoding stays
+     * open-vocabulary and the result has no `grammar` flag.
+     * Ignored by `transcribeDualLang` and by streams without the worker.
+     */
+    phrases?: string[];
+}
+
+export interface DualLangOptions extends TranscribeOptions {
+    /** Called as soon as one language is clearly ahead, before decoding completes */
+    onEarlyGuess?: (guess: LangGuess) => void;
+}
+
+export interface VoskPreloadReport {
+    ok: boolean;
+    error?: string;
+    /** Script imports before vosk (NumPy, ...) */
+    startupMs?: number;
+    /** Importing vosk and the native Kaldi library */
+    importMs?: number | null;
+    /** Per model key (`fr`, `fr:small`, ...): load time, or why it failed */
+    models: Record<string, { path: string; loadMs?: number; error?: string }>;
 }
 
 // ─── Config ───────────────────────────────────────────────────────────────────
@@ -27,18 +113,204 @@ const MODEL_PATHS: Record<Language, string> = {
     en: process.env.VOSK_MODEL_EN_PATH || path.join(process.cwd(), 'models', 'vosk-model-en-us-0.22'),
 };
 
+// Optional small models: short or urgent utterances decode several times faster on them,
+// and low-confidence results are escalated to the large model above
+const SMALL_MODEL_PATHS: Record<Language, string> = {
+    fr: process.env.VOSK_MODEL_FR_SMALL_PATH || path.join(process.cwd(), 'models', 'vosk-model-small-fr-0.22'),
+    en: process.env.VOSK_MODEL_EN_SMALL_PATH || path.join(process.cwd(), 'models', 'vosk-model-small-en-us-0.15'),
+};
+
+// Routing policy overrides (script defaults: 3s of speech, 0.6 confidence)
+const ROUTE_ARGS = [
+    ...(process.env.VOSK_ROUTE_SHORT_SECONDS ? ['--route-short', process.env.VOSK_ROUTE_SHORT_SECONDS] : []),
+    ...(process.env.VOSK_ESCALATE_BELOW ? ['--escalate-below', process.env.VOSK_ESCALATE_BELOW] : []),
+];
+
 const PYTHON_BIN = process.env.PYTHON_BIN || 'python';
 const SCRIPT_PATH = path.join(process.cwd(), 'scripts', 'vosk_transcribe.py');
 
+// Keep models warm in a persistent worker (Unix sockets: not on Windows)
+const USE_WORKER = process.env.VOSK_WORKER !== 'off' && process.platform !== 'win32';
+
+// Decode threads in the worker — all threads share one model per language
+const WORKER_THREADS = parseInt(process.env.VOSK_WORKER_THREADS || '1', 10);
+const WORKER_MAX_THREADS = parseInt(process.env.VOSK_WORKER_MAX_THREADS || '0', 10) || undefined;
+
+// Dual-language: stop the losing recognizer once the leader is this far ahead
+// in partial word confidence, after EARLY_AFTER seconds of audio (0 = disabled)
+const EARLY_MARGIN = parseFloat(process.env.VOSK_EARLY_MARGIN || '0.2');
+const EARLY_AFTER = parseFloat(process.env.VOSK_EARLY_AFTER || '1.0');
+
+// Ask the transcriber for per-stage timings, RTF and peak RSS
+const TIMINGS = process.env.VOSK_TIMINGS === 'on';
+
+// Admission control: concurrent decodes, and how many may wait behind them
+const MAX_IN_FLIGHT = parseInt(process.env.VOSK_MAX_IN_FLIGHT || '2', 10);
+const MAX_QUEUED = parseInt(process.env.VOSK_MAX_QUEUE || '8', 10);
+
+// Time budget per transcription; past it the decode is cancelled, not finished.
+// Recordings get extra time per second of audio so long answers are not cut off.
+const DEADLINE_MS = parseInt(process.env.VOSK_DEADLINE_MS || '30000', 10);
+const DEADLINE_PER_AUDIO_SECOND_MS = parseInt(process.env.VOSK_DEADLINE_PER_AUDIO_SECOND_MS || '500', 10);
+// Live streams run as long as the speaker talks, but not forever (matches the worker's own default)
+const STREAM_DEADLINE_MS = parseInt(process.env.VOSK_STREAM_DEADLINE_MS || '300000', 10);
+
+// Long recordings are split at pauses and decoded on this many threads (script default: CPU count)
+const SEGMENT_ARGS = process.env.VOSK_SEGMENT_WORKERS ? ['--segment-workers', process.env.VOSK_SEGMENT_WORKERS] : [];
+
+// Cancelled subprocesses (one-shot and --stream) get SIGKILL if they ignore SIGTERM this long
+const KILL_GRACE_MS = 2_000;
+
+// ─── Admission Control ────────────────────────────────────────────────────────
+
+const globalForQueue = globalThis as unknown as { voskQueue?: JobQueue };
+
+/**
+ * Every transcription goes through this queue. When it is full the
+ * transcribe functions throw QueueFullError — answer with
+ * `overloadedResponse(err)` (503 + Retry-After). No route calls this
+ * service yet (/api/voice/transcribe uses Whisper), so that 503 path is
+ * for the route that adopts it:
+ *
+ *     try { return NextResponse.json(await transcribe(wav, 'fr', { signal: req.signal })); }
+ *     catch (err) { if (err instanceof QueueFullError) return overloadedResponse(err); throw err; }
+ */
+const voskQueue = (globalForQueue.voskQueue ??= new JobQueue({
+    maxInFlight: MAX_IN_FLIGHT,
+    maxQueued: MAX_QUEUED,
+}));
+
+/** Current queue depth, for health checks and logs. */
+export function getVoskQueueStats(): JobQueueStats {
+    return voskQueue.stats();
+}
+
+interface JobControl {
+    /** Aborts on the caller's signal or at the deadline, whichever comes first */
+    signal: AbortSignal;
+    deadline?: number;
+}
+
+function jobControl(options: TranscribeOptions, defaultMs: number = DEADLINE_MS): JobControl {
+    const deadline = options.deadline ?? Date.now() + defaultMs;
+    const signals: AbortSignal[] = options.signal ? [options.signal] : [];
+    signals.push(AbortSignal.timeout(Math.max(0, deadline - Date.now())));
+    return { signal: AbortSignal.any(signals), deadline };
+}
+
+/** Default time budget for a WAV buffer: the base budget plus an allowance per second of audio. */
+function audioBudgetMs(wav: Buffer): number {
+    // Canonical 44-byte header; byte rate at offset 28 (raw PCM: 16kHz 16-bit mono)
+    const isWav = wav.length >= 44 && wav.toString('ascii', 0, 4) === 'RIFF';
+    const byteRate = isWav ? wav.readUInt32LE(28) : 32_000;
+    const seconds = byteRate > 0 ? Math.max(0, wav.length - (isWav ? 44 : 0)) / byteRate : 0;
+    return DEADLINE_MS + Math.round(seconds * DEADLINE_PER_AUDIO_SECOND_MS);
+}
+
+/** Script arguments passing the deadline on, so Python stops decoding by itself too. */
+function deadlineArgs(control: JobControl): string[] {
+    return control.deadline === undefined ? [] : ['--deadline', String(toEpochSeconds(control))];
+}
+
+function toEpochSeconds(control: JobControl): number | undefined {
+    return control.deadline === undefined ? undefined : control.deadline / 1000;
+}
+
+/**
+ * Run `job` through the queue. A job cancelled while still waiting never
+ * starts and resolves with `onCancel()`; QueueFullError propagates.
+ */
+async function admit<T>(control: JobControl, job: () => Promise<T>, onCancel: () => T): Promise<T> {
+    try {
+        return await voskQueue.run(job, control.signal);
+    } catch (err) {
+        if (control.signal.aborted && err === control.signal.reason) return onCancel();
+        throw err;
+    }
+}
+
+// ─── Persistent Worker ────────────────────────────────────────────────────────
+
+const globalForVosk = globalThis as unknown as { voskWorker?: VoskWorker };
+
+/**
+ * Shared worker instance — survives Next.js hot reloads in development
+ * so models are not loaded twice.
+ */
+function getWorker(): VoskWorker {
+    if (!globalForVosk.voskWorker) {
+        const modelPaths = Object.fromEntries([
+            ...Object.entries(MODEL_PATHS),
+            ...Object.entries(SMALL_MODEL_PATHS).map(([lang, modelPath]) => [`${lang}:small`, modelPath]),
+        ].filter(([, modelPath]) => fs.existsSync(modelPath)));
+        const worker = new VoskWorker({
+            pythonBin: PYTHON_BIN,
+            scriptPath: SCRIPT_PATH,
+            modelPaths,
+            workers: WORKER_THREADS,
+            maxWorkers: WORKER_MAX_THREADS,
+            cacheDir: process.env.VOSK_CACHE_DIR || undefined,
+            extraArgs: [...ROUTE_ARGS, ...SEGMENT_ARGS],
+        });
+        process.once('exit', () => worker.stop());
+        globalForVosk.voskWorker = worker;
+    }
+    return globalForVosk.voskWorker;
+}
+
+/** Map a raw worker/script result onto a VoskTranscription. */
+function toTranscription(result: Record<string, unknown>): VoskTranscription {
+    const vad = result.vad as Record<string, number | boolean> | undefined;
+    const timings = result.timings as Record<string, number | null> | undefined;
+    return {
+        text: (result.text as string) || '',
+        confidence: (result.confidence as number) || 0,
+        error: result.error as string | undefined,
+        ...(result.status === 'cancelled' && { status: 'cancelled' as const }),
+        ...(result.model !== undefined && { model: result.model as 'small' | 'large' }),
+        ...(result.escalated === true && { escalated: true }),
+        ...(result.degraded === true && { degraded: true }),
+        ...(result.grammar === true && { grammar: true }),
+        ...(typeof result.segments === 'number' && { segments: result.segments }),
+        ...(vad && {
+            vad: {
+                audioSeconds: vad.audio_seconds as number,
+                speechSeconds: vad.speech_seconds as number,
+                trimmedSeconds: vad.trimmed_seconds as number | undefined,
+                clipped: Boolean(vad.clipped),
+                nearSilent: Boolean(vad.near_silent),
+            },
+        }),
+        ...(timings && {
+            timings: {
+                processMs: timings.process_ms ?? undefined,
+                importMs: timings.import_ms ?? undefined,
+                modelLoadMs: timings.model_load_ms ?? undefined,
+                readMs: timings.read_ms ?? undefined,
+                vadMs: timings.vad_ms ?? undefined,
+                decodeMs: timings.decode_ms ?? undefined,
+                finalizeMs: timings.finalize_ms ?? undefined,
+                audioSeconds: timings.audio_seconds ?? 0,
+                rtf: timings.rtf ?? null,
+                peakRssMb: timings.peak_rss_mb ?? null,
+            },
+        }),
+    };
+}
+
 // ─── Transcription ────────────────────────────────────────────────────────────
 
 /**
  * Transcribe a WAV audio buffer using Vosk (via Python subprocess).
- * The audio must be PCM 16kHz 16-bit mono WAV.
+ * Any PCM/float WAV is accepted; it is converted to 16kHz 16-bit mono in-process.
+ * Throws QueueFullError when too many transcriptions are already pending;
+ * resolves with `status: "cancelled"` once `options.signal` aborts or the
+ * deadline passes.
  */
 export async function transcribe(
     audioBuffer: Buffer,
-    lang: Language
+    lang: Language,
+    options: TranscribeOptions = {}
 ): Promise<VoskTranscription> {
     const modelPath = MODEL_PATHS[lang];
 
@@ -50,34 +322,80 @@ export async function transcribe(
         };
     }
 
-    // Write audio to a temp file
-    const tmpFile = path.join(os.tmpdir(), `vosk_${Date.now()}_${lang}.wav`);
-    fs.writeFileSync(tmpFile, audioBuffer);
+    const control = jobControl(options, audioBudgetMs(audioBuffer));
+    return admit(
+        control,
+        () => transcribeNow(audioBuffer, lang, modelPath, control, options.phrases),
+        () => toTranscription(cancelledResult(control.signal))
+    );
+}
 
-    try {
-        const result = await runPythonScript(modelPath, tmpFile);
-        return result;
-    } finally {
-        // Cleanup temp file
+async function transcribeNow(
+    audioBuffer: Buffer,
+    lang: Language,
+    modelPath: string,
+    control: JobControl,
+    phrases?: string[]
+): Promise<VoskTranscription> {
+    if (USE_WORKER) {
         try {
-            fs.unlinkSync(tmpFile);
-        } catch {
-            // ignore cleanup errors
+            const message = { op: 'transcribe', lang, timings: TIMINGS, deadline: toEpochSeconds(control), phrases };
+            return toTranscription(
+                await getWorker().request(message, audioBuffer, undefined, control.signal)
+            );
+        } catch (err) {
+            // Worker unavailable — fall back to a one-shot process
+            console.error('[Vosk] Worker failed, falling back to subprocess:', err);
         }
     }
+
+    // The WAV goes straight down the child's stdin — no temp file to write and re-read
+    const smallModel = SMALL_MODEL_PATHS[lang];
+    const args = [
+        '--model', modelPath, '--stdin',
+        ...(fs.existsSync(smallModel) ? ['--small-model', smallModel, ...ROUTE_ARGS] : []),
+        ...(phrases?.length ? ['--phrases', JSON.stringify(phrases)] : []),
+        ...SEGMENT_ARGS,
+        ...deadlineArgs(control),
+    ];
+    return toTranscription(await runPythonScript(args, control.signal, audioBuffer));
 }
 
 /**
  * Transcribe with both FR and EN models to determine the best language match.
  * Useful for auto-detection: the model with higher confidence wins.
+ * The audio is sent once and both recognizers decode it in a single process;
+ * the losing one is abandoned early when the leader is clearly ahead.
+ * Throws QueueFullError when too many transcriptions are already pending;
+ * cancellation and deadlines work as for `transcribe`.
  */
 export async function transcribeDualLang(
-    audioBuffer: Buffer
+    audioBuffer: Buffer,
+    options: DualLangOptions = {}
 ): Promise<DualLangTranscription> {
-    const [frResult, enResult] = await Promise.all([
-        transcribe(audioBuffer, 'fr'),
-        transcribe(audioBuffer, 'en'),
-    ]);
+    const langs = (['fr', 'en'] as Language[]).filter((lang) => fs.existsSync(MODEL_PATHS[lang]));
+    const control = jobControl(options, audioBudgetMs(audioBuffer));
+    const { results, earlyLang } = langs.length === 0
+        ? { results: {}, earlyLang: undefined }
+        : await admit(
+            control,
+            () => decodeDual(audioBuffer, langs, options, control),
+            () => ({
+                results: Object.fromEntries(
+                    langs.map((lang) => [lang, toTranscription(cancelledResult(control.signal))])
+                ),
+                earlyLang: undefined,
+            })
+        );
+
+    const pick = (lang: Language): VoskTranscription =>
+        results[lang] || {
+            text: '',
+            confidence: 0,
+            error: `Vosk model not found at: ${MODEL_PATHS[lang]}. Download it first.`,
+        };
+    const frResult = pick('fr');
+    const enResult = pick('en');
 
     const bestLang: Language = frResult.confidence >= enResult.confidence ? 'fr' : 'en';
     const best = bestLang === 'fr' ? frResult : enResult;
@@ -88,21 +406,269 @@ export async function transcribeDualLang(
         bestLang,
         bestText: best.text,
         bestConfidence: best.confidence,
+        earlyLang,
     };
 }
 
-// ─── Python Subprocess ────────────────────────────────────────────────────────
+async function decodeDual(
+    audioBuffer: Buffer,
+    langs: Language[],
+    options: DualLangOptions,
+    control: JobControl
+): Promise<{ results: Partial<Record<Language, VoskTranscription>>; earlyLang?: Language }> {
+    const early = EARLY_MARGIN > 0 ? { early_margin: EARLY_MARGIN, early_after: EARLY_AFTER } : {};
+    let result: Record<string, unknown> | null = null;
 
-function runPythonScript(
+    if (USE_WORKER) {
+        try {
+            const message = { op: 'dual', langs, timings: TIMINGS, deadline: toEpochSeconds(control), ...early };
+            result = await getWorker().request(message, audioBuffer, (event) => {
+                if (event.event === 'language') {
+                    options.onEarlyGuess?.({
+                        lang: event.lang as Language,
+                        confidence: (event.confidence as number) || 0,
+                    });
+                }
+            }, control.signal);
+        } catch (err) {
+            console.error('[Vosk] Worker failed, falling back to subprocess:', err);
+        }
+    }
+
+    if (!result) {
+        const args = ['--dual', '--stdin', ...deadlineArgs(control)];
+        for (const lang of langs) args.push('--lang-model', `${lang}=${MODEL_PATHS[lang]}`);
+        if (EARLY_MARGIN > 0) {
+            args.push('--early-margin', String(EARLY_MARGIN), '--early-after', String(EARLY_AFTER));
+        }
+        result = await runPythonScript(args, control.signal, audioBuffer);
+    }
+
+    const perLang = (result.results || {}) as Record<string, Record<string, unknown>>;
+    const fallback = { error: result.error, status: result.status };
+    return {
+        results: Object.fromEntries(
+            langs.map((lang) => [lang, toTranscription(perLang[lang] || fallback)])
+        ),
+        earlyLang: result.early_lang as Language | undefined,
+    };
+}
+
+/**
+ * Transcribe raw PCM (16kHz 16-bit mono) while it is still arriving.
+ * `onPartial` receives the running hypothesis so the UI can react before
+ * the upload completes; the promise resolves with the final result.
+ * With the persistent worker on Linux, audio reaches the decoder through a
+ * shared-memory ring rather than a pipe per stream.
+ * The stream holds a queue slot until it ends; rejects with QueueFullError
+ * when too many transcriptions are already pending. Streams are cut off
+ * after STREAM_DEADLINE_MS (5 min) unless `options.deadline` is given, and
+ * the worker ends one that receives no audio for 15 s; aborting
+ * `options.signal` stops the decode.
+ */
+export function transcribeStream(
+    audio: Readable,
+    lang: Language,
+    onPartial?: (text: string) => void,
+    options: TranscribeOptions = {}
+): Promise<VoskTranscription> {
+    const modelPath = MODEL_PATHS[lang];
+
+    if (!fs.existsSync(modelPath)) {
+        return Promise.resolve({
+            text: '',
+            confidence: 0,
+            error: `Vosk model not found at: ${modelPath}. Download it first.`,
+        });
+    }
+
+    const control = jobControl(options, STREAM_DEADLINE_MS);
+    return admit(
+        control,
+        () => USE_WORKER && ShmRing.available()
+            ? streamViaWorker(audio, lang, modelPath, control, onPartial, options.phrases)
+            : streamNow(audio, modelPath, control, onPartial),
+        () => toTranscription(cancelledResult(control.signal))
+    );
+}
+
+/** Turn partial/result events into the running hypothesis passed to `onPartial`. */
+function partialRelay(onPartial?: (text: string) => void): (event: Record<string, unknown>) => void {
+    let committed = '';
+    return (event) => {
+        if (event.event === 'partial') {
+            onPartial?.([committed, event.text as string].filter(Boolean).join(' '));
+        } else if (event.event === 'result') {
+            committed = [committed, event.text as string].filter(Boolean).join(' ');
+            onPartial?.(committed);
+        }
+    };
+}
+
+async function streamViaWorker(
+    audio: Readable,
+    lang: Language,
     modelPath: string,
-    audioPath: string
+    control: JobControl,
+    onPartial?: (text: string) => void,
+    phrases?: string[]
 ): Promise<VoskTranscription> {
-    return new Promise((resolve, reject) => {
-        const proc = spawn(PYTHON_BIN, [
-            SCRIPT_PATH,
-            '--model', modelPath,
-            '--file', audioPath,
-        ]);
+    let live: VoskLiveStream;
+    try {
+        const message = { lang, timings: TIMINGS, deadline: toEpochSeconds(control), phrases };
+        live = await getWorker().openStream(message, partialRelay(onPartial), control.signal);
+    } catch (err) {
+        console.error('[Vosk] Worker failed, falling back to subprocess:', err);
+        return streamNow(audio, modelPath, control, onPartial);
+    }
+
+    try {
+        for await (const chunk of audio) {
+            if (control.signal.aborted) break;
+            await live.write(chunk as Buffer);
+        }
+    } catch {
+        // Upload broke off: finish with the audio received so far
+    }
+
+    try {
+        return toTranscription(await live.end());
+    } catch (err) {
+        return { text: '', confidence: 0, error: `Vosk worker failed: ${(err as Error).message}` };
+    }
+}
+
+function streamNow(
+    audio: Readable,
+    modelPath: string,
+    control: JobControl,
+    onPartial?: (text: string) => void
+): Promise<VoskTranscription> {
+    return new Promise((resolve) => {
+        const args = [SCRIPT_PATH, '--model', modelPath, '--stream', ...deadlineArgs(control)];
+        const proc = spawn(PYTHON_BIN, args);
+        const relay = partialRelay(onPartial);
+        let final: VoskTranscription | null = null;
+        let stderr = '';
+
+        proc.stderr.on('data', (data: Buffer) => {
+            stderr = (stderr + data.toString()).slice(-2000);
+        });
+
+        readline.createInterface({ input: proc.stdout }).on('line', (line) => {
+            let event: Record<string, unknown>;
+            try {
+                event = JSON.parse(line);
+            } catch {
+                return;
+            }
+
+            if (event.event === 'final') {
+                final = toTranscription(event);
+            } else {
+                relay(event);
+            }
+        });
+
+        const clearKill = killOnAbort(proc, control.signal, () => audio.unpipe(proc.stdin));
+
+        proc.on('close', (code) => {
+            clearKill();
+            if (!final && control.signal.aborted) {
+                resolve(toTranscription(cancelledResult(control.signal)));
+                return;
+            }
+            resolve(final || {
+                text: '',
+                confidence: 0,
+                error: `Vosk process exited with code ${code}: ${stderr.slice(0, 500)}`,
+            });
+        });
+
+        proc.on('error', (err) => {
+            clearKill();
+            resolve({ text: '', confidence: 0, error: `Failed to spawn Python: ${err.message}` });
+        });
+
+        // Python exiting early closes stdin; don't let the pipe throw EPIPE
+        proc.stdin.on('error', () => {});
+        audio.on('error', () => proc.stdin.end());
+        audio.pipe(proc.stdin);
+    });
+}
+
+// ─── Health Check ─────────────────────────────────────────────────────────────
+
+/**
+ * Check that Python can import vosk, timing the import on its own.
+ * With `loadModels`, every installed model (small tiers included) is also
+ * loaded once and timed — slow, and it briefly needs their memory again.
+ */
+export async function checkVosk(loadModels = false, timeoutMs = 120_000): Promise<VoskPreloadReport> {
+    const args = ['--preload-check'];
+    if (loadModels) {
+        for (const [lang, modelPath] of Object.entries(MODEL_PATHS)) args.push('--lang-model', `${lang}=${modelPath}`);
+        for (const [lang, modelPath] of Object.entries(SMALL_MODEL_PATHS)) {
+            if (fs.existsSync(modelPath)) args.push('--lang-model', `${lang}:small=${modelPath}`);
+        }
+    }
+
+    const report = await runPythonScript(args, AbortSignal.timeout(timeoutMs));
+    const models = (report.models || {}) as Record<string, { path: string; load_ms?: number; error?: string }>;
+    return {
+        ok: report.ok === true,
+        error: report.error as string | undefined,
+        startupMs: report.startup_ms as number | undefined,
+        importMs: report.import_ms as number | null | undefined,
+        models: Object.fromEntries(
+            Object.entries(models).map(([key, model]) => [
+                key,
+                { path: model.path, loadMs: model.load_ms, error: model.error },
+            ])
+        ),
+    };
+}
+
+// ─── Python Subprocess ────────────────────────────────────────────────────────
+
+/**
+ * Kill `proc` when `signal` aborts: SIGTERM first (after `beforeKill`),
+ * then SIGKILL if it is still running KILL_GRACE_MS later — a decoder
+ * stuck in native code ignores SIGTERM. Returns the cleanup to call once
+ * the process has exited (or failed to spawn).
+ */
+function killOnAbort(proc: ChildProcess, signal: AbortSignal, beforeKill?: () => void): () => void {
+    let killTimer: NodeJS.Timeout | undefined;
+    const onAbort = () => {
+        beforeKill?.();
+        proc.kill('SIGTERM');
+        killTimer = setTimeout(() => proc.kill('SIGKILL'), KILL_GRACE_MS);
+    };
+    signal.addEventListener('abort', onAbort, { once: true });
+    return () => {
+        signal.removeEventListener('abort', onAbort);
+        clearTimeout(killTimer);
+    };
+}
+
+/**
+ * Run the script once, writing `input` (if any) to its stdin, and resolve
+ * with its JSON output. When `signal` aborts (deadline or caller), the
+ * process is killed; the promise only resolves after it has exited, so a
+ * queue slot is never released while a cancelled Python process is still
+ * holding CPU and memory.
+ */
+function runPythonScript(
+    args: string[],
+    signal: AbortSignal,
+    input?: Buffer
+): Promise<Record<string, unknown>> {
+    if (signal.aborted) return Promise.resolve(cancelledResult(signal));
+
+    return new Promise((resolve) => {
+        const startedAt = performance.now();
+        const proc = spawn(PYTHON_BIN, [SCRIPT_PATH, ...args, ...(TIMINGS ? ['--timings'] : [])]);
+        const clearTimers = killOnAbort(proc, signal);
 
         let stdout = '';
         let stderr = '';
@@ -116,48 +682,37 @@ function runPythonScript(
         });
 
         proc.on('close', (code) => {
+            clearTimers();
+            if (signal.aborted) {
+                resolve(cancelledResult(signal));
+                return;
+            }
             if (code !== 0) {
                 console.error('[Vosk] Python script error:', stderr);
-                resolve({
-                    text: '',
-                    confidence: 0,
-                    error: `Vosk process exited with code ${code}: ${stderr.slice(0, 500)}`,
-                });
+                resolve({ error: `Vosk process exited with code ${code}: ${stderr.slice(0, 500)}` });
                 return;
             }
 
             try {
                 const result = JSON.parse(stdout.trim());
-                resolve({
-                    text: result.text || '',
-                    confidence: result.confidence || 0,
-                    error: result.error,
-                });
-            } catch (parseErr) {
-                resolve({
-                    text: '',
-                    confidence: 0,
-                    error: `Failed to parse Vosk output: ${stdout.slice(0, 200)}`,
-                });
+                if (result.timings) {
+                    // Whatever the script did not account for is interpreter startup and IPC
+                    result.timings.process_ms = Math.round((performance.now() - startedAt) * 100) / 100;
+                }
+                resolve(result);
+            } catch {
+                resolve({ error: `Failed to parse Vosk output: ${stdout.slice(0, 200)}` });
             }
         });
 
         proc.on('error', (err) => {
-            resolve({
-                text: '',
-                confidence: 0,
-                error: `Failed to spawn Python: ${err.message}`,
-            });
+            // Spawn failed: there is no process to wait for
+            clearTimers();
+            resolve({ error: `Failed to spawn Python: ${err.message}` });
         });
 
-        // Timeout after 30 seconds
-        setTimeout(() => {
-            proc.kill('SIGTERM');
-            resolve({
-                text: '',
-                confidence: 0,
-                error: 'Vosk transcription timed out (30s)',
-            });
-        }, 30_000);
+        // A killed or failed child closes stdin early; the exit code reports that, not EPIPE
+        proc.stdin.on('error', () => {});
+        proc.stdin.end(input);
     });
 }
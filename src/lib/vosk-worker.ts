@@ -0,0 +1,391 @@
+import { spawn, type ChildProcess } from 'child_process';
+import net from 'net';
+import os from 'os';
+import path from 'path';
+import readline from 'readline';
+import { ShmRing } from './shm-ring';
+
+// ─── Types ────────────────────────────────────────────────────────────────────
+
+export interface VoskWorkerOptions {
+    pythonBin: string;
+    scriptPath: string;
+    /** Language (or `lang:small` for a small-model tier) → model directory, loaded once at startup */
+    modelPaths: Record<string, string>;
+    /** Decode threads kept alive in the worker (default: 1) */
+    workers?: number;
+    /** Upper bound on decode threads under load (default: worker CPU count) */
+    maxWorkers?: number;
+    /** Persist cached results here as well as in memory (default: memory only) */
+    cacheDir?: string;
+    /** Further `vosk_transcribe.py` flags, e.g. model routing overrides */
+    extraArgs?: string[];
+    /** Max time to wait for the worker to load its models (default: 120s) */
+    startupTimeoutMs?: number;
+}
+
+export type WorkerMessage = Record<string, unknown>;
+
+interface PendingJob {
+    resolve: (msg: WorkerMessage) => void;
+    reject: (err: Error) => void;
+    onEvent?: (event: WorkerMessage) => void;
+}
+
+// ─── Framing ──────────────────────────────────────────────────────────────────
+
+// Every frame is a 4-byte big-endian length followed by a UTF-8 JSON body.
+// A request with `audio_len` is followed by that many raw audio bytes.
+const HEADER_BYTES = 4;
+
+function encodeFrame(message: WorkerMessage, audio?: Buffer): Buffer {
+    const body = Buffer.from(JSON.stringify(message), 'utf8');
+    const header = Buffer.alloc(HEADER_BYTES);
+    header.writeUInt32BE(body.length, 0);
+    return audio ? Buffer.concat([header, body, audio]) : Buffer.concat([header, body]);
+}
+
+/** Result reported for a job whose signal aborted (deadline passed or caller gave up). */
+export function cancelledResult(signal: AbortSignal): WorkerMessage {
+    const timedOut = signal.reason instanceof Error && signal.reason.name === 'TimeoutError';
+    return {
+        text: '',
+        confidence: 0,
+        error: timedOut ? 'Deadline exceeded' : 'Cancelled',
+        status: 'cancelled',
+    };
+}
+
+// ─── Persistent Worker ────────────────────────────────────────────────────────
+
+/**
+ * A long-lived `vosk_transcribe.py --serve` process.
+ * Models are loaded once at startup; jobs are multiplexed over a single
+ * Unix socket connection, decoded concurrently on the worker's thread pool
+ * and matched back to callers by id.
+ */
+export class VoskWorker {
+    private proc: ChildProcess | null = null;
+    private socket: net.Socket | null = null;
+    private ready: Promise<void> | null = null;
+    private pending = new Map<number, PendingJob>();
+    private nextId = 1;
+    private buffer = Buffer.alloc(0);
+    private readonly socketPath = path.join(os.tmpdir(), `vosk-${process.pid}.sock`);
+
+    constructor(private readonly opts: VoskWorkerOptions) {}
+
+    /**
+     * Send a job to the worker, starting it on first use.
+     * Interim frames for the job (those with an `event` field) go to `onEvent`.
+     * Aborting `signal` tells the worker to stop decoding and resolves at once
+     * with a `status: "cancelled"` result.
+     */
+    async request(
+        message: WorkerMessage,
+        audio?: Buffer,
+        onEvent?: (event: WorkerMessage) => void,
+        signal?: AbortSignal
+    ): Promise<WorkerMessage> {
+        return (await this.submit(message, audio, onEvent, signal)).result;
+    }
+
+    /**
+     * Start a live decode fed through a shared-memory ring (Linux only):
+     * audio written to the returned stream is copied into the ring and only
+     * small notices cross the socket. Partial results go to `onEvent`.
+     */
+    async openStream(
+        message: WorkerMessage,
+        onEvent?: (event: WorkerMessage) => void,
+        signal?: AbortSignal
+    ): Promise<VoskLiveStream> {
+        const ring = new ShmRing();
+        try {
+            const { id, result } = await this.submit(
+                { ...message, op: 'stream', shm: ring.name, slots: ring.slots, slot_bytes: ring.slotBytes },
+                undefined,
+                onEvent,
+                signal
+            );
+            return new VoskLiveStream(this, id, ring, result);
+        } catch (err) {
+            ring.close();
+            throw err;
+        }
+    }
+
+    /** Send a frame that gets no reply (stream notices). */
+    notify(message: WorkerMessage): void {
+        this.socket?.write(encodeFrame(message));
+    }
+
+    private async submit(
+        message: WorkerMessage,
+        audio?: Buffer,
+        onEvent?: (event: WorkerMessage) => void,
+        signal?: AbortSignal
+    ): Promise<{ id: number; result: Promise<WorkerMessage> }> {
+        // Startup can take up to startupTimeoutMs; a disconnect or deadline must not wait for it
+        if (!(await this.startUnlessAborted(signal))) {
+            return { id: 0, result: Promise.resolve(cancelledResult(signal!)) };
+        }
+
+        const socket = this.socket;
+        if (!socket) throw new Error('Vosk worker is not connected');
+
+        const id = this.nextId++;
+        const frame = encodeFrame(
+            { ...message, id, ...(audio ? { audio_len: audio.length } : {}) },
+            audio
+        );
+
+        const result = new Promise<WorkerMessage>((resolve, reject) => {
+            const onAbort = () => {
+                if (!this.pending.delete(id)) return;
+                socket.write(encodeFrame({ op: 'cancel', target: id }));
+                resolve(cancelledResult(signal!));
+            };
+            const done = () => signal?.removeEventListener('abort', onAbort);
+
+            this.pending.set(id, {
+                resolve: (msg) => {
+                    done();
+                    resolve(msg);
+                },
+                reject: (err) => {
+                    done();
+                    reject(err);
+                },
+                onEvent,
+            });
+            signal?.addEventListener('abort', onAbort, { once: true });
+            socket.write(frame);
+        });
+        return { id, result };
+    }
+
+    /**
+     * Wait for the worker to be ready; resolves false as soon as `signal`
+     * aborts instead. Startup itself carries on for later jobs.
+     */
+    private async startUnlessAborted(signal?: AbortSignal): Promise<boolean> {
+        if (!signal) {
+            await this.start();
+            return true;
+        }
+        if (signal.aborted) return false;
+
+        let onAbort: () => void = () => {};
+        const aborted = new Promise<boolean>((resolve) => {
+            onAbort = () => resolve(false);
+            signal.addEventListener('abort', onAbort, { once: true });
+        });
+        try {
+            return await Promise.race([this.start().then(() => true), aborted]);
+        } finally {
+            signal.removeEventListener('abort', onAbort);
+        }
+    }
+
+    /** Start the worker and connect to its socket (idempotent). */
+    start(): Promise<void> {
+        if (!this.ready) {
+            this.ready = this.spawnAndConnect().catch((err) => {
+                this.stop();
+                throw err;
+            });
+        }
+        return this.ready;
+    }
+
+    /** Kill the worker and fail any in-flight jobs. */
+    stop(): void {
+        this.failPending(new Error('Vosk worker stopped'));
+        this.socket?.destroy();
+        this.socket = null;
+        if (this.proc && this.proc.exitCode === null) this.proc.kill('SIGTERM');
+        this.proc = null;
+        this.ready = null;
+        this.buffer = Buffer.alloc(0);
+    }
+
+    private spawnAndConnect(): Promise<void> {
+        const args = [this.opts.scriptPath, '--serve', '--socket', this.socketPath];
+        for (const [lang, modelPath] of Object.entries(this.opts.modelPaths)) {
+            args.push('--lang-model', `${lang}=${modelPath}`);
+        }
+        if (this.opts.workers) args.push('--workers', String(this.opts.workers));
+        if (this.opts.maxWorkers) args.push('--max-workers', String(this.opts.maxWorkers));
+        if (this.opts.cacheDir) args.push('--cache-dir', this.opts.cacheDir);
+        if (this.opts.extraArgs) args.push(...this.opts.extraArgs);
+
+        const proc = spawn(this.opts.pythonBin, args, { stdio: ['ignore', 'pipe', 'pipe'] });
+        this.proc = proc;
+
+        let stderr = '';
+        proc.stderr?.on('data', (data: Buffer) => {
+            stderr = (stderr + data.toString()).slice(-2000);
+        });
+
+        proc.on('exit', (code) => {
+            if (this.proc !== proc) return;
+            console.error(`[Vosk] Worker exited with code ${code}: ${stderr.slice(-500)}`);
+            this.stop();
+        });
+
+        return new Promise<void>((resolve, reject) => {
+            const timer = setTimeout(() => {
+                reject(new Error('Vosk worker did not become ready in time'));
+            }, this.opts.startupTimeoutMs ?? 120_000);
+
+            proc.on('error', (err) => {
+                clearTimeout(timer);
+                reject(new Error(`Failed to spawn Python: ${err.message}`));
+            });
+
+            proc.on('exit', (code) => {
+                clearTimeout(timer);
+                reject(new Error(`Vosk worker exited during startup (code ${code}): ${stderr.slice(-500)}`));
+            });
+
+            // The worker prints one JSON line once its socket is listening
+            const lines = readline.createInterface({ input: proc.stdout! });
+            lines.once('line', (line) => {
+                let event: WorkerMessage;
+                try {
+                    event = JSON.parse(line);
+                } catch {
+                    clearTimeout(timer);
+                    reject(new Error(`Unexpected Vosk worker output: ${line.slice(0, 200)}`));
+                    return;
+                }
+                if (event.event !== 'ready') {
+                    clearTimeout(timer);
+                    reject(new Error(String(event.error || 'Vosk worker failed to start')));
+                    return;
+                }
+
+                this.connect()
+                    .then(resolve, reject)
+                    .finally(() => clearTimeout(timer));
+            });
+        });
+    }
+
+    private connect(): Promise<void> {
+        return new Promise((resolve, reject) => {
+            const socket = net.createConnection(this.socketPath);
+
+            socket.once('connect', () => {
+                this.socket = socket;
+                resolve();
+            });
+            socket.once('error', reject);
+
+            socket.on('data', (chunk: Buffer) => this.onData(chunk));
+            socket.on('close', () => {
+                if (this.socket === socket) this.stop();
+            });
+        });
+    }
+
+    private onData(chunk: Buffer): void {
+        this.buffer = this.buffer.length ? Buffer.concat([this.buffer, chunk]) : chunk;
+
+        while (this.buffer.length >= HEADER_BYTES) {
+            const length = this.buffer.readUInt32BE(0);
+            if (this.buffer.length < HEADER_BYTES + length) break;
+
+            const body = this.buffer.subarray(HEADER_BYTES, HEADER_BYTES + length);
+            this.buffer = this.buffer.subarray(HEADER_BYTES + length);
+
+            let message: WorkerMessage;
+            try {
+                message = JSON.parse(body.toString('utf8'));
+            } catch {
+                console.error('[Vosk] Dropping malformed worker frame');
+                continue;
+            }
+
+            const job = this.pending.get(message.id as number);
+            if (job && message.event) {
+                job.onEvent?.(message);
+            } else if (job) {
+                this.pending.delete(message.id as number);
+                job.resolve(message);
+            }
+        }
+    }
+
+    private failPending(err: Error): void {
+        for (const job of this.pending.values()) job.reject(err);
+        this.pending.clear();
+    }
+}
+
+// ─── Live Stream ──────────────────────────────────────────────────────────────
+
+/**
+ * Client end of a worker `stream` job. PCM written here lands in the
+ * shared-memory ring; the worker decodes it straight from the slots.
+ */
+export class VoskLiveStream {
+    private done = false;
+    private carry: Buffer | null = null;
+
+    constructor(
+        private readonly worker: VoskWorker,
+        private readonly id: number,
+        private readonly ring: ShmRing,
+        private readonly result: Promise<WorkerMessage>
+    ) {
+        const finish = () => {
+            this.done = true;
+            ring.close();
+        };
+        result.then(finish, finish);
+    }
+
+    /**
+     * Copy PCM (16kHz 16-bit mono) into the ring, waiting for the worker
+     * when every slot is still unread. A no-op once the job has finished.
+     */
+    async write(pcm: Buffer): Promise<void> {
+        if (this.carry) {
+            pcm = Buffer.concat([this.carry, pcm]);
+            this.carry = null;
+        }
+        if (pcm.length % 2) {
+            // Keep whole 16-bit samples per frame
+            this.carry = Buffer.from(pcm.subarray(pcm.length - 1));
+            pcm = pcm.subarray(0, pcm.length - 1);
+        }
+
+        let seq = this.ring.nextSeq;
+        let lens: number[] = [];
+        for (let offset = 0; offset < pcm.length; offset += this.ring.slotBytes) {
+            if (this.ring.full()) {
+                // Tell the worker about what is already written before waiting on it
+                this.flush(seq, lens);
+                seq = this.ring.nextSeq;
+                lens = [];
+            }
+            if (!(await this.ring.waitForSlot(() => this.done)) || this.done) return;
+            const frame = pcm.subarray(offset, offset + this.ring.slotBytes);
+            this.ring.write(frame);
+            lens.push(frame.length);
+        }
+        this.flush(seq, lens);
+    }
+
+    /** Signal end of audio and wait for the final result. */
+    async end(): Promise<WorkerMessage> {
+        if (!this.done) this.worker.notify({ op: 'stream_end', target: this.id });
+        return this.result;
+    }
+
+    private flush(seq: number, lens: number[]): void {
+        if (lens.length && !this.done) this.worker.notify({ op: 'audio', target: this.id, seq, lens });
+    }
+}